@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Immigration E-Signature',
-    'version': '19.0.1.1.0',
+    'version': '19.0.1.3.0',
     'category': 'Services/Immigration',
     'summary': 'Electronic signature and payment processing for immigration services',
     'description': """
@@ -10,9 +10,12 @@ Immigration Portal - E-Signature Module
 
 This module provides electronic signature and payment integration:
 
-* E-signature capture (draw or type)
+* E-signature capture (draw or type), drawn signatures stored as vector strokes
 * Dual signature workflow (client + consultant)
+* Batch counter-signing with one signature
 * PDF document stamping with signature and audit trail
+* Hash-chained signing ledger with SHA-256 document digests and public verification
+* Background finalization queue with retries (stamping, emails, stage moves)
 * Service agreement generation from templates
 * Integration with Odoo's payment system
 * Automatic stage advancement on signature/payment
@@ -49,10 +52,13 @@ Developed for The Migration Monitor.
         'data/mail_template_data.xml',
         # Views - Backend
         'views/esign_request_views.xml',
+        'views/esign_job_views.xml',
+        'views/esign_ledger_views.xml',
         'views/immigration_case_views.xml',
         'views/menu_views.xml',
         # Wizards
         'wizard/consultant_sign_wizard_views.xml',
+        'wizard/batch_sign_wizard_views.xml',
         # Views - Portal
         'views/portal_esign_templates.xml',
         'views/portal_quote_templates.xml',
@@ -62,6 +68,7 @@ Developed for The Migration Monitor.
         'web.assets_frontend': [
             'mm_esign/static/src/scss/esign.scss',
             'mm_esign/static/src/js/signature_pad.js',
+            'mm_esign/static/src/js/signature_strokes.js',
             'mm_esign/static/src/js/esign.js',
         ],
     },
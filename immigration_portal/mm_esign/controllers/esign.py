@@ -1,13 +1,26 @@
 # -*- coding: utf-8 -*-
 
-import base64
 import json
+from datetime import timedelta
 
 from odoo import http, fields, _
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal
+from odoo.addons.mm_portal.controllers.download import has_binary, stream_binary_field
+from odoo.addons.mm_portal.controllers.idempotency import idempotent
+from odoo.addons.mm_portal.controllers.renditions import (
+    rendition_image_response,
+    rendition_status_response,
+)
 from odoo.exceptions import AccessError, MissingError, ValidationError
 
+from ..tools import document_digest, signature_strokes
+
+# Validity of the signing tokens issued to logged-in clients
+PORTAL_TOKEN_LIFETIME = timedelta(hours=2)
+# Largest PDF the public verification page hashes, in MB
+VERIFY_MAX_SIZE_MB = 50
+
 
 class EsignPortal(CustomerPortal):
     """Portal controller for e-signature and payment pages."""
@@ -92,18 +105,33 @@ class EsignPortal(CustomerPortal):
         esign_request.action_generate_document()
         esign_request.action_send()
         
-        return request.redirect(f'/my/immigration/sign/{esign_request.access_token}')
+        return request.redirect(esign_request._get_portal_signing_path())
 
     # =====================
     # Signing Routes
     # =====================
-    @http.route(['/my/immigration/sign/<string:token>'], type='http', auth='public', website=True)
+    @http.route(['/my/immigration/esign/<int:request_id>/sign'], type='http', auth='user', website=True)
+    def portal_sign_open(self, request_id, **kw):
+        """Signing page of one of the logged-in client's requests.
+
+        Signing tokens are only stored hashed, so the portal cannot link to
+        the emailed URL: the client gets a short-lived token of their own,
+        leaving the emailed link valid.
+        """
+        esign_request = request.env['mm.esign.request'].sudo().browse(request_id)
+        if not esign_request.exists() or esign_request.partner_id != request.env.user.partner_id:
+            raise AccessError(_("You do not have access to this signature request."))
+        token = esign_request._generate_access_token(
+            expires_at=fields.Datetime.now() + PORTAL_TOKEN_LIFETIME,
+            revoke=False,
+        )
+        return request.redirect(f'/my/immigration/sign/{token}')
+
+    @http.route(['/my/immigration/sign/<string:token>'], type='http', auth='public', website=True,
+                mm_rate_limit='esign')
     def portal_sign_view(self, token, **kw):
         """Public signing page accessed via token in email."""
-        # Find esign request by token
-        esign_request = request.env['mm.esign.request'].sudo().search([
-            ('access_token', '=', token)
-        ], limit=1)
+        esign_request = request.env['mm.esign.request']._get_from_token(token)
         
         if not esign_request:
             return request.render('mm_esign.portal_sign_invalid_token', {})
@@ -160,34 +188,47 @@ class EsignPortal(CustomerPortal):
         return request.render('mm_esign.portal_sign_view', values)
 
     @http.route(['/my/immigration/sign/<string:token>/document'], 
-                type='http', auth='public', website=True)
+                type='http', auth='public', website=True, mm_rate_limit='esign')
     def portal_sign_document_view(self, token, **kw):
         """Return the PDF document for viewing in browser."""
-        esign_request = request.env['mm.esign.request'].sudo().search([
-            ('access_token', '=', token)
-        ], limit=1)
+        esign_request = request.env['mm.esign.request']._get_from_token(token)
         
-        if not esign_request or not esign_request.document:
+        if not esign_request or not has_binary(esign_request, 'document'):
             return request.not_found()
         
-        # Return PDF
-        pdf_content = base64.b64decode(esign_request.document)
-        
-        return request.make_response(
-            pdf_content,
-            headers=[
-                ('Content-Type', 'application/pdf'),
-                ('Content-Disposition', f'inline; filename="{esign_request.document_filename}"'),
-            ]
+        # Stream the PDF from the filestore (supports range requests)
+        return stream_binary_field(
+            esign_request,
+            'document',
+            filename=esign_request.document_filename,
+            as_attachment=False,
         )
 
+    @http.route(['/my/immigration/sign/<string:token>/pages'],
+                type='http', auth='public', methods=['GET'], mm_rate_limit='esign')
+    def portal_sign_document_pages(self, token, **kw):
+        """Page previews of the document to sign, for phones."""
+        esign_request = request.env['mm.esign.request']._get_from_token(token)
+        if not esign_request or not has_binary(esign_request, 'document'):
+            return request.not_found()
+        return rendition_status_response(
+            esign_request, 'document', f'/my/immigration/sign/{token}/pages')
+
+    @http.route(['/my/immigration/sign/<string:token>/pages/<any(page,thumbnail):kind>/<int:page>'],
+                type='http', auth='public', methods=['GET'], mm_rate_limit='esign')
+    def portal_sign_document_page_image(self, token, kind, page, **kw):
+        esign_request = request.env['mm.esign.request']._get_from_token(token)
+        if not esign_request or not has_binary(esign_request, 'document'):
+            return request.not_found()
+        return rendition_image_response(esign_request, 'document', kind, page)
+
     @http.route(['/my/immigration/sign/<string:token>/submit'], 
-                type='http', auth='public', website=True, methods=['POST'], csrf=True)
+                type='http', auth='public', website=True, methods=['POST'], csrf=True,
+                mm_rate_limit='esign')
+    @idempotent
     def portal_sign_submit(self, token, **kw):
         """Process signature submission."""
-        esign_request = request.env['mm.esign.request'].sudo().search([
-            ('access_token', '=', token)
-        ], limit=1)
+        esign_request = request.env['mm.esign.request']._get_from_token(token)
         
         if not esign_request:
             return json.dumps({'success': False, 'error': 'Invalid token'})
@@ -203,11 +244,19 @@ class EsignPortal(CustomerPortal):
         signature_data = kw.get('signature_data')
         typed_name = kw.get('typed_name')
         
-        if not signature_data:
+        # Drawn signatures arrive as vector strokes; PNG stays the fallback
+        strokes = None
+        if signature_type == 'draw' and kw.get('signature_strokes'):
+            try:
+                strokes = signature_strokes.encode(*signature_strokes.parse_json(kw['signature_strokes']))
+            except signature_strokes.StrokeFormatError as e:
+                return json.dumps({'success': False, 'error': str(e)})
+        
+        if not signature_data and not strokes:
             return json.dumps({'success': False, 'error': 'Signature is required'})
         
         # Clean up base64 data URL if present
-        if signature_data.startswith('data:image'):
+        if signature_data and signature_data.startswith('data:image'):
             signature_data = signature_data.split(',')[1]
         
         # Get client info
@@ -222,6 +271,7 @@ class EsignPortal(CustomerPortal):
                 typed_name=typed_name,
                 ip_address=ip_address,
                 user_agent=user_agent[:500],  # Truncate long user agents
+                signature_strokes=strokes,
             )
             
             return json.dumps({
@@ -233,12 +283,10 @@ class EsignPortal(CustomerPortal):
             return json.dumps({'success': False, 'error': str(e)})
 
     @http.route(['/my/immigration/sign/<string:token>/complete'], 
-                type='http', auth='public', website=True)
+                type='http', auth='public', website=True, mm_rate_limit='esign')
     def portal_sign_complete(self, token, **kw):
         """Show signature completion page."""
-        esign_request = request.env['mm.esign.request'].sudo().search([
-            ('access_token', '=', token)
-        ], limit=1)
+        esign_request = request.env['mm.esign.request']._get_from_token(token)
         
         if not esign_request:
             return request.redirect('/my/immigration')
@@ -259,14 +307,74 @@ class EsignPortal(CustomerPortal):
             'page_name': 'immigration_sign_complete',
             'esign_request': esign_request,
             'case': esign_request.case_id,
+            'token': token,
+            # Stamping, email and invoicing still running in the background
+            'finalizing': esign_request.finalization_state == 'pending',
             'show_payment_link': (
                 esign_request.document_type == 'service_agreement' and 
-                esign_request.state == 'signed'  # Only show payment link when fully signed
+                esign_request.state == 'signed' and  # Only show payment link when fully signed
+                esign_request.finalization_state != 'pending'
             ),
         }
         
         return request.render('mm_esign.portal_sign_complete', values)
 
+    @http.route(['/my/immigration/sign/<string:token>/status'], 
+                type='http', auth='public', methods=['GET'], mm_rate_limit='esign')
+    def portal_sign_status(self, token, **kw):
+        """Finalization status, polled by the completion page."""
+        esign_request = request.env['mm.esign.request']._get_from_token(token)
+        
+        if not esign_request:
+            return request.make_json_response({'error': 'Invalid token'}, status=404)
+        
+        finalization_state = esign_request.finalization_state or 'none'
+        return request.make_json_response({
+            'state': esign_request.state,
+            'finalization_state': finalization_state,
+            'done': finalization_state in ('done', 'none'),
+            'failed': finalization_state == 'failed',
+        }, headers=[('Cache-Control', 'no-store')])
+
+    @http.route(['/my/immigration/verify'], type='http', auth='public', website=True,
+                methods=['GET', 'POST'], csrf=True, mm_rate_limit='verify')
+    def portal_verify_document(self, digest=None, document=None, **kw):
+        """Check a PDF, or its SHA-256, against the signing ledger.
+
+        An uploaded PDF that is not in the ledger itself may still embed a
+        recorded revision, e.g. the client-signed revision of a
+        counter-signed agreement.
+        """
+        values = {
+            'page_name': 'immigration_verify',
+            'digest': None,
+            'entries': None,
+        }
+        revisions = []
+        if document and hasattr(document, 'stream'):
+            max_size = VERIFY_MAX_SIZE_MB * 1024 * 1024
+            # The request may be chunked: fall back to the size of the upload
+            size = request.httprequest.content_length or document.stream.seek(0, 2)
+            if size > max_size:
+                values['error'] = _("The file is too large. The maximum size is %s MB.") % VERIFY_MAX_SIZE_MB
+                return request.render('mm_esign.portal_verify_document', values)
+            document.stream.seek(0)
+            digest, revisions = document_digest.sha256_with_revisions(document.stream)
+        digest = (digest or '').strip().lower() or None
+        values['digest'] = digest
+        if digest:
+            Ledger = request.env['mm.esign.ledger']
+            entries = Ledger._find_by_digest(digest)
+            for revision in reversed(revisions):
+                if entries:
+                    break
+                entries = Ledger._find_by_digest(revision)
+                if entries:
+                    values['revision_digest'] = revision
+            values['entries'] = entries
+            values['intact'] = all(entry._check_entry() for entry in entries)
+        return request.render('mm_esign.portal_verify_document', values)
+
     # =====================
     # Payment Routes
     # =====================
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Register the signing tokens issued before the token store existed."""
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Token = env['mm.access.token']
+    # Read in SQL: the access_token field is gone from the model since 19.0.1.3.0
+    cr.execute("""
+        SELECT id, access_token, expires_at FROM mm_esign_request
+         WHERE access_token IS NOT NULL
+    """)
+    Token.create([{
+        'token_hash': Token._hash_token(access_token),
+        'purpose': 'esign',
+        'res_model': 'mm.esign.request',
+        'res_id': request_id,
+        'expires_at': expires_at,
+    } for request_id, access_token, expires_at in cr.fetchall()])
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""Drop the plain signing tokens; only their hashes are kept."""
+
+
+def migrate(cr, version):
+    cr.execute("ALTER TABLE mm_esign_request DROP COLUMN IF EXISTS access_token")
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 
+from . import access_token
 from . import esign_request
 from . import immigration_case
 from . import account_move
+from . import case_invoice_link
+from . import esign_job
+from . import esign_ledger
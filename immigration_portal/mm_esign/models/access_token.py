@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+
+
+class AccessToken(models.Model):
+    _inherit = 'mm.access.token'
+
+    purpose = fields.Selection(
+        selection_add=[
+            ('esign', 'Signing Link'),
+        ],
+        ondelete={'esign': 'cascade'},
+    )
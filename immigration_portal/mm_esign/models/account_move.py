@@ -1,43 +1,39 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, api
+from odoo import models
 
 
 class AccountMove(models.Model):
     """Extends account.move to detect payment completion for immigration cases."""
     _inherit = 'account.move'
 
+    def _post(self, soft=True):
+        posted = super()._post(soft=soft)
+        invoices = posted.filtered(lambda m: m.move_type == 'out_invoice')
+        if invoices:
+            self.env['mm.case.invoice.link'].sudo()._index(moves=invoices)
+        return posted
+
     def write(self, vals):
         """Override write to detect payment state changes."""
         res = super().write(vals)
         
         # Check if payment_state changed to paid
         if 'payment_state' in vals and vals['payment_state'] in ('paid', 'in_payment'):
-            self._check_immigration_case_payment()
+            self._dispatch_case_payments()
         
         return res
 
-    def _check_immigration_case_payment(self):
-        """Check if any linked immigration cases should advance."""
-        for move in self:
-            if move.move_type != 'out_invoice':
-                continue
-            
-            # Find sale orders linked to this invoice
-            sale_orders = self.env['sale.order'].search([
-                ('invoice_ids', 'in', move.id)
-            ])
-            
-            for order in sale_orders:
-                # Find immigration cases linked to this sale order
-                cases = self.env['mm.immigration.case'].search([
-                    ('sale_order_id', '=', order.id)
-                ])
-                
-                for case in cases:
-                    # Invalidate computed field cache to ensure fresh computation
-                    case.invalidate_recordset(['payment_confirmed'])
-                    
-                    # Check if payment is now confirmed and case is in payment stage
-                    if case.payment_confirmed and case.state == 'paid':
-                        case._on_payment_complete()
+    def _dispatch_case_payments(self):
+        """Notify the cases paid by these invoices, once per case.
+
+        The affected cases of the whole recordset are resolved with one
+        query on ``mm.case.invoice.link``; each case then gets the roles
+        its invoices were paid for (its PR order, GCMS orders, ...).
+        """
+        invoices = self.filtered(lambda m: m.move_type == 'out_invoice')
+        if not invoices:
+            return
+        case_roles = self.env['mm.case.invoice.link']._get_case_roles(invoices)
+        for case, roles in case_roles.items():
+            case._on_invoices_paid(roles)
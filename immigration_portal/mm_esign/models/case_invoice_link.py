@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+import psycopg2
+
+from odoo import models, fields, api
+
+
+class CaseInvoiceLink(models.Model):
+    """Reverse index from customer invoices to the cases they pay.
+
+    One row per (invoice, case, role), where the role tells which order
+    of the case the invoice belongs to (see
+    ``mm.immigration.case._get_invoice_link_roles``). Rows are added when
+    invoices are posted and when an order is set on a case, so a payment
+    resolves every case affected by a whole batch of invoices with one
+    indexed query instead of searching orders and cases invoice by
+    invoice. It is only an index: invoices missing from it are indexed
+    again from their sale lines when they are paid.
+    """
+    _name = 'mm.case.invoice.link'
+    _description = 'Case Invoice Index'
+    _order = 'move_id, case_id'
+
+    move_id = fields.Many2one(
+        comodel_name='account.move',
+        string='Invoice',
+        required=True,
+        ondelete='cascade',
+        index=True,
+        readonly=True,
+    )
+    case_id = fields.Many2one(
+        comodel_name='mm.immigration.case',
+        string='Case',
+        required=True,
+        ondelete='cascade',
+        index=True,
+        readonly=True,
+    )
+    role = fields.Selection(
+        selection=[
+            ('case_order', 'Case Order'),
+        ],
+        string='Role',
+        required=True,
+        readonly=True,
+    )
+
+    _link_unique = models.UniqueIndex('(move_id, case_id, role)')
+
+    # =====================
+    # Indexing
+    # =====================
+    @api.model
+    def _query_links(self, moves=None, cases=None):
+        """``(move_id, case_id, role)`` of the invoices of ``moves``, or of
+        the orders of ``cases``, read from the sale lines in one query."""
+        roles = self.env['mm.immigration.case']._get_invoice_link_roles()
+        records = moves if moves is not None else cases
+        if not roles or not records:
+            return set()
+        where = 'aml.move_id = ANY(%s)' if moves is not None else 'c.id = ANY(%s)'
+        Case = self.env['mm.immigration.case']
+        selects = []
+        params = []
+        for role, field_name in roles.items():
+            # Field names come from code; the lookup fails loudly on a typo
+            column = Case._fields[field_name].name
+            selects.append(f"""
+                SELECT aml.move_id, c.id, %s
+                  FROM account_move_line aml
+                  JOIN sale_order_line_invoice_rel rel ON rel.invoice_line_id = aml.id
+                  JOIN sale_order_line sol ON sol.id = rel.order_line_id
+                  JOIN mm_immigration_case c ON c.{column} = sol.order_id
+                 WHERE {where}
+            """)
+            params += [role, list(records.ids)]
+        self.env.cr.execute(' UNION '.join(selects), params)
+        return set(self.env.cr.fetchall())
+
+    @api.model
+    def _index(self, moves=None, cases=None):
+        """Bring the rows of ``moves`` (or of ``cases``) up to date."""
+        self.env.flush_all()
+        expected = self._query_links(moves=moves, cases=cases)
+        domain = [('move_id', 'in', moves.ids)] if moves is not None else [('case_id', 'in', cases.ids)]
+        current = self.sudo().search(domain)
+        existing = {(link.move_id.id, link.case_id.id, link.role) for link in current}
+        current.filtered(lambda link: (link.move_id.id, link.case_id.id, link.role) not in expected).unlink()
+        missing = [
+            {'move_id': move_id, 'case_id': case_id, 'role': role}
+            for move_id, case_id, role in expected - existing
+        ]
+        if not missing:
+            return
+        try:
+            with self.env.cr.savepoint():
+                self.sudo().create(missing)
+        except psycopg2.IntegrityError:
+            # Indexed concurrently by another transaction
+            pass
+
+    # =====================
+    # Dispatch
+    # =====================
+    @api.model
+    def _get_case_roles(self, moves):
+        """Cases paid by ``moves``, as ``{case: {roles}}``.
+
+        One query on the index; invoices not found in it (posted before
+        the index existed) are indexed from their sale lines first.
+        """
+        Link = self.sudo()
+        self.env.cr.execute("""
+            SELECT move_id, case_id, role FROM mm_case_invoice_link WHERE move_id = ANY(%s)
+        """, [list(moves.ids)])
+        rows = self.env.cr.fetchall()
+        unindexed = moves - moves.browse(list({move_id for move_id, __, __ in rows}))
+        if unindexed:
+            Link._index(moves=unindexed)
+            self.env.cr.execute("""
+                SELECT move_id, case_id, role FROM mm_case_invoice_link WHERE move_id = ANY(%s)
+            """, [list(unindexed.ids)])
+            rows += self.env.cr.fetchall()
+
+        roles_by_case_id = {}
+        for __, case_id, role in rows:
+            roles_by_case_id.setdefault(case_id, set()).add(role)
+        # Browsed together, so the handlers read all cases in one prefetch
+        cases = self.env['mm.immigration.case'].browse(list(roles_by_case_id))
+        return {case: roles_by_case_id[case.id] for case in cases}
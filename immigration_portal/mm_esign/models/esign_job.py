@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+from datetime import timedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+
+from ..tools import pdf_stamp
+
+_logger = logging.getLogger(__name__)
+
+# Jobs processed per cron run before the cron re-triggers itself
+JOB_BATCH_SIZE = 20
+# Retry delays in minutes, by attempt number; the last one repeats
+RETRY_BACKOFF = (1, 5, 15, 60)
+
+
+class EsignJob(models.Model):
+    """Durable queue of post-signature work for e-sign requests.
+
+    Signing only records the signature and enqueues a job; the cron
+    ``ir_cron_process_esign_jobs`` stamps the PDF, sends the emails and
+    moves the case. Each step is flagged once done so a retried job never
+    stamps, emails or advances the case twice.
+    """
+    _name = 'mm.esign.job'
+    _description = 'E-Signature Job'
+    _order = 'next_attempt_at, id'
+
+    esign_request_id = fields.Many2one(
+        comodel_name='mm.esign.request',
+        string='Signature Request',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    job_type = fields.Selection(
+        selection=[
+            ('notify_consultant', 'Notify Consultant'),
+            ('finalize', 'Finalize Signed Document'),
+        ],
+        string='Job Type',
+        required=True,
+    )
+    state = fields.Selection(
+        selection=[
+            ('pending', 'Pending'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        string='Status',
+        default='pending',
+        required=True,
+        index=True,
+    )
+    attempts = fields.Integer(
+        string='Attempts',
+        readonly=True,
+    )
+    max_attempts = fields.Integer(
+        string='Max Attempts',
+        default=5,
+    )
+    next_attempt_at = fields.Datetime(
+        string='Next Attempt',
+        default=fields.Datetime.now,
+        index=True,
+    )
+    done_at = fields.Datetime(
+        string='Completed',
+        readonly=True,
+    )
+    last_error = fields.Text(
+        string='Last Error',
+        readonly=True,
+    )
+
+    # =====================
+    # Step Flags (idempotency)
+    # =====================
+    pdf_done = fields.Boolean(
+        string='PDF Stamped',
+        readonly=True,
+    )
+    email_done = fields.Boolean(
+        string='Email Sent',
+        readonly=True,
+    )
+    workflow_done = fields.Boolean(
+        string='Case Updated',
+        readonly=True,
+    )
+
+    # =====================
+    # Queue API
+    # =====================
+    @api.model
+    def _enqueue(self, esign_request, job_type):
+        """Queue a job for ``esign_request`` unless one is already open.
+
+        Returns the new or existing job and wakes the cron up.
+        """
+        Job = self.sudo()
+        job = Job.search([
+            ('esign_request_id', '=', esign_request.id),
+            ('job_type', '=', job_type),
+            ('state', '=', 'pending'),
+        ], limit=1)
+        if not job:
+            job = Job.create({
+                'esign_request_id': esign_request.id,
+                'job_type': job_type,
+            })
+        Job._trigger_cron()
+        return job
+
+    @api.model
+    def _trigger_cron(self):
+        cron = self.env.ref('mm_esign.ir_cron_process_esign_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def action_retry(self):
+        """Put failed jobs back in the queue."""
+        if self.filtered(lambda j: j.state != 'failed'):
+            raise UserError(_("Only failed jobs can be retried."))
+        self.write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_attempt_at': fields.Datetime.now(),
+        })
+        self._trigger_cron()
+        return True
+
+    # =====================
+    # Cron Methods
+    # =====================
+    @api.model
+    def _cron_process_jobs(self, limit=JOB_BATCH_SIZE):
+        """Run due jobs, one transaction each.
+
+        Jobs are claimed with ``FOR UPDATE SKIP LOCKED`` so several cron
+        workers can drain the queue without blocking on each other.
+        """
+        prestamped = self._prestamp(limit)
+        processed = 0
+        while processed < limit:
+            self.env.cr.execute("""
+                SELECT id FROM mm_esign_job
+                 WHERE state = 'pending'
+                   AND (next_attempt_at IS NULL OR next_attempt_at <= %s)
+                 ORDER BY next_attempt_at, id
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+            """, [fields.Datetime.now()])
+            row = self.env.cr.fetchone()
+            if not row:
+                return True
+            self.browse(row[0]).with_context(mm_render_background=True)._run(prestamped)
+            self.env.cr.commit()
+            processed += 1
+
+        # More work may be waiting: come back right away
+        self._trigger_cron()
+        return True
+
+    @api.model
+    def _prestamp(self, limit):
+        """Stamp the PDFs of due finalize jobs in parallel processes.
+
+        Returns ``{esign request id: stamped PDF bytes}``; the jobs then
+        store them one transaction at a time. Documents that fail here are
+        simply stamped again in-process by their job, which records the
+        error and retries as usual.
+        """
+        jobs = self.search([
+            ('state', '=', 'pending'),
+            ('job_type', '=', 'finalize'),
+            ('pdf_done', '=', False),
+            '|', ('next_attempt_at', '=', False), ('next_attempt_at', '<=', fields.Datetime.now()),
+        ], limit=limit)
+        requests = jobs.esign_request_id.filtered(
+            lambda r: (
+                r.state in ('signed', 'client_signed')
+                and r.document
+                and (r.signature_data or r.signature_strokes)
+            )
+        )
+        # Forking is unsafe in the threaded server (HTTP and cron threads
+        # may hold locks): there, each job stamps its PDF in-process
+        if len(requests) < 2 or not tools.config['workers']:
+            return {}
+
+        documents = {request.id: request._get_stamp_job() for request in requests}
+        governor = self.env['mm.render.governor'].with_context(mm_render_background=True)
+        with governor._slot('mm_esign.stamp', count=min(len(documents), os.cpu_count() or 1)) as workers:
+            results = pdf_stamp.stamp_many(documents, workers)
+        for request_id, result in results.items():
+            if isinstance(result, Exception):
+                _logger.warning("Parallel stamping of e-sign request %s failed: %s", request_id, result)
+        return {
+            request_id: result for request_id, result in results.items()
+            if not isinstance(result, Exception)
+        }
+
+    def _run(self, prestamped=None):
+        """Run one job and record the outcome, retrying with backoff on error.
+
+        ``prestamped`` maps e-sign request ids to PDFs already stamped by
+        ``_prestamp``. Steps are not wrapped together: a failing step only
+        rolls back itself, and the steps done before it stay flagged.
+        """
+        self.ensure_one()
+        self.attempts += 1
+        try:
+            getattr(self, f'_run_{self.job_type}')(prestamped or {})
+        except Exception as e:
+            _logger.exception("E-sign job %s (%s) failed", self.id, self.job_type)
+            self.invalidate_recordset()
+            failed = self.attempts >= self.max_attempts
+            delay = RETRY_BACKOFF[min(self.attempts, len(RETRY_BACKOFF)) - 1]
+            self.write({
+                'state': 'failed' if failed else 'pending',
+                'next_attempt_at': fields.Datetime.now() + timedelta(minutes=delay),
+                'last_error': str(e),
+            })
+            if failed:
+                self.esign_request_id.message_post(
+                    body=_("Finalization failed after %s attempts: %s") % (self.attempts, e),
+                    message_type='notification',
+                )
+            return False
+        self.write({
+            'state': 'done',
+            'done_at': fields.Datetime.now(),
+            'last_error': False,
+        })
+        return True
+
+    def _run_step(self, flag, step):
+        """Run ``step`` once: it commits with its flag or not at all."""
+        if self[flag]:
+            return
+        with self.env.cr.savepoint():
+            step()
+            self[flag] = True
+            self.flush_recordset([flag])
+
+    # =====================
+    # Job Handlers
+    # =====================
+    def _run_notify_consultant(self, prestamped):
+        esign_request = self.esign_request_id
+        if esign_request.state == 'pending_consultant':
+            self._run_step('pdf_done', esign_request._generate_client_revision)
+        with self.env.cr.savepoint():
+            esign_request._notify_consultant_to_sign()
+
+    def _run_finalize(self, prestamped):
+        esign_request = self.esign_request_id
+        if esign_request.state not in ('signed', 'client_signed'):
+            # Cancelled or reset since it was queued: nothing to finalize
+            return
+
+        def stamp():
+            stamped_pdf = prestamped.get(esign_request.id)
+            if not esign_request._generate_signed_pdf(stamped_pdf) and not esign_request.signed_document:
+                raise UserError(_("The signed PDF could not be generated."))
+
+        self._run_step('pdf_done', stamp)
+        self._run_step('email_done', esign_request._send_completion_email)
+        if esign_request.case_id:
+            self._run_step(
+                'workflow_done',
+                lambda: esign_request.case_id._on_signature_complete(esign_request),
+            )
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+# Key of the advisory lock serializing appends to the chain ('mmel')
+LEDGER_LOCK_KEY = 0x6d6d656c
+# prev_hash of the first entry
+GENESIS_HASH = '0' * 64
+# Entries verified per query when walking the chain
+VERIFY_CHUNK_SIZE = 1000
+
+
+class EsignLedger(models.Model):
+    """Append-only, hash-chained log of signing events.
+
+    Each entry records the SHA-256 of the document at that event and
+    ``entry_hash = SHA-256(prev_hash | entry fields)``. Editing or
+    deleting any past entry breaks the hash of every later one, which
+    ``_verify_chain`` detects. Digests are indexed, so checking a PDF
+    against the ledger is a single lookup.
+    """
+    _name = 'mm.esign.ledger'
+    _description = 'E-Signature Ledger'
+    _order = 'id desc'
+
+    esign_request_id = fields.Many2one(
+        comodel_name='mm.esign.request',
+        string='Signature Request',
+        ondelete='set null',
+        index=True,
+        readonly=True,
+    )
+    request_ref = fields.Char(
+        string='Request Reference',
+        required=True,
+        readonly=True,
+        help='Kept even if the request is deleted; part of the entry hash',
+    )
+    event = fields.Selection(
+        selection=[
+            ('generated', 'Document Generated'),
+            ('sent', 'Sent for Signature'),
+            ('viewed', 'Viewed'),
+            ('client_signed', 'Signed by Client'),
+            ('client_revision', 'Client-Signed PDF Issued'),
+            ('consultant_signed', 'Counter-Signed'),
+            ('finalized', 'Signed PDF Issued'),
+            ('expired', 'Expired'),
+            ('cancelled', 'Cancelled'),
+        ],
+        string='Event',
+        required=True,
+        readonly=True,
+    )
+    document_digest = fields.Char(
+        string='Document SHA-256',
+        readonly=True,
+        index=True,
+    )
+    event_date = fields.Datetime(
+        string='Date',
+        required=True,
+        readonly=True,
+    )
+    user_id = fields.Many2one(
+        comodel_name='res.users',
+        string='Recorded By',
+        readonly=True,
+    )
+    ip_address = fields.Char(
+        string='IP Address',
+        readonly=True,
+    )
+    prev_hash = fields.Char(
+        string='Previous Hash',
+        required=True,
+        readonly=True,
+    )
+    entry_hash = fields.Char(
+        string='Entry Hash',
+        required=True,
+        readonly=True,
+    )
+
+    _entry_hash_unique = models.UniqueIndex('(entry_hash)')
+
+    # =====================
+    # Append-only
+    # =====================
+    def write(self, vals):
+        raise UserError(_("Signing ledger entries cannot be modified."))
+
+    def unlink(self):
+        raise UserError(_("Signing ledger entries cannot be deleted."))
+
+    # =====================
+    # Chain
+    # =====================
+    @api.model
+    def _compute_entry_hash(self, vals):
+        parts = [
+            vals['prev_hash'],
+            vals['request_ref'],
+            vals['event'],
+            vals.get('document_digest') or '',
+            fields.Datetime.to_string(vals['event_date']),
+            str(vals.get('user_id') or ''),
+            vals.get('ip_address') or '',
+        ]
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+    @api.model
+    def _append(self, esign_request, event, document_digest=None, ip_address=None):
+        """Chain a new event for ``esign_request`` and return the entry.
+
+        Appends are serialized by a transaction-level advisory lock, so
+        concurrent signings always chain onto the latest committed entry.
+        """
+        self.env.cr.execute("SELECT pg_advisory_xact_lock(%s)", [LEDGER_LOCK_KEY])
+        self.env.cr.execute("SELECT entry_hash FROM mm_esign_ledger ORDER BY id DESC LIMIT 1")
+        row = self.env.cr.fetchone()
+        vals = {
+            'esign_request_id': esign_request.id,
+            'request_ref': esign_request.name,
+            'event': event,
+            'document_digest': document_digest or False,
+            'event_date': fields.Datetime.now(),
+            'user_id': self.env.uid,
+            'ip_address': ip_address or False,
+            'prev_hash': row[0] if row else GENESIS_HASH,
+        }
+        vals['entry_hash'] = self._compute_entry_hash(vals)
+        return self.sudo().create(vals)
+
+    def _check_entry(self):
+        """True if this entry's hash matches its own content."""
+        self.ensure_one()
+        return self.entry_hash == self._compute_entry_hash({
+            'prev_hash': self.prev_hash,
+            'request_ref': self.request_ref,
+            'event': self.event,
+            'document_digest': self.document_digest,
+            'event_date': self.event_date,
+            'user_id': self.user_id.id,
+            'ip_address': self.ip_address,
+        })
+
+    @api.model
+    def _verify_chain(self):
+        """Walk the whole chain; return the first broken entry, or an empty recordset."""
+        Ledger = self.sudo().with_context(prefetch_fields=False)
+        prev_hash = GENESIS_HASH
+        last_id = 0
+        while True:
+            entries = Ledger.search([('id', '>', last_id)], order='id', limit=VERIFY_CHUNK_SIZE)
+            if not entries:
+                return Ledger.browse()
+            for entry in entries:
+                if entry.prev_hash != prev_hash or not entry._check_entry():
+                    return entry
+                prev_hash = entry.entry_hash
+            last_id = entries[-1].id
+            entries.invalidate_recordset()
+
+    def action_verify_chain(self):
+        broken = self._verify_chain()
+        if broken:
+            raise UserError(_(
+                "The signing ledger has been tampered with: entry %(id)s (%(ref)s, %(event)s) does not match "
+                "the chain."
+            ) % {'id': broken.id, 'ref': broken.request_ref, 'event': broken.event})
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Signing Ledger'),
+                'message': _('The ledger chain is intact.'),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
+    @api.model
+    def _find_by_digest(self, digest):
+        """Ledger entries recording a document with this SHA-256."""
+        if not digest:
+            return self.browse()
+        return self.sudo().search([('document_digest', '=', digest.lower())])
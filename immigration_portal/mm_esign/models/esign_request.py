@@ -1,8 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import base64
-import hashlib
-import uuid
+import logging
 from datetime import timedelta
 from io import BytesIO
 import pytz
@@ -10,12 +9,19 @@ import pytz
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError, AccessError
 
+from odoo.addons.mm_portal.tools.pdf_linearize import linearize_pdf
+
+from ..tools import document_digest, pdf_stamp, signature_strokes
+
+_logger = logging.getLogger(__name__)
+
 
 class EsignRequest(models.Model):
     _name = 'mm.esign.request'
     _description = 'E-Signature Request'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'mm.rendition.mixin']
     _order = 'create_date desc'
+    _rendition_fields = ['document', 'signed_document']
 
     # =====================
     # Core Fields
@@ -79,6 +85,29 @@ class EsignRequest(models.Model):
         string='Signed Filename',
         readonly=True,
     )
+    document_digest = fields.Char(
+        string='Document SHA-256',
+        readonly=True,
+        copy=False,
+    )
+    client_signed_document = fields.Binary(
+        string='Client-Signed Revision',
+        attachment=True,
+        copy=False,
+        readonly=True,
+        help='Document stamped with the client signature only; the counter-signature is appended '
+             'to it as an incremental update',
+    )
+    client_signed_digest = fields.Char(
+        string='Client-Signed Revision SHA-256',
+        readonly=True,
+        copy=False,
+    )
+    signed_digest = fields.Char(
+        string='Signed Document SHA-256',
+        readonly=True,
+        copy=False,
+    )
 
     # =====================
     # Workflow Fields
@@ -109,11 +138,6 @@ class EsignRequest(models.Model):
     # =====================
     # Access Token Fields
     # =====================
-    access_token = fields.Char(
-        string='Access Token',
-        copy=False,
-        readonly=True,
-    )
     expires_at = fields.Datetime(
         string='Expires At',
         copy=False,
@@ -129,6 +153,18 @@ class EsignRequest(models.Model):
         copy=False,
         readonly=True,
     )
+    signature_strokes = fields.Binary(
+        string='Client Signature Strokes',
+        attachment=True,
+        copy=False,
+        readonly=True,
+        help='Vector signature drawn on the signing pad (compact binary format); '
+             'preferred over the image when stamping',
+    )
+    signature_preview = fields.Binary(
+        string='Client Signature',
+        compute='_compute_signature_preview',
+    )
     signature_type = fields.Selection(
         selection=[
             ('draw', 'Drawn'),
@@ -212,6 +248,18 @@ class EsignRequest(models.Model):
         default=False,
         copy=False,
     )
+    job_ids = fields.One2many(
+        comodel_name='mm.esign.job',
+        inverse_name='esign_request_id',
+        string='Background Jobs',
+        readonly=True,
+    )
+    ledger_ids = fields.One2many(
+        comodel_name='mm.esign.ledger',
+        inverse_name='esign_request_id',
+        string='Signing Ledger',
+        readonly=True,
+    )
 
     # =====================
     # Computed Fields
@@ -223,6 +271,8 @@ class EsignRequest(models.Model):
     signing_url = fields.Char(
         string='Signing URL',
         compute='_compute_signing_url',
+        help='Opens the signing page for the client logged in to the portal; '
+             'the emailed link is only stored hashed and cannot be shown',
     )
     days_until_expiry = fields.Integer(
         string='Days Until Expiry',
@@ -232,22 +282,21 @@ class EsignRequest(models.Model):
         string='Fully Signed',
         compute='_compute_is_fully_signed',
     )
+    finalization_state = fields.Selection(
+        selection=[
+            ('pending', 'Finalizing'),
+            ('done', 'Finalized'),
+            ('failed', 'Finalization Failed'),
+        ],
+        string='Finalization',
+        compute='_compute_finalization_state',
+        help='Status of the background job that stamps the PDF, sends the '
+             'completion email and advances the case.',
+    )
 
     # =====================
     # Constraints
     # =====================
-    @api.constrains('access_token')
-    def _check_access_token_unique(self):
-        """Ensure access token is unique."""
-        for record in self:
-            if record.access_token:
-                existing = self.search([
-                    ('access_token', '=', record.access_token),
-                    ('id', '!=', record.id)
-                ])
-                if existing:
-                    raise ValidationError(_("Access token must be unique!"))
-
     @api.constrains('document')
     def _check_document(self):
         """Ensure document is provided before sending."""
@@ -268,14 +317,10 @@ class EsignRequest(models.Model):
                 record.state not in ('signed', 'client_signed', 'cancelled')
             )
 
-    @api.depends('access_token')
     def _compute_signing_url(self):
         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
         for record in self:
-            if record.access_token:
-                record.signing_url = f"{base_url}/my/immigration/sign/{record.access_token}"
-            else:
-                record.signing_url = False
+            record.signing_url = f"{base_url}{record._get_portal_signing_path()}" if record.id else False
 
     @api.depends('expires_at')
     def _compute_days_until_expiry(self):
@@ -287,21 +332,41 @@ class EsignRequest(models.Model):
             else:
                 record.days_until_expiry = 0
 
-    @api.depends('state', 'requires_consultant_signature', 'signature_data', 'consultant_signature_data')
+    @api.depends('state', 'requires_consultant_signature', 'signature_data', 'signature_strokes',
+                 'consultant_signature_data')
     def _compute_is_fully_signed(self):
         for record in self:
+            client_signed = record.signature_data or record.signature_strokes
             if record.requires_consultant_signature:
                 record.is_fully_signed = (
-                    record.signature_data and 
+                    client_signed and 
                     record.consultant_signature_data and
                     record.state == 'signed'
                 )
             else:
                 record.is_fully_signed = (
-                    record.signature_data and 
+                    client_signed and 
                     record.state in ('signed', 'client_signed')
                 )
 
+    @api.depends('signature_data', 'signature_strokes')
+    def _compute_signature_preview(self):
+        for record in self:
+            preview = record.signature_data
+            if not preview and record.signature_strokes:
+                try:
+                    preview = base64.b64encode(
+                        signature_strokes.render_png(record._get_binary_raw('signature_strokes')))
+                except Exception:
+                    preview = False
+            record.signature_preview = preview
+
+    @api.depends('job_ids.state', 'job_ids.job_type')
+    def _compute_finalization_state(self):
+        for record in self:
+            job = record.job_ids.filtered(lambda j: j.job_type == 'finalize').sorted('id')[-1:]
+            record.finalization_state = job.state if job else False
+
     # =====================
     # Timezone Helper
     # =====================
@@ -356,20 +421,36 @@ class EsignRequest(models.Model):
                     vals['consultant_id'] = case.consultant_id.id
         return super().create(vals_list)
 
+    def write(self, vals):
+        res = super().write(vals)
+        if 'state' in vals:
+            for esign_request in self:
+                esign_request.case_id._notify_portal('esign', keys=[f'esign:{esign_request.id}'])
+        return res
+
     # =====================
     # Business Methods
     # =====================
-    def _generate_access_token(self):
-        """Generate a unique access token for the signing URL."""
+    def _generate_access_token(self, expires_at=None, revoke=True):
+        """Issue a new signing token; only its hash goes to the token store.
+
+        The token expires with the request unless ``expires_at`` is given.
+        With ``revoke``, the links issued before stop working.
+        """
         self.ensure_one()
-        token = str(uuid.uuid4())
-        # Verify uniqueness
-        while self.search_count([('access_token', '=', token)]) > 0:
-            token = str(uuid.uuid4())
-        return token
+        return self.env['mm.access.token']._generate(
+            self, 'esign', expires_at=expires_at or self.expires_at, revoke=revoke)
 
-    def action_generate_document(self):
-        """Generate the PDF document for signing."""
+    @api.model
+    def _get_from_token(self, token):
+        """Signature request (sudo) for a signing token, or an empty recordset."""
+        record = self.env['mm.access.token']._resolve(token, 'esign')
+        if record._name != self._name:
+            return self.sudo().browse()
+        return record
+
+    def _get_document_report(self):
+        """Report action that renders this request's document."""
         self.ensure_one()
         
         # Determine which report to use based on document type
@@ -387,20 +468,30 @@ class EsignRequest(models.Model):
         report = self.env.ref(report_ref, raise_if_not_found=False)
         if not report:
             raise UserError(_("Report template '%s' not found. Please install the required module.") % report_ref)
+        return report
+
+    def _set_document(self, pdf_content):
+        """Store a rendered document (raw PDF bytes) on the request."""
+        self.ensure_one()
+        filename = f"{self.document_type.replace('_', ' ').title()}_{self.case_id.name}.pdf"
+        self.write({
+            'document': base64.b64encode(linearize_pdf(pdf_content)),
+            'document_filename': filename,
+        })
+        self.document_digest = self._get_binary_digest('document')
+        self._log_ledger('generated', self.document_digest)
+
+    def action_generate_document(self):
+        """Generate the PDF document for signing."""
+        self.ensure_one()
+        report = self._get_document_report()
         
         # Generate PDF
         pdf_content, _ = self.env['ir.actions.report']._render_qweb_pdf(
-            report_ref,
+            report,
             [self.case_id.id],
         )
-        
-        # Set filename
-        filename = f"{self.document_type.replace('_', ' ').title()}_{self.case_id.name}.pdf"
-        
-        self.write({
-            'document': base64.b64encode(pdf_content),
-            'document_filename': filename,
-        })
+        self._set_document(pdf_content)
         
         return True
 
@@ -412,19 +503,19 @@ class EsignRequest(models.Model):
             self.action_generate_document()
         
         # Generate access token
-        token = self._generate_access_token()
         expires_at = fields.Datetime.now() + timedelta(days=7)
+        token = self._generate_access_token(expires_at)
         
         self.write({
-            'access_token': token,
             'expires_at': expires_at,
             'state': 'sent',
         })
+        self._log_ledger('sent', self._get_document_digest())
 
-        # Send email to client
+        # Send email to client; the mail is rendered now, while the token is known
         template = self.env.ref('mm_esign.email_template_signature_request', raise_if_not_found=False)
         if template:
-            template.send_mail(self.id, force_send=True)
+            template.with_context(mm_signing_token=token)._mm_send_queued(self.id, priority='high')
             self.write({'email_sent': True})
 
         self.message_post(
@@ -445,9 +536,16 @@ class EsignRequest(models.Model):
                 'state': 'viewed',
                 'viewed_at': fields.Datetime.now(),
             })
+            self._log_ledger('viewed', self._get_document_digest())
+
+    def action_client_sign(self, signature_data, signature_type, typed_name=None, ip_address=None, user_agent=None,
+                           signature_strokes=None):
+        """Record the client's signature.
 
-    def action_client_sign(self, signature_data, signature_type, typed_name=None, ip_address=None, user_agent=None):
-        """Record the client's signature."""
+        ``signature_strokes`` is a drawn signature in the compact vector
+        format of ``tools/signature_strokes.py``; ``signature_data`` (a
+        PNG) is then optional.
+        """
         self.ensure_one()
         
         if self.state not in ('sent', 'viewed'):
@@ -482,6 +580,9 @@ class EsignRequest(models.Model):
             'user_agent': user_agent,
             'state': next_state,
         })
+        if signature_strokes:
+            self._set_binary_raw('signature_strokes', signature_strokes, mimetype='application/octet-stream')
+        self._log_ledger('client_signed', self._get_document_digest(), ip_address)
 
         self.message_post(
             body=_("Document signed by client %s from IP %s") % (
@@ -491,15 +592,11 @@ class EsignRequest(models.Model):
             message_type='notification',
         )
 
-        # If no consultant signature required, generate final PDF and trigger workflow
+        # Stamping, emails and the case workflow run in the background
         if not self.requires_consultant_signature:
-            self._generate_signed_pdf()
-            self._send_completion_email()
-            if self.case_id:
-                self.case_id._on_signature_complete(self)
+            self.env['mm.esign.job']._enqueue(self, 'finalize')
         else:
-            # Notify consultant
-            self._notify_consultant_to_sign()
+            self.env['mm.esign.job']._enqueue(self, 'notify_consultant')
 
         return True
 
@@ -555,12 +652,7 @@ class EsignRequest(models.Model):
             'consultant_ip_address': ip_address,
             'state': 'signed',
         })
-
-        # Generate final signed PDF with both signatures
-        self._generate_signed_pdf()
-
-        # Send confirmation email
-        self._send_completion_email()
+        self._log_ledger('consultant_signed', self._get_document_digest(), ip_address)
 
         self.message_post(
             body=_("Document counter-signed by consultant %s from IP %s. Document is now fully executed.") % (
@@ -570,9 +662,8 @@ class EsignRequest(models.Model):
             message_type='notification',
         )
 
-        # Trigger case workflow
-        if self.case_id:
-            self.case_id._on_signature_complete(self)
+        # Stamp both signatures, email the client and trigger the case workflow
+        self.env['mm.esign.job']._enqueue(self, 'finalize')
 
         return True
 
@@ -580,156 +671,196 @@ class EsignRequest(models.Model):
         """Send completion email to client."""
         template = self.env.ref('mm_esign.email_template_signature_complete', raise_if_not_found=False)
         if template:
-            template.send_mail(self.id, force_send=True)
+            template._mm_send_queued(self.id)
+
+    def _get_binary_raw(self, field_name):
+        """Raw bytes of an attachment-backed Binary field, without base64."""
+        self.ensure_one()
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        return attachment.raw if attachment else b''
+
+    def _set_binary_raw(self, field_name, data, mimetype='application/pdf'):
+        """Store raw bytes in an attachment-backed Binary field, without base64."""
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        attachment = Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment:
+            attachment.write({'raw': data, 'mimetype': mimetype})
+        else:
+            Attachment.create({
+                'name': field_name,
+                'res_model': self._name,
+                'res_field': field_name,
+                'res_id': self.id,
+                'type': 'binary',
+                'mimetype': mimetype,
+                'raw': data,
+            })
+        self.invalidate_recordset([field_name])
+        if field_name in self._rendition_fields:
+            self._schedule_renditions([field_name])
+
+    def _get_binary_digest(self, field_name):
+        """SHA-256 of an attachment-backed Binary field, streamed from the filestore."""
+        self.ensure_one()
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if not attachment:
+            return False
+        if attachment.store_fname:
+            return document_digest.sha256_file(attachment._full_path(attachment.store_fname))
+        return document_digest.sha256_bytes(attachment.raw)
+
+    def _get_document_digest(self):
+        """Digest of the document to sign, computed once and stored."""
+        self.ensure_one()
+        if not self.document_digest and self.document:
+            self.document_digest = self._get_binary_digest('document')
+        return self.document_digest
+
+    def _record_signed_digest(self):
+        self.signed_digest = self._get_binary_digest('signed_document')
+        self._log_ledger('finalized', self.signed_digest)
+
+    def _log_ledger(self, event, digest=None, ip_address=None):
+        self.ensure_one()
+        return self.env['mm.esign.ledger']._append(self, event, digest, ip_address)
+
+    def _get_stamp_spec(self, include_consultant=True):
+        """Resolve signatures, dates and audit text once for the stamping engine.
+
+        Without ``include_consultant`` the spec only carries the client's
+        signature, for the client-signed revision.
+        """
+        self.ensure_one()
+        tz = self._get_user_timezone()
+
+        def local(dt, fmt):
+            if not dt:
+                return ''
+            utc_dt = pytz.UTC.localize(dt) if dt.tzinfo is None else dt
+            return utc_dt.astimezone(tz).strftime(fmt)
+
+        audit_parts = [
+            f"Electronically signed by {self.partner_id.name} on {local(self.signed_date, '%Y-%m-%d %H:%M %Z')}"
+        ]
+        countersign_text = ''
+        include_consultant = include_consultant and self.consultant_signed_date
+        if include_consultant:
+            consultant_name = self.consultant_id.name if self.consultant_id else 'Consultant'
+            countersign_text = (
+                f"Counter-signed by {consultant_name} on {local(self.consultant_signed_date, '%Y-%m-%d %H:%M %Z')}"
+            )
+            audit_parts.append(countersign_text)
+        audit_parts.append(f"IP: {self.ip_address or 'N/A'}")
+        audit_parts.append(f"Doc ID: {self.name}")
+
+        return pdf_stamp.StampSpec(
+            client_signature=self._get_binary_raw('signature_data') if self.signature_data else None,
+            client_strokes=self._get_binary_raw('signature_strokes') if self.signature_strokes else None,
+            client_date=local(self.signed_date, '%B %d, %Y'),
+            consultant_signature=(
+                self._get_binary_raw('consultant_signature_data')
+                if include_consultant and self.consultant_signature_data else None
+            ),
+            consultant_date=local(self.consultant_signed_date, '%B %d, %Y') if include_consultant else '',
+            initials=self._get_initials(),
+            initials_date=self.signed_date.strftime('%Y-%m-%d') if self.signed_date else '',
+            audit_text=" | ".join(audit_parts),
+            audit_digest=f"Document SHA-256: {self._get_document_digest() or 'N/A'}",
+            countersign_text=countersign_text,
+        )
 
-    def _generate_signed_pdf(self):
-        """Generate the signed PDF with signature stamps and audit footer."""
+    def _get_stamp_mode(self):
+        """Counter-sign incrementally on top of the client-signed revision
+        when there is one and the PDF library can append revisions."""
+        self.ensure_one()
+        if self.client_signed_document and self.consultant_signature_data:
+            try:
+                if pdf_stamp.supports_incremental():
+                    return pdf_stamp.MODE_COUNTERSIGN
+            except ImportError:
+                pass
+        return pdf_stamp.MODE_FULL
+
+    def _get_stamp_job(self):
+        """Return ``(mode, source PDF, spec)`` for the stamping engine."""
+        self.ensure_one()
+        mode = self._get_stamp_mode()
+        if mode == pdf_stamp.MODE_COUNTERSIGN:
+            # The client-signed revision already carries the client's signature and audit footer
+            spec = self._get_stamp_spec()
+            spec.audit_text = ''
+            return mode, self._get_binary_raw('client_signed_document'), spec
+        return mode, self._get_binary_raw('document'), self._get_stamp_spec()
+
+    def _generate_client_revision(self):
+        """Stamp the client's signature alone, as the base revision the
+        consultant's counter-signature is appended to."""
+        self.ensure_one()
+        if self.client_signed_document or not self.document:
+            return False
+        if not (self.signature_data or self.signature_strokes):
+            return False
+        output = BytesIO()
+        with self.env['mm.render.governor']._slot('mm_esign.stamp'):
+            pdf_stamp.stamp_pdf(
+                self._get_binary_raw('document'), output, self._get_stamp_spec(include_consultant=False))
+        self._set_binary_raw('client_signed_document', linearize_pdf(output.getvalue()))
+        self.client_signed_digest = self._get_binary_digest('client_signed_document')
+        self._log_ledger('client_revision', self.client_signed_digest)
+        return True
+
+    def _generate_signed_pdf(self, stamped_pdf=None):
+        """Generate the signed PDF with signature stamps and audit footer.
+
+        When the client-signed revision exists, the consultant's signature
+        is appended to it as an incremental update; otherwise, or if that
+        fails, the original document is stamped in full.
+
+        ``stamped_pdf`` is the output of ``pdf_stamp`` when it was already
+        stamped out of process, see ``mm.esign.job._prestamp``.
+        """
         self.ensure_one()
         
-        if not self.document or not self.signature_data:
+        if not self.document or not (self.signature_data or self.signature_strokes):
             return False
 
+        signed_filename = f"Signed_{self.document_filename or 'document.pdf'}"
         try:
-            # Import PDF libraries
-            from PyPDF2 import PdfReader, PdfWriter
-            from reportlab.pdfgen import canvas
-            from reportlab.lib.pagesizes import letter
-            from reportlab.lib.units import inch
-            from PIL import Image
-            
-            # Read original PDF
-            original_pdf = BytesIO(base64.b64decode(self.document))
-            pdf_reader = PdfReader(original_pdf)
-            pdf_writer = PdfWriter()
-            
-            # Get number of pages
-            num_pages = len(pdf_reader.pages)
-            
-            # Decode client signature image
-            client_sig_data = base64.b64decode(self.signature_data)
-            client_sig_image = Image.open(BytesIO(client_sig_data))
-            
-            # Decode consultant signature if present
-            consultant_sig_image = None
-            if self.consultant_signature_data:
-                consultant_sig_data = base64.b64decode(self.consultant_signature_data)
-                consultant_sig_image = Image.open(BytesIO(consultant_sig_data))
-            
-            # Process each page
-            for page_num in range(num_pages):
-                page = pdf_reader.pages[page_num]
-                page_width = float(page.mediabox.width)
-                page_height = float(page.mediabox.height)
-                
-                # Create overlay
-                overlay_buffer = BytesIO()
-                c = canvas.Canvas(overlay_buffer, pagesize=(page_width, page_height))
-                
-                # Add initials to all pages except last
-                if page_num < num_pages - 1:
-                    initials = self._get_initials()
-                    c.setFont("Helvetica", 8)
-                    c.drawString(page_width - 60, 30, f"Initials: {initials}")
-                    c.drawString(page_width - 60, 20, self.signed_date.strftime('%Y-%m-%d'))
-                
-                # Add signatures to last page
-                if page_num == num_pages - 1:
-                    from reportlab.lib.utils import ImageReader
-                    
-                    # Signature dimensions - sized to fit within the 60px signature area
-                    sig_width = 140
-                    sig_height = 45
-                    
-                    # ----- CLIENT SIGNATURE (LEFT SIDE) -----
-                    # Template has: "Client:" label, then 60px div for signature, then line, name, date
-                    # The signature div starts approximately 200pts from bottom on last page
-                    # Position signature to appear INSIDE the 60px box, ABOVE the line
-                    client_sig_x = 72  # 1 inch from left margin
-                    client_sig_y = 185  # Position inside the signature box
-                    
-                    # Save and draw client signature
-                    client_sig_temp = BytesIO()
-                    client_sig_image.save(client_sig_temp, format='PNG')
-                    client_sig_temp.seek(0)
-                    
-                    c.drawImage(
-                        ImageReader(client_sig_temp), 
-                        client_sig_x, client_sig_y, 
-                        width=sig_width, height=sig_height, 
-                        preserveAspectRatio=True,
-                        mask='auto'
-                    )
-                    
-                    # Add client signature date (fill in the date field)
-                    # Date line is at the bottom of the signature block
-                    c.setFont("Helvetica", 10)
-                    c.setFillColorRGB(0, 0, 0)
-                    client_date_str = self._format_date_only(self.signed_date)
-                    c.drawString(110, 120, client_date_str)  # After "Date:" label
-                    
-                    # ----- CONSULTANT SIGNATURE (RIGHT SIDE) -----
-                    if consultant_sig_image:
-                        # Right side signature block - starts at page midpoint
-                        consultant_sig_x = page_width / 2 + 20
-                        consultant_sig_y = 185  # Same height as client signature
-                        
-                        consultant_sig_temp = BytesIO()
-                        consultant_sig_image.save(consultant_sig_temp, format='PNG')
-                        consultant_sig_temp.seek(0)
-                        
-                        c.drawImage(
-                            ImageReader(consultant_sig_temp), 
-                            consultant_sig_x, consultant_sig_y, 
-                            width=sig_width, height=sig_height, 
-                            preserveAspectRatio=True,
-                            mask='auto'
-                        )
-                        
-                        # Add consultant signature date
-                        c.setFont("Helvetica", 10)
-                        c.setFillColorRGB(0, 0, 0)
-                        consultant_date_str = self._format_date_only(self.consultant_signed_date)
-                        c.drawString(page_width / 2 + 58, 120, consultant_date_str)  # After "Date:" label
-                
-                # Add audit footer to all pages
-                c.setFont("Helvetica", 6)
-                c.setFillColorRGB(0.5, 0.5, 0.5)
-                
-                # Build audit text
-                audit_parts = [
-                    f"Electronically signed by {self.partner_id.name} on {self._format_datetime_short(self.signed_date)}"
-                ]
-                if self.consultant_signed_date:
-                    consultant_name = self.consultant_id.name if self.consultant_id else 'Consultant'
-                    audit_parts.append(f"Counter-signed by {consultant_name} on {self._format_datetime_short(self.consultant_signed_date)}")
-                audit_parts.append(f"IP: {self.ip_address or 'N/A'}")
-                audit_parts.append(f"Doc ID: {self.name}")
-                
-                audit_text = " | ".join(audit_parts)
-                c.drawCentredString(page_width / 2, 10, audit_text)
-                
-                c.save()
-                
-                # Merge overlay with original page
-                overlay_buffer.seek(0)
-                overlay_pdf = PdfReader(overlay_buffer)
-                if len(overlay_pdf.pages) > 0:
-                    page.merge_page(overlay_pdf.pages[0])
-                
-                pdf_writer.add_page(page)
-            
-            # Write output
-            output_buffer = BytesIO()
-            pdf_writer.write(output_buffer)
-            output_buffer.seek(0)
-            
-            # Save signed document
-            signed_filename = f"Signed_{self.document_filename or 'document.pdf'}"
-            self.write({
-                'signed_document': base64.b64encode(output_buffer.getvalue()),
-                'signed_filename': signed_filename,
-            })
-            
+            mode = self._get_stamp_mode()
+            if stamped_pdf is None:
+                __, source, spec = self._get_stamp_job()
+                with self.env['mm.render.governor']._slot('mm_esign.stamp'):
+                    try:
+                        stamped_pdf = pdf_stamp.stamp_pdf_bytes(source, spec, mode)
+                    except Exception:
+                        if mode == pdf_stamp.MODE_FULL:
+                            raise
+                        _logger.warning(
+                            "Incremental counter-signature of %s failed, stamping in full",
+                            self.name, exc_info=True)
+                        mode = pdf_stamp.MODE_FULL
+                        stamped_pdf = pdf_stamp.stamp_pdf_bytes(
+                            self._get_binary_raw('document'), self._get_stamp_spec(), mode)
+            if mode == pdf_stamp.MODE_FULL:
+                stamped_pdf = linearize_pdf(stamped_pdf)
+            # An incremental update is stored as is: rewriting it would
+            # break the client-signed revision it starts with
+            self._set_binary_raw('signed_document', stamped_pdf)
+            self.write({'signed_filename': signed_filename})
+            self._record_signed_digest()
             return True
             
         except ImportError as e:
@@ -740,8 +871,9 @@ class EsignRequest(models.Model):
             )
             self.write({
                 'signed_document': self.document,
-                'signed_filename': f"Signed_{self.document_filename or 'document.pdf'}",
+                'signed_filename': signed_filename,
             })
+            self._record_signed_digest()
             return False
         except Exception as e:
             self.message_post(
@@ -768,6 +900,7 @@ class EsignRequest(models.Model):
             raise UserError(_("Cannot cancel a fully signed document."))
         
         self.write({'state': 'cancelled'})
+        self._log_ledger('cancelled', self._get_document_digest())
         self.message_post(
             body=_("Signature request cancelled."),
             message_type='notification',
@@ -781,11 +914,10 @@ class EsignRequest(models.Model):
             raise UserError(_("Can only resend requests that are pending or expired."))
         
         # Generate new token and reset expiration
-        token = self._generate_access_token()
         expires_at = fields.Datetime.now() + timedelta(days=7)
+        token = self._generate_access_token(expires_at)
         
         self.write({
-            'access_token': token,
             'expires_at': expires_at,
             'state': 'sent',
             'viewed_at': False,
@@ -794,7 +926,7 @@ class EsignRequest(models.Model):
         # Send email
         template = self.env.ref('mm_esign.email_template_signature_request', raise_if_not_found=False)
         if template:
-            template.send_mail(self.id, force_send=True)
+            template.with_context(mm_signing_token=token)._mm_send_queued(self.id, priority='high')
 
         self.message_post(
             body=_("Signature request resent to %s.") % self.partner_id.email,
@@ -857,6 +989,7 @@ class EsignRequest(models.Model):
         
         for request in expired_requests:
             request.write({'state': 'expired'})
+            request._log_ledger('expired', request._get_document_digest())
             request.message_post(
                 body=_("Signature request expired."),
                 message_type='notification',
@@ -868,7 +1001,19 @@ class EsignRequest(models.Model):
     # Portal Access
     # =====================
     def _get_signing_url(self):
-        """Get the full signing URL for email templates."""
+        """Get the full signing URL for email templates.
+
+        Tokens are not stored: the sender passes the new token in the
+        ``mm_signing_token`` context key. Without it, the URL is the
+        portal one, which needs the client to log in.
+        """
         self.ensure_one()
         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
-        return f"{base_url}/my/immigration/sign/{self.access_token}"
+        token = self.env.context.get('mm_signing_token')
+        if not token:
+            return f"{base_url}{self._get_portal_signing_path()}"
+        return f"{base_url}/my/immigration/sign/{token}"
+
+    def _get_portal_signing_path(self):
+        self.ensure_one()
+        return f"/my/immigration/esign/{self.id}/sign"
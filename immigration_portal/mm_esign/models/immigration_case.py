@@ -16,6 +16,7 @@ class ImmigrationCaseEsign(models.Model):
         string='Quote / Sale Order',
         tracking=True,
         copy=False,
+        index=True,
     )
     sale_order_state = fields.Selection(
         related='sale_order_id.state',
@@ -247,8 +248,8 @@ class ImmigrationCaseEsign(models.Model):
         
         return action
 
-    def action_create_service_agreement(self):
-        """Create and send service agreement for signature."""
+    def _check_can_create_service_agreement(self):
+        """Raise if a service agreement cannot be issued for this case."""
         self.ensure_one()
         
         if not self.sale_order_id:
@@ -259,13 +260,24 @@ class ImmigrationCaseEsign(models.Model):
         
         if self.service_agreement_id:
             raise UserError(_("A service agreement already exists for this case."))
-        
-        # Create e-sign request
-        esign_request = self.env['mm.esign.request'].create({
+
+    def _prepare_service_agreement_values(self):
+        self.ensure_one()
+        return {
             'document_type': 'service_agreement',
             'case_id': self.id,
             'partner_id': self.partner_id.id,
-        })
+        }
+
+    def action_create_service_agreement(self):
+        """Create and send service agreement for signature."""
+        self.ensure_one()
+        self._check_can_create_service_agreement()
+        
+        # Create e-sign request
+        esign_request = self.env['mm.esign.request'].create(
+            self._prepare_service_agreement_values()
+        )
         
         # Generate document and send
         esign_request.action_generate_document()
@@ -326,12 +338,12 @@ class ImmigrationCaseEsign(models.Model):
                             if invoice.state == 'draft':
                                 invoice.action_post()
                     except Exception as e:
-                        self.message_post(
+                        self._outbox_message_post(
                             body=_("Could not auto-create invoice: %s") % str(e),
                             message_type='notification',
                         )
                 
-                self.message_post(
+                self._outbox_message_post(
                     body=_("Service agreement signed. Case moved to Payment stage."),
                     message_type='notification',
                 )
@@ -344,7 +356,7 @@ class ImmigrationCaseEsign(models.Model):
             
             if consultation_stage and self.stage_id.state == 'roadmap_delivered':
                 self.write({'stage_id': consultation_stage.id})
-                self.message_post(
+                self._outbox_message_post(
                     body=_("Roadmap acknowledged. Case moved to Consultation stage."),
                     message_type='notification',
                 )
@@ -367,7 +379,7 @@ class ImmigrationCaseEsign(models.Model):
             # Send Q2 invitation email
             self._send_q2_invitation()
             
-            self.message_post(
+            self._outbox_message_post(
                 body=_("Payment confirmed. Case moved to Assessment stage. Q2 invitation sent."),
                 message_type='notification',
             )
@@ -375,6 +387,55 @@ class ImmigrationCaseEsign(models.Model):
     def _send_q2_invitation(self):
         """Send email inviting client to complete Q2."""
         self.ensure_one()
-        template = self.env.ref('mm_esign.email_template_payment_received', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
+        self._outbox_send_mail('mm_esign.email_template_payment_received')
+
+    # =====================
+    # Invoice Index
+    # =====================
+    @api.model
+    def _get_invoice_link_roles(self):
+        """Order fields whose invoices are indexed in ``mm.case.invoice.link``,
+        as ``{role: field name}``. Override to add roles."""
+        return {'case_order': 'sale_order_id'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        cases = super().create(vals_list)
+        order_fields = set(self._get_invoice_link_roles().values())
+        if any(order_fields.intersection(vals) for vals in vals_list):
+            self.env['mm.case.invoice.link'].sudo()._index(cases=cases)
+        return cases
+
+    def write(self, vals):
+        res = super().write(vals)
+        if set(self._get_invoice_link_roles().values()).intersection(vals):
+            self.env['mm.case.invoice.link'].sudo()._index(cases=self)
+        return res
+
+    def _on_invoices_paid(self, roles):
+        """Called once per case when invoices of the given roles are paid."""
+        self.ensure_one()
+        self._notify_portal('payment')
+        if 'case_order' in roles:
+            # Invalidate computed field cache to ensure fresh computation
+            self.invalidate_recordset(['payment_confirmed'])
+
+            # Check if payment is now confirmed and case is in payment stage
+            if self.payment_confirmed and self.state == 'paid':
+                self._on_payment_complete()
+
+    # =====================
+    # Report Cache
+    # =====================
+    def _get_report_cache_dependencies(self, report):
+        """Records and fields the service agreement template reads."""
+        orders = self.sale_order_id
+        return [
+            (self, ['name', 'company_id', 'partner_id', 'profile_id', 'sale_order_id']),
+            # write_date covers the logo and layout of the external layout
+            (self.company_id, ['name', 'street', 'city', 'zip', 'state_id', 'email', 'write_date']),
+            (self.partner_id, ['name', 'email']),
+            (self.profile_id, ['date_of_birth', 'residence_country_id']),
+            (orders, ['amount_total', 'currency_id', 'order_line']),
+            (orders.order_line, ['name', 'price_subtotal']),
+        ]
@@ -9,11 +9,60 @@
     // Current signature type (draw or type)
     var currentSignatureType = 'draw';
     
+    // Idempotency key of the current signing attempt. Kept when the
+    // network fails, so pressing Sign again replays a signature the
+    // server already recorded instead of failing on a signed document.
+    var idempotencyKey = null;
+    
+    // Finalization status polling (completion page)
+    var STATUS_POLL_INTERVAL = 2000;
+    var STATUS_POLL_MAX_ATTEMPTS = 60;
+    
     // Wait for DOM to be ready
     document.addEventListener('DOMContentLoaded', function() {
         initSignaturePad();
+        initFinalizationStatus();
     });
     
+    // Poll the status endpoint until the signed document is finalized
+    function initFinalizationStatus() {
+        var statusBox = document.getElementById('esign-finalization-status');
+        if (!statusBox) {
+            return;
+        }
+        
+        var statusUrl = statusBox.getAttribute('data-status-url');
+        var message = statusBox.querySelector('.o_esign_finalization_message');
+        var attempts = 0;
+        
+        function poll() {
+            attempts++;
+            fetch(statusUrl, {credentials: 'same-origin', cache: 'no-store'})
+            .then(function(response) {
+                return response.json();
+            })
+            .then(function(data) {
+                if (data.done) {
+                    window.location.reload();
+                } else if (data.failed) {
+                    statusBox.classList.replace('alert-light', 'alert-warning');
+                    statusBox.querySelector('.fa-spinner').remove();
+                    message.textContent = 'Your signature is recorded. We are still preparing the signed copy and will email it to you once ready.';
+                } else if (attempts < STATUS_POLL_MAX_ATTEMPTS) {
+                    setTimeout(poll, STATUS_POLL_INTERVAL);
+                }
+            })
+            .catch(function(error) {
+                console.error('Status error:', error);
+                if (attempts < STATUS_POLL_MAX_ATTEMPTS) {
+                    setTimeout(poll, STATUS_POLL_INTERVAL);
+                }
+            });
+        }
+        
+        setTimeout(poll, STATUS_POLL_INTERVAL);
+    }
+    
     function initSignaturePad() {
         var canvas = document.getElementById('signature-pad');
         if (!canvas) {
@@ -169,6 +218,13 @@
         return canvas.toDataURL('image/png');
     }
     
+    function newIdempotencyKey() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID();
+        }
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+    }
+    
     // Submit the signature
     function submitSignature() {
         var submitButton = document.getElementById('submit-signature');
@@ -179,8 +235,9 @@
         submitButton.disabled = true;
         submitButton.innerHTML = '<i class="fa fa-spinner fa-spin me-2"></i>Signing...';
         
-        // Get signature data
-        var signatureData;
+        // Get signature data: vector strokes when drawn, PNG when typed
+        var signatureData = null;
+        var signatureStrokes = null;
         var typedName = null;
         
         if (currentSignatureType === 'draw') {
@@ -189,7 +246,11 @@
                 resetSubmitButton();
                 return;
             }
-            signatureData = window.signaturePad.toDataURL('image/png');
+            if (window.mmSignatureStrokes) {
+                signatureStrokes = window.mmSignatureStrokes.encode(window.signaturePad);
+            } else {
+                signatureData = window.signaturePad.toDataURL('image/png');
+            }
         } else {
             var typedInput = document.getElementById('typed-signature');
             typedName = typedInput.value.trim();
@@ -205,14 +266,23 @@
         var formData = new FormData();
         formData.append('csrf_token', csrfToken);
         formData.append('signature_type', currentSignatureType);
-        formData.append('signature_data', signatureData);
+        if (signatureStrokes) {
+            formData.append('signature_strokes', signatureStrokes);
+        } else {
+            formData.append('signature_data', signatureData);
+        }
         if (typedName) {
             formData.append('typed_name', typedName);
         }
         
+        if (!idempotencyKey) {
+            idempotencyKey = newIdempotencyKey();
+        }
+        
         // Submit via fetch
         fetch('/my/immigration/sign/' + token + '/submit', {
             method: 'POST',
+            headers: {'Idempotency-Key': idempotencyKey},
             body: formData
         })
         .then(function(response) {
@@ -228,6 +298,8 @@
                     window.location.href = data.redirect_url;
                 }, 1000);
             } else {
+                // Answered: the next attempt is a new one
+                idempotencyKey = null;
                 alert('Error: ' + (data.error || 'Unknown error occurred'));
                 resetSubmitButton();
             }
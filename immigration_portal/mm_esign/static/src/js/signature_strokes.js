@@ -0,0 +1,45 @@
+/**
+ * Compact vector signatures for the signing pad.
+ *
+ * Encodes SignaturePad strokes as delta-encoded integer points, the
+ * format read by mm_esign/tools/signature_strokes.py:
+ * {"v": 1, "w": width, "h": height, "s": [[x0, y0, dx1, dy1, ...], ...]}
+ */
+
+(function() {
+    'use strict';
+    
+    function encode(pad) {
+        var strokes = [];
+        pad.toData().forEach(function(group) {
+            var stroke = [];
+            var lastX = 0;
+            var lastY = 0;
+            (group.points || []).forEach(function(point) {
+                var x = Math.round(point.x);
+                var y = Math.round(point.y);
+                // Skip repeated points, they add nothing to the path
+                if (stroke.length && x === lastX && y === lastY) {
+                    return;
+                }
+                stroke.push(x - lastX, y - lastY);
+                lastX = x;
+                lastY = y;
+            });
+            if (stroke.length) {
+                strokes.push(stroke);
+            }
+        });
+        return JSON.stringify({
+            v: 1,
+            w: pad.canvas.width,
+            h: pad.canvas.height,
+            s: strokes
+        });
+    }
+    
+    window.mmSignatureStrokes = {
+        encode: encode
+    };
+    
+})();
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+
+from . import pdf_stamp
+from . import signature_image
+from . import signature_strokes
+from . import document_digest
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for signed-PDF stamping.
+
+Compares the legacy per-page stamping loop with the single-pass engine
+in ``pdf_stamp.py`` on synthetic 1, 20 and 100 page documents, reporting
+wall time and peak traced memory (tracemalloc, in separate runs as it
+slows down the pure Python parts of stamping). The single-pass engine
+is measured with a PNG signature and with a vector stroke signature
+(``signature_strokes.py``), whose stored sizes are printed first.
+
+Run standalone, without an Odoo server:
+
+    python mm_esign/tools/benchmark_stamping.py [--pages 1 20 100] [--repeat 3]
+"""
+
+import argparse
+import time
+import tracemalloc
+from io import BytesIO
+
+try:
+    from . import signature_strokes
+    from .pdf_stamp import StampSpec, get_pdf_library, stamp_pdf
+except ImportError:
+    import signature_strokes
+    from pdf_stamp import StampSpec, get_pdf_library, stamp_pdf
+
+
+def make_document(pages):
+    """Synthetic letter-size document with a paragraph of text per page."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    for page_num in range(pages):
+        text = c.beginText(72, 720)
+        text.setFont("Helvetica", 10)
+        for line in range(40):
+            text.textLine(f"Page {page_num + 1}, clause {line + 1}: the parties agree to the terms.")
+        c.drawText(text)
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def make_signature():
+    """Synthetic 400x100 transparent PNG signature."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGBA', (400, 100), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(image)
+    draw.line([(10, 80), (120, 20), (200, 70), (390, 30)], fill=(0, 0, 0, 255), width=4)
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def make_strokes():
+    """Synthetic pad signature: a few strokes of a few hundred points."""
+    import math
+
+    strokes = []
+    for stroke in range(4):
+        points = []
+        for i in range(120):
+            t = i / 120
+            points.append((
+                int(40 + stroke * 130 + t * 110),
+                int(100 + 50 * math.sin(t * 9 + stroke) * math.cos(t * 3)),
+            ))
+        strokes.append(points)
+    return signature_strokes.encode(600, 200, strokes)
+
+
+def legacy_stamp(document, signature, spec):
+    """The previous algorithm: one canvas and overlay parse per page."""
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    PdfReader, PdfWriter = get_pdf_library()
+    reader = PdfReader(BytesIO(document))
+    writer = PdfWriter()
+    image = Image.open(BytesIO(signature))
+    num_pages = len(reader.pages)
+    for page_num in range(num_pages):
+        page = reader.pages[page_num]
+        width = float(page.mediabox.width)
+        height = float(page.mediabox.height)
+        overlay_buffer = BytesIO()
+        c = canvas.Canvas(overlay_buffer, pagesize=(width, height))
+        if page_num < num_pages - 1:
+            c.setFont("Helvetica", 8)
+            c.drawString(width - 60, 30, f"Initials: {spec.initials}")
+            c.drawString(width - 60, 20, spec.initials_date)
+        else:
+            temp = BytesIO()
+            image.save(temp, format='PNG')
+            temp.seek(0)
+            c.drawImage(ImageReader(temp), 72, 185, width=140, height=45,
+                        preserveAspectRatio=True, mask='auto')
+            c.drawString(110, 120, spec.client_date)
+        c.setFont("Helvetica", 6)
+        c.drawCentredString(width / 2, 10, spec.audit_text)
+        c.save()
+        overlay_buffer.seek(0)
+        page.merge_page(PdfReader(overlay_buffer).pages[0])
+        writer.add_page(page)
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def single_pass_stamp(document, signature, spec):
+    output = BytesIO()
+    stamp_pdf(document, output, StampSpec(
+        client_signature=signature,
+        client_date=spec.client_date,
+        initials=spec.initials,
+        initials_date=spec.initials_date,
+        audit_text=spec.audit_text,
+    ))
+    return output.getvalue()
+
+
+def vector_stamp(document, strokes, spec):
+    output = BytesIO()
+    stamp_pdf(document, output, StampSpec(
+        client_strokes=strokes,
+        client_date=spec.client_date,
+        initials=spec.initials,
+        initials_date=spec.initials_date,
+        audit_text=spec.audit_text,
+    ))
+    return output.getvalue()
+
+
+def measure(func, *args, repeat=3):
+    """Best wall time over ``repeat`` runs and peak memory of one more."""
+    best_time = None
+    for __ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+    tracemalloc.start()
+    func(*args)
+    __, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best_time, peak_memory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 20, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    signature = make_signature()
+    strokes = make_strokes()
+    print(f"signature size: PNG {len(signature)} bytes, strokes {len(strokes)} bytes")
+    spec = StampSpec(
+        client_date='January 15, 2026',
+        initials='JD',
+        initials_date='2026-01-15',
+        audit_text='Electronically signed by Jane Doe on 2026-01-15 10:30 MST | IP: 203.0.113.7 | Doc ID: ESIGN/0001',
+    )
+
+    print(f"{'pages':>6} {'engine':<12} {'time (ms)':>10} {'peak (KiB)':>11}")
+    for pages in args.pages:
+        document = make_document(pages)
+        engines = (
+            ('legacy', legacy_stamp, signature),
+            ('single-pass', single_pass_stamp, signature),
+            ('vector', vector_stamp, strokes),
+        )
+        for label, func, data in engines:
+            elapsed, peak = measure(func, document, data, spec, repeat=args.repeat)
+            print(f"{pages:>6} {label:<12} {elapsed * 1000:>10.1f} {peak / 1024:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming SHA-256 digests of documents.
+
+Files are hashed in fixed-size chunks, so a large PDF is never loaded in
+memory to be fingerprinted.
+"""
+
+import hashlib
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_stream(stream, chunk_size=CHUNK_SIZE):
+    """Hex SHA-256 of a binary file object, read to its end."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_file(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as stream:
+        return sha256_stream(stream, chunk_size)
+
+
+def sha256_bytes(data):
+    return hashlib.sha256(data or b'').hexdigest()
+
+
+def sha256_with_revisions(stream, chunk_size=CHUNK_SIZE):
+    """Hex SHA-256 of a binary file object, and of every earlier revision
+    embedded in it, as ``(digest, [revision digests])``.
+
+    An incremental update appends to the file, so each revision is the
+    prefix ending at one of its ``%%EOF`` markers (and the line break
+    after it). The full document itself is not a revision. The file is
+    read in chunks, like ``sha256_stream``: one running digest is copied
+    at each revision end.
+    """
+    marker = b'%%EOF'
+    digest = hashlib.sha256()
+    revisions = []
+    buffer = b''
+    eof = False
+    while not eof:
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        while True:
+            position = buffer.find(marker)
+            if position == -1:
+                # Keep what may be the start of a marker cut by the chunk
+                keep = 0 if eof else min(len(buffer), len(marker) - 1)
+                break
+            end = position + len(marker)
+            if not eof and len(buffer) < end + 3:
+                # The line break and what follows are in the next chunk
+                keep = len(buffer) - position
+                break
+            if buffer[end:end + 2] == b'\r\n':
+                end += 2
+            elif buffer[end:end + 1] in (b'\n', b'\r'):
+                end += 1
+            digest.update(buffer[:end])
+            buffer = buffer[end:]
+            if buffer:
+                revisions.append(digest.copy().hexdigest())
+        digest.update(buffer[:len(buffer) - keep])
+        buffer = buffer[len(buffer) - keep:]
+    return digest.hexdigest(), revisions
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Single-pass PDF signature stamping.
+
+Kept free of ORM imports so it can run in worker processes and in the
+benchmark harness (``benchmark_stamping.py``).
+"""
+
+from io import BytesIO
+
+try:
+    from . import signature_strokes
+except ImportError:
+    # Loaded as a plain module by the benchmark harness
+    import signature_strokes
+
+# Signature block geometry (points), matching report_service_agreement.xml
+SIGNATURE_WIDTH = 140
+SIGNATURE_HEIGHT = 45
+SIGNATURE_Y = 185
+CLIENT_SIGNATURE_X = 72
+CLIENT_DATE_POS = (110, 120)
+CONSULTANT_SIGNATURE_OFFSET = 20
+CONSULTANT_DATE_OFFSET = 58
+# Counter-signature audit line, above the client's audit footer
+COUNTERSIGN_AUDIT_Y = 21
+
+# Stamping modes: every page from the original document, or only the
+# consultant's signature appended to the client-signed revision
+MODE_FULL = 'full'
+MODE_COUNTERSIGN = 'countersign'
+
+
+def get_pdf_library():
+    """Return ``(PdfReader, PdfWriter)`` from pypdf, or PyPDF2 as fallback."""
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        from PyPDF2 import PdfReader, PdfWriter
+    return PdfReader, PdfWriter
+
+
+def supports_incremental():
+    """True if the PDF library can write incremental updates (pypdf >= 5)."""
+    import inspect
+
+    __, PdfWriter = get_pdf_library()
+    return 'incremental' in inspect.signature(PdfWriter.__init__).parameters
+
+
+class StampSpec:
+    """Everything drawn on the document, resolved once before stamping.
+
+    Signature images are raw PNG bytes; they are decoded into a single
+    ``ImageReader`` each, however many pages are stamped. When the client
+    drew on the pad, ``client_strokes`` holds the vector signature (see
+    ``signature_strokes``) and is drawn instead of the image.
+    ``countersign_text`` is the audit line of a counter-signature added
+    as an incremental update.
+    """
+
+    def __init__(self, client_signature=None, client_date='', consultant_signature=None,
+                 consultant_date='', initials='', initials_date='', audit_text='',
+                 client_strokes=None, audit_digest='', countersign_text=''):
+        self.client_signature = client_signature
+        self.client_strokes = client_strokes
+        self.audit_digest = audit_digest
+        self.countersign_text = countersign_text
+        self.client_date = client_date
+        self.consultant_signature = consultant_signature
+        self.consultant_date = consultant_date
+        self.initials = initials
+        self.initials_date = initials_date
+        self.audit_text = audit_text
+
+
+def _image_reader(data):
+    from reportlab.lib.utils import ImageReader
+    return ImageReader(BytesIO(data)) if data else None
+
+
+def build_overlay(page_sizes, spec):
+    """Draw every page overlay into one multi-page reportlab document.
+
+    ``page_sizes`` is a list of ``(width, height)``. Returns the overlay
+    PDF as a ``BytesIO`` positioned at 0.
+    """
+    from reportlab.pdfgen import canvas
+
+    client_image = None if spec.client_strokes else _image_reader(spec.client_signature)
+    consultant_image = _image_reader(spec.consultant_signature)
+    last = len(page_sizes) - 1
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=page_sizes[0] if page_sizes else (612, 792))
+    for page_num, (page_width, page_height) in enumerate(page_sizes):
+        c.setPageSize((page_width, page_height))
+
+        # Initials on all pages except the last
+        if page_num < last:
+            c.setFont("Helvetica", 8)
+            c.drawString(page_width - 60, 30, f"Initials: {spec.initials}")
+            c.drawString(page_width - 60, 20, spec.initials_date)
+
+        # Signatures and dates on the last page
+        if page_num == last:
+            c.setFont("Helvetica", 10)
+            c.setFillColorRGB(0, 0, 0)
+            if spec.client_strokes:
+                # Drawn into a form XObject: the page content only invokes
+                # it, so merging the overlay does not parse every path
+                # operator of the signature
+                c.beginForm('ClientSignature')
+                signature_strokes.draw(
+                    c, spec.client_strokes,
+                    CLIENT_SIGNATURE_X, SIGNATURE_Y,
+                    SIGNATURE_WIDTH, SIGNATURE_HEIGHT,
+                )
+                c.endForm()
+                c.doForm('ClientSignature')
+                c.drawString(CLIENT_DATE_POS[0], CLIENT_DATE_POS[1], spec.client_date)
+            elif client_image:
+                c.drawImage(
+                    client_image,
+                    CLIENT_SIGNATURE_X, SIGNATURE_Y,
+                    width=SIGNATURE_WIDTH, height=SIGNATURE_HEIGHT,
+                    preserveAspectRatio=True,
+                    mask='auto',
+                )
+                c.drawString(CLIENT_DATE_POS[0], CLIENT_DATE_POS[1], spec.client_date)
+            if consultant_image:
+                c.drawImage(
+                    consultant_image,
+                    page_width / 2 + CONSULTANT_SIGNATURE_OFFSET, SIGNATURE_Y,
+                    width=SIGNATURE_WIDTH, height=SIGNATURE_HEIGHT,
+                    preserveAspectRatio=True,
+                    mask='auto',
+                )
+                c.drawString(page_width / 2 + CONSULTANT_DATE_OFFSET, CLIENT_DATE_POS[1],
+                             spec.consultant_date)
+
+        # Audit footer on every page, with the digest of the document that was signed
+        if spec.audit_text:
+            c.setFont("Helvetica", 6)
+            c.setFillColorRGB(0.5, 0.5, 0.5)
+            c.drawCentredString(page_width / 2, 14 if spec.audit_digest else 10, spec.audit_text)
+        if spec.audit_digest:
+            c.setFont("Courier", 5)
+            c.setFillColorRGB(0.5, 0.5, 0.5)
+            c.drawCentredString(page_width / 2, 7, spec.audit_digest)
+        c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+def stamp_pdf(source, output, spec):
+    """Stamp ``source`` (bytes or binary stream) and write the result to ``output``.
+
+    One overlay document is built for all pages, parsed once and merged
+    page by page in a single sweep. Returns the number of pages.
+    """
+    PdfReader, PdfWriter = get_pdf_library()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = BytesIO(source)
+
+    reader = PdfReader(source)
+    pages = reader.pages
+    page_sizes = [(float(page.mediabox.width), float(page.mediabox.height)) for page in pages]
+    overlay_pages = PdfReader(build_overlay(page_sizes, spec)).pages
+
+    writer = PdfWriter()
+    for page, overlay in zip(pages, overlay_pages):
+        page.merge_page(overlay)
+        writer.add_page(page)
+    writer.write(output)
+    return len(page_sizes)
+
+
+def build_countersign_overlay(page_size, spec):
+    """Draw the consultant's signature, date and audit line for the last page."""
+    from reportlab.pdfgen import canvas
+
+    page_width, __ = page_size
+    consultant_image = _image_reader(spec.consultant_signature)
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=page_size)
+    c.setFont("Helvetica", 10)
+    c.setFillColorRGB(0, 0, 0)
+    if consultant_image:
+        c.drawImage(
+            consultant_image,
+            page_width / 2 + CONSULTANT_SIGNATURE_OFFSET, SIGNATURE_Y,
+            width=SIGNATURE_WIDTH, height=SIGNATURE_HEIGHT,
+            preserveAspectRatio=True,
+            mask='auto',
+        )
+    c.drawString(page_width / 2 + CONSULTANT_DATE_OFFSET, CLIENT_DATE_POS[1], spec.consultant_date)
+    if spec.countersign_text:
+        c.setFont("Helvetica", 6)
+        c.setFillColorRGB(0.5, 0.5, 0.5)
+        c.drawCentredString(page_width / 2, COUNTERSIGN_AUDIT_Y, spec.countersign_text)
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+def countersign_pdf(source, output, spec):
+    """Append the consultant's signature to a client-signed PDF.
+
+    The signature is merged into the last page and written as an
+    incremental update: ``output`` starts with the untouched bytes of
+    ``source``, followed by a revision holding only the rewritten page,
+    so the client-signed revision stays byte-identical and verifiable.
+    """
+    PdfReader, PdfWriter = get_pdf_library()
+    source = bytes(source)
+    writer = PdfWriter(PdfReader(BytesIO(source)), incremental=True)
+    page = writer.pages[-1]
+    page_size = (float(page.mediabox.width), float(page.mediabox.height))
+    page.merge_page(PdfReader(build_countersign_overlay(page_size, spec)).pages[0])
+
+    buffer = BytesIO()
+    writer.write(buffer)
+    data = buffer.getvalue()
+    if not data.startswith(source):
+        raise ValueError("Incremental update did not preserve the client-signed revision")
+    output.write(data)
+
+
+def stamp_pdf_bytes(source, spec, mode=MODE_FULL):
+    """Stamp ``source`` in ``mode`` and return the signed PDF as bytes."""
+    output = BytesIO()
+    if mode == MODE_COUNTERSIGN:
+        countersign_pdf(source, output, spec)
+    else:
+        stamp_pdf(source, output, spec)
+    return output.getvalue()
+
+
+def stamp_many(documents, max_workers):
+    """Stamp ``{key: (mode, source, spec)}`` in parallel worker processes.
+
+    Workers are forked so they inherit the imported libraries; they only
+    run this module's pure functions. Forking is only safe from a
+    single-threaded process: with ``max_workers`` below 2 the documents
+    are stamped in the calling process instead. Returns ``{key: bytes}``
+    for the documents that stamped and ``{key: exception}`` for the
+    others.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = {}
+    if max_workers < 2:
+        for key, (mode, source, spec) in documents.items():
+            try:
+                results[key] = stamp_pdf_bytes(source, spec, mode)
+            except Exception as e:
+                results[key] = e
+        return results
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {
+            key: executor.submit(stamp_pdf_bytes, source, spec, mode)
+            for key, (mode, source, spec) in documents.items()
+        }
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = e
+    return results
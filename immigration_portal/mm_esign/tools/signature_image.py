@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Typed signature rendering.
+
+Images are cached per name, font and size: a consultant counter-signing
+a batch of documents renders their signature once.
+"""
+
+import base64
+import functools
+from io import BytesIO
+
+DEFAULT_FONT = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+DEFAULT_FONT_SIZE = 36
+IMAGE_SIZE = (400, 100)
+
+
+@functools.lru_cache(maxsize=64)
+def render_typed_signature(name, font_path=DEFAULT_FONT, font_size=DEFAULT_FONT_SIZE):
+    """Return ``name`` drawn centered on a transparent PNG, base64-encoded."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height = IMAGE_SIZE
+    img = Image.new('RGBA', (width, height), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(img)
+
+    # Try to use the configured font, fall back to default
+    try:
+        font = ImageFont.truetype(font_path, font_size)
+    except OSError:
+        font = ImageFont.load_default()
+
+    bbox = draw.textbbox((0, 0), name, font=font)
+    x = (width - (bbox[2] - bbox[0])) / 2
+    y = (height - (bbox[3] - bbox[1])) / 2
+    draw.text((x, y), name, fill=(0, 0, 0, 255), font=font)
+
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Compact vector signatures.
+
+The signing pad posts its strokes as JSON with delta-encoded integer
+points::
+
+    {"v": 1, "w": 600, "h": 200, "s": [[x0, y0, dx1, dy1, dx2, dy2, ...], ...]}
+
+They are stored in a small binary format: the ``MMS1`` magic followed by
+a zlib-compressed stream of zigzag varints (width, height, stroke count,
+then per stroke its point count and coordinate deltas). A signature
+takes a few hundred bytes instead of tens of kilobytes of PNG, and is
+drawn into the stamping overlay as vector paths, sharp at any scale and
+without any image decoding.
+"""
+
+import json
+import math
+import zlib
+from io import BytesIO
+
+MAGIC = b'MMS1'
+FORMAT_VERSION = 1
+
+# Limits on what the pad may post
+MAX_STROKES = 500
+MAX_POINTS = 20000
+MAX_COORDINATE = 10000
+# Largest pad the signing page may report, in pixels
+MAX_PAD_SIZE = 2000
+# Previews are drawn within this box, in pixels
+PREVIEW_SIZE = (600, 200)
+PREVIEW_MARGIN = 4
+MAX_DATA_SIZE = 256 * 1024
+
+
+class StrokeFormatError(ValueError):
+    """Raised for malformed or oversized stroke data."""
+
+
+# =====================
+# Varint codec
+# =====================
+
+def _write_varint(buffer, value):
+    value = (value << 1) ^ (value >> 63)  # zigzag
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            buffer.append(byte | 0x80)
+        else:
+            buffer.append(byte)
+            return
+
+
+def _read_varints(data):
+    result = 0
+    shift = 0
+    for byte in data:
+        result |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield (result >> 1) ^ -(result & 1)
+        result = 0
+        shift = 0
+    if shift:
+        raise StrokeFormatError("Truncated stroke data")
+
+
+# =====================
+# Parsing and encoding
+# =====================
+
+def _reject_constant(name):
+    raise StrokeFormatError("Invalid number %s" % name)
+
+
+def _to_int(value):
+    """``int(value)``, refusing non-finite numbers such as ``1e400``."""
+    if isinstance(value, float) and not math.isfinite(value):
+        raise StrokeFormatError("Invalid number")
+    return int(value)
+
+
+def parse_json(payload):
+    """Validate the pad's JSON and return ``(width, height, strokes)``.
+
+    ``strokes`` is a list of lists of absolute ``(x, y)`` integer points.
+    """
+    if len(payload) > MAX_DATA_SIZE:
+        raise StrokeFormatError("Signature data is too large")
+    try:
+        # NaN and Infinity literals are refused while parsing
+        data = json.loads(payload, parse_constant=_reject_constant)
+        width, height = _to_int(data['w']), _to_int(data['h'])
+        raw_strokes = data['s']
+    except StrokeFormatError:
+        raise
+    except (ValueError, TypeError, KeyError, OverflowError) as e:
+        raise StrokeFormatError("Invalid signature data") from e
+    if data.get('v', FORMAT_VERSION) != FORMAT_VERSION:
+        raise StrokeFormatError("Unsupported signature format")
+    if not (0 < width <= MAX_PAD_SIZE and 0 < height <= MAX_PAD_SIZE):
+        raise StrokeFormatError("Invalid signature size")
+    if not isinstance(raw_strokes, list) or not raw_strokes or len(raw_strokes) > MAX_STROKES:
+        raise StrokeFormatError("Invalid number of strokes")
+
+    strokes = []
+    total = 0
+    for raw in raw_strokes:
+        if not isinstance(raw, list) or len(raw) < 2 or len(raw) % 2:
+            raise StrokeFormatError("Invalid stroke")
+        total += len(raw) // 2
+        if total > MAX_POINTS:
+            raise StrokeFormatError("Too many points in signature")
+        x = y = 0
+        points = []
+        for i in range(0, len(raw), 2):
+            try:
+                x += _to_int(raw[i])
+                y += _to_int(raw[i + 1])
+            except StrokeFormatError:
+                raise
+            except (ValueError, TypeError, OverflowError) as e:
+                raise StrokeFormatError("Invalid point") from e
+            if abs(x) > MAX_COORDINATE or abs(y) > MAX_COORDINATE:
+                raise StrokeFormatError("Point out of range")
+            points.append((x, y))
+        strokes.append(points)
+    return width, height, strokes
+
+
+def encode(width, height, strokes):
+    """Pack strokes into the compact binary format."""
+    buffer = bytearray()
+    _write_varint(buffer, width)
+    _write_varint(buffer, height)
+    _write_varint(buffer, len(strokes))
+    for points in strokes:
+        _write_varint(buffer, len(points))
+        last_x = last_y = 0
+        for x, y in points:
+            _write_varint(buffer, x - last_x)
+            _write_varint(buffer, y - last_y)
+            last_x, last_y = x, y
+    return MAGIC + zlib.compress(bytes(buffer), 9)
+
+
+def decode(data):
+    """Unpack the binary format into ``(width, height, strokes)``."""
+    if not is_strokes(data):
+        raise StrokeFormatError("Not a stroke signature")
+    try:
+        values = _read_varints(zlib.decompress(data[len(MAGIC):]))
+        width, height, count = next(values), next(values), next(values)
+        strokes = []
+        for __ in range(count):
+            n_points = next(values)
+            x = y = 0
+            points = []
+            for __ in range(n_points):
+                x += next(values)
+                y += next(values)
+                points.append((x, y))
+            strokes.append(points)
+    except (zlib.error, StopIteration) as e:
+        raise StrokeFormatError("Corrupted stroke data") from e
+    return width, height, strokes
+
+
+def is_strokes(data):
+    return bool(data) and bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def bounding_box(strokes):
+    xs = [x for points in strokes for x, __ in points]
+    ys = [y for points in strokes for __, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+# =====================
+# Rendering
+# =====================
+
+def draw(c, data, x, y, width, height, line_width=1.0):
+    """Draw a stroke signature on reportlab canvas ``c``.
+
+    The strokes are scaled to fit the ``width`` x ``height`` box at
+    ``(x, y)``, keeping their aspect ratio and centered like an image
+    drawn with ``preserveAspectRatio``.
+    """
+    __, __, strokes = decode(data)
+    min_x, min_y, max_x, max_y = bounding_box(strokes)
+    span_x, span_y = max(max_x - min_x, 1), max(max_y - min_y, 1)
+    scale = min(width / span_x, height / span_y)
+    offset_x = x + (width - span_x * scale) / 2
+    offset_y = y + (height - span_y * scale) / 2
+
+    def to_pdf(px, py):
+        # Canvas y grows downwards, PDF y upwards
+        return offset_x + (px - min_x) * scale, offset_y + (max_y - py) * scale
+
+    c.saveState()
+    c.setStrokeColorRGB(0, 0, 0)
+    c.setFillColorRGB(0, 0, 0)
+    c.setLineWidth(line_width)
+    c.setLineCap(1)
+    c.setLineJoin(1)
+    path = c.beginPath()
+    for points in strokes:
+        if len(points) == 1:
+            dot_x, dot_y = to_pdf(*points[0])
+            c.circle(dot_x, dot_y, line_width / 2, stroke=0, fill=1)
+            continue
+        path.moveTo(*to_pdf(*points[0]))
+        for point in points[1:]:
+            path.lineTo(*to_pdf(*point))
+    c.drawPath(path, stroke=1, fill=0)
+    c.restoreState()
+
+
+def render_png(data, line_width=2, max_size=PREVIEW_SIZE):
+    """Rasterize a stroke signature for previews.
+
+    The image is cropped to the strokes' bounding box and scaled down to
+    fit ``max_size``, whatever pad size the signing page reported.
+    """
+    from PIL import Image, ImageDraw
+
+    __, __, strokes = decode(data)
+    min_x, min_y, max_x, max_y = bounding_box(strokes)
+    span_x, span_y = max(max_x - min_x, 1), max(max_y - min_y, 1)
+    scale = min(1.0, max_size[0] / span_x, max_size[1] / span_y)
+    img = Image.new('RGBA', (
+        int(span_x * scale) + 2 * PREVIEW_MARGIN,
+        int(span_y * scale) + 2 * PREVIEW_MARGIN,
+    ), (255, 255, 255, 0))
+    draw_ = ImageDraw.Draw(img)
+    strokes = [
+        [
+            ((x - min_x) * scale + PREVIEW_MARGIN, (y - min_y) * scale + PREVIEW_MARGIN)
+            for x, y in points
+        ]
+        for points in strokes
+    ]
+    for points in strokes:
+        if len(points) == 1:
+            px, py = points[0]
+            draw_.ellipse((px - 1, py - 1, px + 1, py + 1), fill=(0, 0, 0, 255))
+        else:
+            draw_.line(points, fill=(0, 0, 0, 255), width=line_width, joint='curve')
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 
 from . import consultant_sign_wizard
+from . import batch_sign_wizard
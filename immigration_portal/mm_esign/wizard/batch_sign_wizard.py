@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from ..tools import signature_image
+
+_logger = logging.getLogger(__name__)
+
+
+class BatchSignWizard(models.TransientModel):
+    """Counter-sign many requests with one signature.
+
+    The signature image is prepared once and applied to every request in
+    its own savepoint, so one failure does not roll back the others. The
+    signed PDFs are stamped by the finalization queue, in parallel.
+    """
+    _name = 'mm.esign.batch.sign.wizard'
+    _description = 'Batch Counter-Signature Wizard'
+
+    esign_request_ids = fields.Many2many(
+        comodel_name='mm.esign.request',
+        string='Signature Requests',
+        required=True,
+        domain=[('state', '=', 'pending_consultant')],
+    )
+    request_count = fields.Integer(
+        string='Documents',
+        compute='_compute_request_count',
+    )
+
+    signature_type = fields.Selection(
+        selection=[
+            ('draw', 'Draw Signature'),
+            ('type', 'Type Signature'),
+        ],
+        string='Signature Method',
+        default='type',
+        required=True,
+    )
+    signature_data = fields.Binary(
+        string='Drawn Signature',
+        help='Draw your signature using the canvas.',
+    )
+    typed_signature = fields.Char(
+        string='Typed Signature',
+        help='Type your full name as your signature.',
+    )
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'mm.esign.request':
+            requests = self.env['mm.esign.request'].browse(self.env.context.get('active_ids', []))
+            res['esign_request_ids'] = [(6, 0, requests.filtered(
+                lambda r: r.state == 'pending_consultant').ids)]
+        return res
+
+    @api.depends('esign_request_ids')
+    def _compute_request_count(self):
+        for wizard in self:
+            wizard.request_count = len(wizard.esign_request_ids)
+
+    def action_sign(self):
+        """Apply the consultant's signature to all selected requests."""
+        self.ensure_one()
+
+        if not self.esign_request_ids:
+            raise UserError(_("There are no documents awaiting your counter-signature in the selection."))
+        if self.signature_type == 'draw' and not self.signature_data:
+            raise UserError(_("Please draw your signature."))
+        if self.signature_type == 'type' and not self.typed_signature:
+            raise UserError(_("Please type your signature."))
+
+        ip_address = self.env.context.get('ip_address', 'Backend')
+
+        # Prepare the signature image once for the whole batch
+        signature_data = self.signature_data
+        if self.signature_type == 'type':
+            signature_data = signature_image.render_typed_signature(self.typed_signature)
+
+        signed = self.env['mm.esign.request']
+        failures = []
+        for esign_request in self.esign_request_ids:
+            try:
+                with self.env.cr.savepoint():
+                    esign_request.action_consultant_sign(
+                        signature_data=signature_data,
+                        signature_type=self.signature_type,
+                        typed_name=self.typed_signature if self.signature_type == 'type' else None,
+                        ip_address=ip_address,
+                    )
+                signed |= esign_request
+            except Exception as e:
+                _logger.info("Batch counter-signature of %s failed: %s", esign_request.name, e)
+                failures.append(f"{esign_request.name}: {e}")
+
+        if failures:
+            message = _("%(signed)s document(s) counter-signed, %(failed)s failed:\n%(errors)s") % {
+                'signed': len(signed),
+                'failed': len(failures),
+                'errors': '\n'.join(failures),
+            }
+        else:
+            message = _("%s document(s) counter-signed. Signed copies are being generated.") % len(signed)
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Counter-Signature'),
+                'message': message,
+                'type': 'warning' if failures else 'success',
+                'sticky': bool(failures),
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
@@ -3,6 +3,8 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, AccessError
 
+from ..tools import signature_image
+
 
 class ConsultantSignWizard(models.TransientModel):
     _name = 'mm.esign.consultant.sign.wizard'
@@ -98,38 +100,7 @@ class ConsultantSignWizard(models.TransientModel):
     def _generate_typed_signature_image(self, name):
         """Generate a signature image from typed text."""
         try:
-            from PIL import Image, ImageDraw, ImageFont
-            import base64
-            from io import BytesIO
-            
-            # Create image
-            width, height = 400, 100
-            img = Image.new('RGBA', (width, height), (255, 255, 255, 0))
-            draw = ImageDraw.Draw(img)
-            
-            # Try to use a cursive font, fall back to default
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 36)
-            except:
-                font = ImageFont.load_default()
-            
-            # Calculate text position (center)
-            bbox = draw.textbbox((0, 0), name, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            x = (width - text_width) / 2
-            y = (height - text_height) / 2
-            
-            # Draw text
-            draw.text((x, y), name, fill=(0, 0, 0, 255), font=font)
-            
-            # Convert to base64
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            return base64.b64encode(buffer.getvalue()).decode('utf-8')
-            
-        except Exception as e:
+            return signature_image.render_typed_signature(name)
+        except Exception:
             # If image generation fails, return None and let the model handle it
             return None
@@ -19,6 +19,7 @@ Pattern from Phase 3 Lessons Learned:
 from odoo import http, fields, _
 from odoo.http import request
 from odoo.exceptions import AccessError, MissingError
+from odoo.addons.mm_portal.controllers.download import has_binary, stream_binary_field
 import werkzeug
 from datetime import datetime
 
@@ -30,32 +31,22 @@ class GCMSPortalController(http.Controller):
     # HELPER METHODS
     # =========================================================================
     
-    def _get_gcms_case(self, case_id, access_token=None):
+    def _get_gcms_case(self, case_id):
         """
-        Get a GCMS case with proper access control.
+        Get a GCMS case of the logged-in client.
         
         Args:
             case_id: ID of the case
-            access_token: Optional access token for public access
             
         Returns:
             mm.immigration.case record or raises AccessError
         """
-        Case = request.env['mm.immigration.case']
-        
-        if access_token:
-            case = Case.sudo().search([
-                ('id', '=', int(case_id)),
-                ('access_token', '=', access_token),
-                ('case_type', '=', 'gcms'),
-            ], limit=1)
-        else:
-            partner = request.env.user.partner_id
-            case = Case.search([
-                ('id', '=', int(case_id)),
-                ('partner_id', '=', partner.id),
-                ('case_type', '=', 'gcms'),
-            ], limit=1)
+        partner = request.env.user.partner_id
+        case = request.env['mm.immigration.case'].search([
+            ('id', '=', int(case_id)),
+            ('partner_id', '=', partner.id),
+            ('case_type', '=', 'gcms'),
+        ], limit=1)
         
         if not case:
             raise AccessError(_("You do not have access to this case."))
@@ -274,27 +265,18 @@ class GCMSPortalController(http.Controller):
         case = self._get_gcms_case(case_id)
         
         if doc_type == 'notes':
-            document = case.gcms_notes_document
+            field_name = 'gcms_notes_document'
             filename = case.gcms_notes_filename or f'gcms_notes_{case.name}.pdf'
         elif doc_type == 'breakdown':
-            document = case.gcms_breakdown_document
+            field_name = 'gcms_breakdown_document'
             filename = case.gcms_breakdown_filename or f'gcms_breakdown_{case.name}.pdf'
         else:
             raise MissingError(_("Document not found."))
         
-        if not document:
+        if not has_binary(case.sudo(), field_name):
             raise MissingError(_("Document not available yet."))
         
-        import base64
-        content = base64.b64decode(document)
-        
-        headers = [
-            ('Content-Type', 'application/pdf'),
-            ('Content-Disposition', f'attachment; filename="{filename}"'),
-            ('Content-Length', len(content)),
-        ]
-        
-        return request.make_response(content, headers)
+        return stream_binary_field(case.sudo(), field_name, filename=filename)
     
     # =========================================================================
     # CONSULTATION
@@ -435,7 +417,7 @@ class GCMSPortalController(http.Controller):
         # Send confirmation email
         template = request.env.ref('mm_gcms.mail_template_gcms_consultation_scheduled', raise_if_not_found=False)
         if template:
-            template.sudo().send_mail(case.id, force_send=True)
+            template.sudo()._mm_send_queued(case.id)
         
         case.message_post(
             body=_("Consultation scheduled for %s.") % consultation_datetime,
@@ -6,5 +6,5 @@ Phase 6: GCMS Notes Request Workflow
 
 from . import immigration_stage_gcms
 from . import immigration_case_gcms
-from . import account_move_gcms
+from . import case_invoice_link_gcms
 from . import immigration_case_portal_invite
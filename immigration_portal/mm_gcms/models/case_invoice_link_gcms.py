@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Invoice Index Extension for GCMS Payment Detection
+Phase 6: GCMS Notes Request Workflow
+
+Adds the GCMS service and consultation orders to the invoice index of
+mm_esign, so their payments are dispatched with the PR case payments:
+one query for all paid invoices, then one call per affected case
+(see ImmigrationCaseGCMS._on_invoices_paid).
+"""
+
+from odoo import fields, models
+
+
+class CaseInvoiceLinkGCMS(models.Model):
+    """Extend the invoice index with the GCMS order roles."""
+    
+    _inherit = 'mm.case.invoice.link'
+    
+    role = fields.Selection(
+        selection_add=[
+            ('gcms_service', 'GCMS Service Order'),
+            ('gcms_consultation', 'Consultation Order'),
+        ],
+        ondelete={
+            'gcms_service': 'cascade',
+            'gcms_consultation': 'cascade',
+        },
+    )
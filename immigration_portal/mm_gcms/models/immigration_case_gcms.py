@@ -13,15 +13,22 @@ Odoo 19 Compatibility:
 - No forward model references
 """
 
+import base64
+
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.addons.mm_portal.tools.pdf_linearize import linearize_pdf
 from datetime import timedelta
 
+# Uploaded PDFs served to the portal, stored linearized
+GCMS_PDF_FIELDS = ('gcms_notes_document', 'gcms_breakdown_document')
+
 
 class ImmigrationCaseGCMS(models.Model):
     """Extend immigration case with GCMS-specific functionality."""
     
-    _inherit = 'mm.immigration.case'
+    _inherit = ['mm.immigration.case', 'mm.rendition.mixin']
+    _rendition_fields = list(GCMS_PDF_FIELDS)
     
     # =====================================================================
     # OVERRIDE STAGE_ID TO FILTER BY CASE TYPE
@@ -200,12 +207,14 @@ class ImmigrationCaseGCMS(models.Model):
         comodel_name='sale.order',
         string='GCMS Service Order',
         ondelete='set null',
+        index=True,
         help="Sale order for GCMS service fee."
     )
     gcms_consultation_order_id = fields.Many2one(
         comodel_name='sale.order',
         string='Consultation Order',
         ondelete='set null',
+        index=True,
         help="Sale order for consultation fee."
     )
     gcms_service_paid = fields.Boolean(
@@ -312,6 +321,32 @@ class ImmigrationCaseGCMS(models.Model):
                         _("UCI Number must be 8 or 10 digits. Got: %s") % case.gcms_uci_number
                     )
     
+    # =====================================================================
+    # DOCUMENT STORAGE
+    # =====================================================================
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        return super().create([self._linearize_documents(vals) for vals in vals_list])
+    
+    def write(self, vals):
+        return super().write(self._linearize_documents(vals))
+    
+    @api.model
+    def _linearize_documents(self, vals):
+        """Linearize uploaded GCMS PDFs so the portal viewer can show page one early."""
+        if not any(vals.get(field_name) for field_name in GCMS_PDF_FIELDS):
+            return vals
+        vals = dict(vals)
+        for field_name in GCMS_PDF_FIELDS:
+            if vals.get(field_name):
+                data = base64.b64decode(vals[field_name])
+                vals[field_name] = base64.b64encode(linearize_pdf(data))
+        return vals
+    
+    def _get_rendition_case(self):
+        return self
+    
     # =====================================================================
     # WORKFLOW ACTIONS
     # =====================================================================
@@ -331,7 +366,7 @@ class ImmigrationCaseGCMS(models.Model):
         self.gcms_request_date = fields.Date.today()
         self._advance_to_stage('gcms_processing')
         
-        self.message_post(
+        self._outbox_message_post(
             body=_("GCMS request submitted to IRCC."),
             message_type='notification',
         )
@@ -348,7 +383,7 @@ class ImmigrationCaseGCMS(models.Model):
         # Send notification to client
         self._send_gcms_notes_notification()
         
-        self.message_post(
+        self._outbox_message_post(
             body=_("GCMS notes received from IRCC and client notified."),
             message_type='notification',
         )
@@ -362,7 +397,7 @@ class ImmigrationCaseGCMS(models.Model):
         self.gcms_consultation_requested = True
         self._advance_to_stage('gcms_consultation_requested')
         
-        self.message_post(
+        self._outbox_message_post(
             body=_("Client has requested a follow-up consultation."),
             message_type='notification',
         )
@@ -375,7 +410,7 @@ class ImmigrationCaseGCMS(models.Model):
         
         self._advance_to_stage('gcms_completed')
         
-        self.message_post(
+        self._outbox_message_post(
             body=_("GCMS case completed."),
             message_type='notification',
         )
@@ -392,14 +427,39 @@ class ImmigrationCaseGCMS(models.Model):
     def _send_gcms_notes_notification(self):
         """Send email notification to client when GCMS notes are ready."""
         self.ensure_one()
-        template = self.env.ref('mm_gcms.mail_template_gcms_notes_ready', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
+        self._outbox_send_mail('mm_gcms.mail_template_gcms_notes_ready')
     
     # =====================================================================
     # PAYMENT HANDLING
     # =====================================================================
     
+    @api.model
+    def _get_invoice_link_roles(self):
+        """Index the invoices of the GCMS orders too."""
+        roles = super()._get_invoice_link_roles()
+        roles.update({
+            'gcms_service': 'gcms_service_order_id',
+            'gcms_consultation': 'gcms_consultation_order_id',
+        })
+        return roles
+    
+    def _on_invoices_paid(self, roles):
+        """Dispatch GCMS order payments; PR payments go to super()."""
+        super()._on_invoices_paid(roles)
+        if self.case_type != 'gcms':
+            return
+        
+        if 'gcms_service' in roles:
+            # Invalidate cache before checking computed field
+            self.invalidate_recordset(['gcms_service_paid'])
+            if self.gcms_service_paid:
+                self._on_gcms_service_payment_complete()
+        
+        if 'gcms_consultation' in roles:
+            self.invalidate_recordset(['gcms_consultation_paid'])
+            if self.gcms_consultation_paid:
+                self._on_gcms_consultation_payment_complete()
+    
     def _on_gcms_service_payment_complete(self):
         """Handle GCMS service payment completion."""
         self.ensure_one()
@@ -409,7 +469,7 @@ class ImmigrationCaseGCMS(models.Model):
         # Advance to processing stage
         self._advance_to_stage('gcms_processing')
         
-        self.message_post(
+        self._outbox_message_post(
             body=_("GCMS service payment received. Processing can begin."),
             message_type='notification',
         )
@@ -423,7 +483,7 @@ class ImmigrationCaseGCMS(models.Model):
         # Advance to call scheduled stage
         self._advance_to_stage('gcms_call_scheduled')
         
-        self.message_post(
+        self._outbox_message_post(
             body=_("Consultation payment received. Please schedule your call."),
             message_type='notification',
         )
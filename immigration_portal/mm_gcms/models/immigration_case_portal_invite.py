@@ -55,17 +55,16 @@ class ImmigrationCasePortalInvite(models.Model):
         
         if template:
             try:
-                template.sudo().send_mail(
+                template.sudo()._mm_send_queued(
                     self.id,
-                    force_send=True,
-                    raise_exception=False,
+                    priority='high',
                     email_values={
                         'email_to': self.partner_id.email,
                         'auto_delete': False,
                     }
                 )
                 _logger.info(
-                    "Sent custom portal invitation to %s for case %s (type: %s)",
+                    "Queued custom portal invitation to %s for case %s (type: %s)",
                     self.partner_id.email, self.name, 
                     getattr(self, 'case_type', 'pr')
                 )
@@ -96,6 +95,29 @@ class ImmigrationCasePortalInvite(models.Model):
             }
         }
     
+    def _send_portal_invite_emails(self):
+        """
+        Queue the case-type-specific welcome emails of a bulk onboarding.
+
+        Cases are grouped by case type, so each template is rendered once
+        for all of its cases instead of case by case.
+        """
+        res = super()._send_portal_invite_emails()
+        for case_type, cases in self.grouped(lambda c: getattr(c, 'case_type', 'pr') or 'pr').items():
+            template = cases[:1]._get_portal_invite_template()
+            if not template:
+                continue
+            template.sudo()._mm_send_queued_batch(
+                cases.ids,
+                priority='high',
+                email_values={'auto_delete': False},
+            )
+            _logger.info(
+                "Queued %s portal invitation(s) for %s cases",
+                len(cases), case_type
+            )
+        return res
+
     def _get_portal_invite_template(self):
         """
         Get the appropriate email template based on case type.
@@ -143,11 +165,7 @@ class ImmigrationCasePortalInvite(models.Model):
         template = self._get_portal_invite_template()
         
         if template:
-            template.sudo().send_mail(
-                self.id,
-                force_send=True,
-                raise_exception=True,
-            )
+            template.sudo()._mm_send_queued(self.id, priority='high')
             
             self.message_post(
                 body=_("Portal invitation email resent to %s") % self.partner_id.email,
@@ -14,7 +14,16 @@ This module provides the foundation for immigration case management:
 * Client profile management
 * Dependent children records
 * Consultant assignment
-* Portal invitation integration
+* Portal invitation integration, one case at a time or in bulk
+* Hashed access token store for public links
+* Idempotency keys replaying the responses of retried portal requests
+* Token-bucket rate limiting of public and autosave routes, optionally shared through Redis
+* Content-keyed cache for rendered PDF reports
+* Render governor capping concurrent PDF generation
+* Client document uploads in resumable chunks, normalized in a process pool
+* Background page previews of generated PDFs, keyed by content digest
+* Transactional outbox running workflow messages, activities and emails
+* Prioritized mail queue with batched SMTP sessions, retries and metrics
 * Configurable branding
 
 Developed for The Migration Monitor.
@@ -36,12 +45,18 @@ Developed for The Migration Monitor.
         'data/ir_sequence_data.xml',
         'data/stage_data.xml',
         'data/config_data.xml',
+        'data/ir_cron_data.xml',
         # Views
         'views/immigration_stage_views.xml',
         'views/client_profile_views.xml',
         'views/immigration_case_views.xml',
+        'views/case_document_views.xml',
+        'views/outbox_event_views.xml',
+        'views/mail_queue_views.xml',
         'views/res_config_settings_views.xml',
         'views/menu_views.xml',
+        # Wizards
+        'wizard/portal_onboard_wizard_views.xml',
     ],
     'demo': [],
     'installable': True,
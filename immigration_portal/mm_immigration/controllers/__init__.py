@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import render_governor
+from . import rate_limit
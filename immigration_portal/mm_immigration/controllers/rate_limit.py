@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http
+from odoo.http import request
+
+
+class RateLimitController(http.Controller):
+
+    @http.route(['/mm/rate_limit/metrics'], type='http', auth='user', methods=['GET'])
+    def rate_limit_metrics(self, **kw):
+        """Rate limit budgets and hit counters, for monitoring.
+
+        ``process`` counters are those of the worker answering; ``shared``
+        ones, across all workers, need the Redis store.
+        """
+        if not request.env.user.has_group('base.group_system'):
+            return request.make_json_response({'error': 'Forbidden'}, status=403)
+        return request.make_json_response(
+            request.env['ir.http']._mm_rate_limit_metrics(),
+            headers=[('Cache-Control', 'no-store')],
+        )
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http
+from odoo.http import request
+
+
+class RenderGovernorController(http.Controller):
+
+    @http.route(['/mm/render_governor/metrics'], type='http', auth='user', methods=['GET'])
+    def render_governor_metrics(self, **kw):
+        """Render slot usage and queue depth, for monitoring."""
+        if not request.env.user.has_group('base.group_system'):
+            return request.make_json_response({'error': 'Forbidden'}, status=403)
+        return request.make_json_response(
+            request.env['mm.render.governor']._get_metrics(),
+            headers=[('Cache-Control', 'no-store')],
+        )
@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
 
+from . import access_token
+from . import idempotency_key
+from . import ir_http
 from . import immigration_stage
 from . import client_profile
+from . import outbox_event
+from . import mail_queue
 from . import immigration_case
 from . import res_config_settings
+from . import render_governor
+from . import report_cache
+from . import document_rendition
+from . import case_document
+from . import upload_session
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import secrets
+
+from odoo import models, fields, api, tools
+
+# Scope of the keyed hash; changing it invalidates every stored token
+TOKEN_HMAC_SCOPE = 'mm-access-token'
+TOKEN_BYTES = 32
+
+
+class AccessToken(models.Model):
+    """Keyed hashes of public access tokens (signing links, share links).
+
+    Only ``HMAC-SHA256(database.secret, token)`` is stored, under a unique
+    index, so resolving a token is a single indexed probe and a leaked
+    table does not reveal usable links. Tokens are 256-bit random values:
+    generation never needs a uniqueness query.
+    """
+    _name = 'mm.access.token'
+    _description = 'Access Token'
+    _order = 'id desc'
+
+    token_hash = fields.Char(
+        string='Token Hash',
+        required=True,
+        readonly=True,
+        copy=False,
+    )
+    purpose = fields.Selection(
+        selection=[
+            ('case_access', 'Case Access'),
+        ],
+        string='Purpose',
+        required=True,
+        readonly=True,
+    )
+    res_model = fields.Char(
+        string='Document Model',
+        required=True,
+        readonly=True,
+    )
+    res_id = fields.Many2oneReference(
+        string='Document ID',
+        model_field='res_model',
+        required=True,
+        readonly=True,
+    )
+    expires_at = fields.Datetime(
+        string='Expires At',
+        help='Leave empty for tokens that only expire with their document',
+    )
+    revoked = fields.Boolean(
+        string='Revoked',
+        default=False,
+    )
+
+    _token_hash_unique = models.UniqueIndex('(token_hash)')
+    _res_purpose_idx = models.Index('(res_model, res_id, purpose)')
+
+    # =====================
+    # Token API
+    # =====================
+    @api.model
+    def _hash_token(self, token):
+        return tools.hmac(self.env(su=True), TOKEN_HMAC_SCOPE, token)
+
+    @api.model
+    def _generate(self, record, purpose, expires_at=None, revoke=True):
+        """Issue a new token for ``record``, revoking its previous ones
+        unless ``revoke`` is False.
+
+        Returns the plain token; it is not stored and cannot be recovered.
+        """
+        record.ensure_one()
+        if revoke:
+            self._revoke(record, purpose)
+        token = secrets.token_urlsafe(TOKEN_BYTES)
+        self.sudo().create({
+            'token_hash': self._hash_token(token),
+            'purpose': purpose,
+            'res_model': record._name,
+            'res_id': record.id,
+            'expires_at': expires_at,
+        })
+        return token
+
+    @api.model
+    def _revoke(self, record, purpose):
+        """Revoke all live tokens of ``record`` for ``purpose``."""
+        self.sudo().search([
+            ('res_model', '=', record._name),
+            ('res_id', 'in', record.ids),
+            ('purpose', '=', purpose),
+            ('revoked', '=', False),
+        ]).write({'revoked': True})
+        self.env.cr.cache.pop('mm_access_token', None)
+
+    @api.model
+    def _resolve(self, token, purpose):
+        """Return the sudoed record a live token grants access to.
+
+        Memoized on the cursor, so every lookup of the same token while
+        serving one request costs a single query. Returns an empty
+        recordset of this model when the token is unknown, revoked or
+        expired.
+        """
+        if not token or not isinstance(token, str):
+            return self.browse()
+        cache = self.env.cr.cache.setdefault('mm_access_token', {})
+        key = (token, purpose)
+        if key not in cache:
+            self.env.cr.execute("""
+                SELECT res_model, res_id FROM mm_access_token
+                 WHERE token_hash = %s
+                   AND purpose = %s
+                   AND NOT revoked
+                   AND (expires_at IS NULL OR expires_at > NOW() AT TIME ZONE 'UTC')
+            """, [self._hash_token(token), purpose])
+            cache[key] = self.env.cr.fetchone()
+        row = cache[key]
+        if not row or row[0] not in self.env:
+            return self.browse()
+        return self.env[row[0]].sudo().browse(row[1]).exists()
+
+    # =====================
+    # Cleanup
+    # =====================
+    @api.autovacuum
+    def _gc_access_tokens(self):
+        """Drop revoked and expired tokens: they can never resolve again."""
+        self.env.cr.execute("""
+            DELETE FROM mm_access_token
+             WHERE revoked OR expires_at < NOW() AT TIME ZONE 'UTC'
+        """)
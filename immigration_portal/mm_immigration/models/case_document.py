@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import shutil
+from datetime import timedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+
+from ..tools import image_normalize, upload_store
+
+_logger = logging.getLogger(__name__)
+
+# Documents normalized per cron run
+NORMALIZE_BATCH_SIZE = 20
+
+
+class CaseDocument(models.Model):
+    """A document uploaded by the client to their case (passport scan,
+    ECA report, language test results...)."""
+    _name = 'mm.case.document'
+    _description = 'Client Case Document'
+    _order = 'create_date desc'
+
+    name = fields.Char(
+        string='File Name',
+        required=True,
+    )
+    case_id = fields.Many2one(
+        comodel_name='mm.immigration.case',
+        string='Case',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    partner_id = fields.Many2one(
+        related='case_id.partner_id',
+        string='Client',
+        store=True,
+    )
+    category = fields.Selection(
+        selection=[
+            ('passport', 'Passport / ID'),
+            ('eca', 'Educational Credential Assessment'),
+            ('language_test', 'Language Test Results'),
+            ('employment', 'Employment Records'),
+            ('other', 'Other'),
+        ],
+        string='Category',
+        required=True,
+        default='other',
+    )
+    file = fields.Binary(
+        string='File',
+        attachment=True,
+        readonly=True,
+        copy=False,
+    )
+    mimetype = fields.Char(
+        string='Content Type',
+        readonly=True,
+    )
+    file_size = fields.Integer(
+        string='Size (bytes)',
+        readonly=True,
+    )
+    checksum = fields.Char(
+        string='SHA-256',
+        readonly=True,
+        copy=False,
+    )
+    uploaded_by = fields.Many2one(
+        comodel_name='res.users',
+        string='Uploaded By',
+        readonly=True,
+        default=lambda self: self.env.user,
+    )
+    page_count = fields.Integer(
+        string='Pages',
+        readonly=True,
+        default=1,
+        help='Number of files uploaded for this document, e.g. one photo per page',
+    )
+    page_attachment_ids = fields.Many2many(
+        comodel_name='ir.attachment',
+        string='Additional Pages',
+        compute='_compute_page_attachment_ids',
+    )
+
+    # =====================
+    # Normalization
+    # =====================
+    normalize_state = fields.Selection(
+        selection=[
+            ('uploading', 'Uploading'),
+            ('pending', 'Pending'),
+            ('done', 'Normalized'),
+            ('skipped', 'Not Needed'),
+            ('failed', 'Failed'),
+        ],
+        string='Normalization',
+        default='pending',
+        required=True,
+        readonly=True,
+        index=True,
+    )
+    normalize_error = fields.Text(
+        string='Normalization Error',
+        readonly=True,
+    )
+    normalized_file = fields.Binary(
+        string='Normalized File',
+        attachment=True,
+        readonly=True,
+        copy=False,
+        help='Upright, downscaled copy without metadata; photos of several pages are merged into one PDF',
+    )
+    normalized_mimetype = fields.Char(
+        string='Normalized Content Type',
+        readonly=True,
+    )
+    original_size = fields.Integer(
+        string='Original Size (bytes)',
+        readonly=True,
+        help='Total size of the uploaded files',
+    )
+    normalized_size = fields.Integer(
+        string='Normalized Size (bytes)',
+        readonly=True,
+    )
+    bytes_saved = fields.Integer(
+        string='Bytes Saved',
+        compute='_compute_bytes_saved',
+        store=True,
+        aggregator='sum',
+    )
+    originals_purged = fields.Boolean(
+        string='Originals Removed',
+        readonly=True,
+        help='The uploaded files were removed after the retention period; the normalized file remains',
+    )
+
+    def _compute_page_attachment_ids(self):
+        for document in self:
+            document.page_attachment_ids = document._get_extra_pages()
+
+    @api.depends('normalize_state', 'original_size', 'normalized_size')
+    def _compute_bytes_saved(self):
+        for document in self:
+            if document.normalize_state == 'done':
+                document.bytes_saved = document.original_size - document.normalized_size
+            else:
+                document.bytes_saved = 0
+
+    def _get_extra_pages(self):
+        """Attachments of the pages uploaded after the first one, in order."""
+        self.ensure_one()
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', False),
+        ], order='id')
+
+    def _get_original_sources(self):
+        """``[(filestore path, mimetype, size)]`` of the uploaded pages."""
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        first = Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', 'file'),
+        ], limit=1)
+        attachments = first + self._get_extra_pages()
+        if not all(attachments.mapped('store_fname')):
+            # Database storage: nothing the workers can read
+            return []
+        return [
+            (Attachment._full_path(attachment.store_fname), attachment.mimetype, attachment.file_size)
+            for attachment in attachments
+        ]
+
+    def _adopt_file(self, field_name, path, sha1, size, mimetype, name=None):
+        """Store the file at ``path`` as the attachment of ``field_name``.
+
+        With the file store, the file is moved to its place in the
+        filestore and the attachment row points to it, so its content
+        never goes through Python. ``path`` is consumed either way.
+        Without ``field_name``, the file is a plain attachment of the
+        document, as for additional pages.
+        """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        if Attachment._storage() != 'file':
+            # Database storage needs the content in memory anyway
+            with open(path, 'rb') as source:
+                raw = source.read()
+            os.unlink(path)
+            Attachment.create({
+                'name': name or self.name,
+                'res_model': self._name,
+                'res_id': self.id,
+                'res_field': field_name or False,
+                'mimetype': mimetype,
+                'raw': raw,
+            })
+            return
+
+        store_fname = f'{sha1[:2]}/{sha1}'
+        full_path = Attachment._full_path(store_fname)
+        if os.path.isfile(full_path):
+            # Same content already stored, e.g. the same scan uploaded twice
+            if os.path.getsize(full_path) != size:
+                raise UserError(_("The uploaded file collides with an existing file."))
+            os.unlink(path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            shutil.move(path, full_path)
+        # Garbage collected unless the transaction commits the row below
+        Attachment._mark_for_gc(store_fname)
+
+        attachment = Attachment.create({
+            'name': name or self.name,
+            'res_model': self._name,
+            'res_id': self.id,
+            'res_field': field_name or False,
+            'mimetype': mimetype,
+        })
+        # create() ignores these, they are normally derived from the content
+        self.env.cr.execute("""
+            UPDATE ir_attachment
+               SET store_fname = %s, checksum = %s, file_size = %s, db_datas = NULL
+             WHERE id = %s
+        """, [store_fname, sha1, size, attachment.id])
+        attachment.invalidate_recordset()
+        if field_name:
+            self.invalidate_recordset([field_name])
+
+    def _add_page(self, path, sha1, size, mimetype):
+        """Add an uploaded file as the next page of this document."""
+        self.ensure_one()
+        self.write({
+            'page_count': self.page_count + 1,
+            'original_size': self.original_size + size,
+        })
+        self._adopt_file(None, path, sha1, size, mimetype, name=f'{self.name} ({self.page_count})')
+
+    def _mark_complete(self):
+        """All pages are uploaded: queue the document for normalization."""
+        self.filtered(lambda d: d.normalize_state == 'uploading').write({'normalize_state': 'pending'})
+        self._trigger_cron()
+
+    @api.model
+    def _trigger_cron(self):
+        cron = self.env.ref('mm_immigration.ir_cron_normalize_documents', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def action_normalize_again(self):
+        self.filtered(lambda d: not d.originals_purged).write({
+            'normalize_state': 'pending',
+            'normalize_error': False,
+            'normalized_file': False,
+            'normalized_mimetype': False,
+            'normalized_size': 0,
+        })
+        self._mark_complete()
+        return True
+
+    @api.model
+    def _get_normalize_settings(self):
+        """Return ``(target DPI, JPEG quality, worker processes, retention days)``."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        dpi = int(ICP.get_param('mm_immigration.upload_normalize_dpi', image_normalize.DEFAULT_DPI))
+        quality = int(ICP.get_param('mm_immigration.upload_normalize_quality', image_normalize.DEFAULT_QUALITY))
+        workers = int(ICP.get_param('mm_immigration.upload_normalize_workers', 0))
+        retention = int(ICP.get_param('mm_immigration.upload_original_retention_days', 0))
+        workers = max(1, min(workers or os.cpu_count() or 1, NORMALIZE_BATCH_SIZE))
+        return max(72, dpi), min(max(30, quality), 95), workers, max(0, retention)
+
+    # =====================
+    # Cron Methods
+    # =====================
+    @api.model
+    def _cron_normalize_documents(self, limit=NORMALIZE_BATCH_SIZE):
+        """Normalize pending uploads in a bounded process pool.
+
+        Documents are claimed with ``FOR UPDATE SKIP LOCKED``. The workers
+        hold render governor slots, so image processing and PDF rendering
+        share the same CPU budget. Uploads abandoned between two pages are
+        normalized with the pages received once their session expired.
+        """
+        self.env.cr.execute("""
+            SELECT id FROM mm_case_document
+             WHERE normalize_state = 'pending'
+                OR (normalize_state = 'uploading' AND create_date < %s)
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [fields.Datetime.now() - timedelta(days=1), limit])
+        documents = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if not documents:
+            return True
+
+        dpi, quality, workers, __ = self._get_normalize_settings()
+        if not tools.config['workers']:
+            # Forking is unsafe in the threaded server (HTTP and cron
+            # threads may hold locks): normalize in-process there
+            workers = 1
+        sources = {document.id: document._get_original_sources() for document in documents}
+        output_dir = upload_store.get_upload_dir(tools.config['data_dir'], self.env.cr.dbname)
+        governor = self.env['mm.render.governor'].with_context(mm_render_background=True)
+        with governor._slot('mm_immigration.normalize', count=min(workers, len(documents))) as slots:
+            results = image_normalize.normalize_many(sources, slots, output_dir, dpi, quality)
+
+        for document in documents:
+            document._store_normalized(results.get(document.id))
+        self.env.cr.commit()
+        _logger.info(
+            "Normalized %s uploaded documents, %s bytes saved",
+            len(documents), sum(documents.mapped('bytes_saved')),
+        )
+        if len(documents) >= limit:
+            # More work may be waiting: come back right away
+            self._trigger_cron()
+        return True
+
+    def _store_normalized(self, result):
+        self.ensure_one()
+        if isinstance(result, Exception):
+            _logger.warning("Normalization of document %s failed: %s", self.id, result)
+            self.write({'normalize_state': 'failed', 'normalize_error': str(result)})
+            return
+        if not result:
+            self.write({'normalize_state': 'skipped', 'normalize_error': False})
+            return
+        try:
+            with self.env.cr.savepoint():
+                self._adopt_file(
+                    'normalized_file', result['path'], result['sha1'], result['size'], result['mimetype'],
+                    name=self._get_normalized_name(result['mimetype']),
+                )
+        except Exception as e:
+            upload_store.remove(result['path'])
+            self.write({'normalize_state': 'failed', 'normalize_error': str(e)})
+            return
+        self.write({
+            'normalize_state': 'done',
+            'normalize_error': False,
+            'normalized_mimetype': result['mimetype'],
+            'normalized_size': result['size'],
+        })
+
+    def _get_normalized_name(self, mimetype):
+        self.ensure_one()
+        extension = '.pdf' if mimetype == 'application/pdf' else '.jpg'
+        return os.path.splitext(self.name)[0] + extension
+
+    @api.autovacuum
+    def _gc_original_uploads(self):
+        """Remove originals of normalized documents past their retention."""
+        __, __, __, retention = self._get_normalize_settings()
+        if not retention:
+            return
+        documents = self.sudo().search([
+            ('normalize_state', '=', 'done'),
+            ('originals_purged', '=', False),
+            ('create_date', '<', fields.Datetime.now() - timedelta(days=retention)),
+        ])
+        for document in documents:
+            document._get_extra_pages().unlink()
+        documents.write({
+            'file': False,
+            'originals_purged': True,
+        })
+        if documents:
+            _logger.info("Removed the original uploads of %s normalized documents", len(documents))
+
+    def _get_download_field(self):
+        """The normalized file when there is one, else the original."""
+        self.ensure_one()
+        return 'normalized_file' if self.normalized_file else 'file'
+
+    def action_download(self):
+        self.ensure_one()
+        field_name = self._get_download_field()
+        filename = self._get_normalized_name(self.normalized_mimetype) if field_name == 'normalized_file' else self.name
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{self._name}/{self.id}/{field_name}/{filename}?download=true',
+            'target': 'self',
+        }
+
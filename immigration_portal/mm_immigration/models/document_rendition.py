@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import timedelta
+
+import psycopg2
+
+from odoo import models, fields, api, _
+
+from ..tools import pdf_raster
+
+_logger = logging.getLogger(__name__)
+
+# Rendition widths, in pixels
+PAGE_WIDTH = 1024
+THUMBNAIL_WIDTH = 240
+# Renditions unused for this long are dropped, in days
+DEFAULT_MAX_IDLE_DAYS = 60
+# First key of the advisory locks claiming documents to rasterize ('mmrd')
+RENDITION_LOCK_NAMESPACE = 0x6d6d7264
+
+
+class DocumentRendition(models.Model):
+    """Page images of a PDF, for previews on phones.
+
+    Keyed by the content digest of the PDF attachment (its SHA-1
+    ``checksum``): a regenerated document gets new renditions, identical
+    documents share them, and nothing ever needs invalidating. Pages are
+    rasterized in the background and committed one by one, so the portal
+    shows the first page while the rest are still being rendered.
+    """
+    _name = 'mm.document.rendition'
+    _description = 'Document Page Renditions'
+    _order = 'last_used desc'
+
+    digest = fields.Char(
+        string='Document Digest',
+        required=True,
+        readonly=True,
+    )
+    attachment_id = fields.Many2one(
+        comodel_name='ir.attachment',
+        string='Source PDF',
+        ondelete='set null',
+        readonly=True,
+    )
+    state = fields.Selection(
+        selection=[
+            ('pending', 'Pending'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        string='Status',
+        default='pending',
+        required=True,
+        readonly=True,
+    )
+    error = fields.Text(
+        string='Error',
+        readonly=True,
+    )
+    page_count = fields.Integer(
+        string='Pages',
+        readonly=True,
+    )
+    page_ids = fields.One2many(
+        comodel_name='mm.document.rendition.page',
+        inverse_name='rendition_id',
+        string='Page Images',
+        readonly=True,
+    )
+    last_used = fields.Datetime(
+        string='Last Used',
+        readonly=True,
+        default=fields.Datetime.now,
+        index=True,
+    )
+
+    _digest_unique = models.UniqueIndex('(digest)')
+
+    # =====================
+    # API
+    # =====================
+    @api.model
+    def _ensure(self, attachment):
+        """Return the renditions of ``attachment``, queueing them if new."""
+        Rendition = self.sudo()
+        if not attachment or not attachment.checksum:
+            return Rendition
+        rendition = Rendition.search([('digest', '=', attachment.checksum)], limit=1)
+        if rendition:
+            if not rendition.attachment_id:
+                rendition.attachment_id = attachment
+            return rendition
+        if not pdf_raster.is_available():
+            return Rendition
+        try:
+            with self.env.cr.savepoint():
+                rendition = Rendition.create({
+                    'digest': attachment.checksum,
+                    'attachment_id': attachment.id,
+                })
+        except psycopg2.IntegrityError:
+            # Queued concurrently by another worker
+            return Rendition.search([('digest', '=', attachment.checksum)], limit=1)
+        self._trigger_cron()
+        return rendition
+
+    @api.model
+    def _find(self, attachment):
+        """Renditions of ``attachment``, if any; marks them as used."""
+        if not attachment or not attachment.checksum:
+            return self.sudo().browse()
+        rendition = self.sudo().search([('digest', '=', attachment.checksum)], limit=1)
+        if rendition:
+            self.env.cr.execute("""
+                UPDATE mm_document_rendition SET last_used = NOW() AT TIME ZONE 'UTC' WHERE id = %s
+            """, [rendition.id])
+        return rendition
+
+    def _get_page(self, kind, page):
+        self.ensure_one()
+        return self.page_ids.filtered(lambda p: p.kind == kind and p.page == page)[:1]
+
+    def _get_status(self):
+        """Progress of the rasterization, as served to the portal viewer."""
+        self.ensure_one()
+        pages = self.page_ids.filtered(lambda p: p.kind == 'page').sorted('page')
+        return {
+            'state': self.state,
+            'page_count': self.page_count,
+            'pages': [
+                {'page': p.page, 'width': p.width, 'height': p.height}
+                for p in pages
+            ],
+            'thumbnail': bool(self._get_page('thumbnail', 1)),
+        }
+
+    @api.model
+    def _trigger_cron(self):
+        cron = self.env.ref('mm_immigration.ir_cron_rasterize_documents', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    # =====================
+    # Rasterization
+    # =====================
+    @api.model
+    def _cron_rasterize(self):
+        """Rasterize pending documents, committing after every page.
+
+        The commits would release a row lock, so documents are claimed
+        with a session-level advisory lock, like document batches.
+        """
+        self.env.cr.execute("SELECT id FROM mm_document_rendition WHERE state = 'pending' ORDER BY id")
+        for (rendition_id,) in self.env.cr.fetchall():
+            self.env.cr.execute("SELECT pg_try_advisory_lock(%s, %s)", [RENDITION_LOCK_NAMESPACE, rendition_id])
+            if not self.env.cr.fetchone()[0]:
+                continue
+            try:
+                rendition = self.browse(rendition_id)
+                rendition.invalidate_recordset()
+                if rendition.state == 'pending':
+                    rendition._rasterize()
+            finally:
+                self.env.cr.execute("SELECT pg_advisory_unlock(%s, %s)", [RENDITION_LOCK_NAMESPACE, rendition_id])
+        return True
+
+    def _rasterize(self):
+        """Render the thumbnail and first page, then the following pages.
+
+        Resumes after the pages already stored if a previous run stopped
+        half-way. Each page holds a render governor slot.
+        """
+        self.ensure_one()
+        attachment = self.attachment_id.sudo()
+        if not attachment or not attachment.store_fname:
+            self.write({'state': 'failed', 'error': _("The document is not in the file store.")})
+            self.env.cr.commit()
+            return
+        path = attachment._full_path(attachment.store_fname)
+        governor = self.env['mm.render.governor'].with_context(mm_render_background=True)
+        Page = self.env['mm.document.rendition.page']
+        try:
+            if not self.page_count:
+                self.page_count = pdf_raster.page_count(path)
+                self.env.cr.commit()
+            todo = [('thumbnail', 1, THUMBNAIL_WIDTH)] + [
+                ('page', page, PAGE_WIDTH) for page in range(1, self.page_count + 1)
+            ]
+            for kind, page, width in todo:
+                if self._get_page(kind, page):
+                    continue
+                with governor._slot('mm_immigration.rasterize'):
+                    data, mimetype, img_width, img_height = pdf_raster.render_page(path, page, width)
+                Page.create({
+                    'rendition_id': self.id,
+                    'kind': kind,
+                    'page': page,
+                    'mimetype': mimetype,
+                    'width': img_width,
+                    'height': img_height,
+                })._set_image(data, mimetype)
+                self.env.cr.commit()
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.warning("Rasterizing document %s failed", self.digest, exc_info=True)
+            self.write({'state': 'failed', 'error': str(e)})
+            self.env.cr.commit()
+            return
+        self.write({'state': 'done', 'error': False})
+        self.env.cr.commit()
+
+    @api.autovacuum
+    def _gc_renditions(self):
+        """Drop renditions of documents not viewed for a long time."""
+        max_idle_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'mm_immigration.rendition_max_idle_days', DEFAULT_MAX_IDLE_DAYS))
+        self.sudo().search([
+            ('last_used', '<', fields.Datetime.now() - timedelta(days=max_idle_days)),
+        ]).unlink()
+
+
+class DocumentRenditionPage(models.Model):
+    """One page image (or the thumbnail) of a document."""
+    _name = 'mm.document.rendition.page'
+    _description = 'Document Page Image'
+    _order = 'rendition_id, kind, page'
+
+    rendition_id = fields.Many2one(
+        comodel_name='mm.document.rendition',
+        string='Renditions',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    kind = fields.Selection(
+        selection=[
+            ('thumbnail', 'Thumbnail'),
+            ('page', 'Page'),
+        ],
+        string='Kind',
+        required=True,
+    )
+    page = fields.Integer(
+        string='Page',
+        required=True,
+    )
+    image = fields.Binary(
+        string='Image',
+        attachment=True,
+    )
+    mimetype = fields.Char(
+        string='Content Type',
+    )
+    width = fields.Integer(
+        string='Width',
+    )
+    height = fields.Integer(
+        string='Height',
+    )
+
+    _page_unique = models.UniqueIndex('(rendition_id, kind, page)')
+
+    def _set_image(self, data, mimetype):
+        """Store raw image bytes, without a base64 round trip."""
+        self.ensure_one()
+        self.env['ir.attachment'].sudo().create({
+            'name': f'{self.kind}-{self.page}',
+            'res_model': self._name,
+            'res_field': 'image',
+            'res_id': self.id,
+            'type': 'binary',
+            'mimetype': mimetype,
+            'raw': data,
+        })
+        self.invalidate_recordset(['image'])
+
+
+class RenditionMixin(models.AbstractModel):
+    """Page previews for the PDF fields of a model.
+
+    Models list their PDF fields in ``_rendition_fields``; whenever one
+    is written, its page images are queued. The portal viewer reads them
+    through ``_get_renditions``; ``_can_view_renditions`` tells whether
+    the current user is the client of the record's case.
+    """
+    _name = 'mm.rendition.mixin'
+    _description = 'Document Previews Mixin'
+
+    _rendition_fields = []
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        written = {name for vals in vals_list for name in vals if name in self._rendition_fields}
+        if written:
+            records._schedule_renditions(written)
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        written = [name for name in vals if name in self._rendition_fields]
+        if written:
+            self._schedule_renditions(written)
+        return result
+
+    def _get_rendition_attachment(self, field_name):
+        self.ensure_one()
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', '=', self.id),
+        ], limit=1)
+
+    def _schedule_renditions(self, field_names=None):
+        """Queue page images of the given PDF fields (default: all)."""
+        Rendition = self.env['mm.document.rendition']
+        for record in self:
+            for field_name in field_names or self._rendition_fields:
+                attachment = record._get_rendition_attachment(field_name)
+                if attachment and attachment.mimetype == 'application/pdf':
+                    Rendition._ensure(attachment)
+
+    def _get_renditions(self, field_name):
+        """Renditions of the current content of ``field_name``, queueing
+        them when they were never made (documents older than previews)."""
+        self.ensure_one()
+        if field_name not in self._rendition_fields:
+            return self.env['mm.document.rendition']
+        attachment = self._get_rendition_attachment(field_name)
+        Rendition = self.env['mm.document.rendition']
+        return Rendition._find(attachment) or Rendition._ensure(attachment)
+
+    def _get_rendition_case(self):
+        self.ensure_one()
+        return self.case_id
+
+    def _can_view_renditions(self):
+        self.ensure_one()
+        return self._get_rendition_case().partner_id == self.env.user.partner_id
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+# First key of the advisory locks serializing duplicate requests ('mmik')
+IDEMPOTENCY_LOCK_NAMESPACE = 0x6d6d696b
+# Stored responses are replayed this long, in hours
+IDEMPOTENCY_TTL_HOURS = 24
+
+
+class IdempotencyKey(models.Model):
+    """Responses of portal POST requests, by client-provided key.
+
+    Questionnaire and signing requests retried by flaky mobile networks
+    must not run twice: the client sends the same ``Idempotency-Key`` on
+    every attempt of one action, the first attempt runs and stores its
+    response here, and the others get that response back. Rows are kept
+    compact (a digest and the response) and dropped after the TTL.
+    """
+    _name = 'mm.idempotency.key'
+    _description = 'Idempotency Key'
+    _order = 'id desc'
+    _log_access = False
+
+    key_digest = fields.Char(
+        string='Key Digest',
+        required=True,
+        readonly=True,
+        help='SHA-256 of the user, the endpoint and the client key',
+    )
+    response = fields.Json(
+        string='Response',
+        readonly=True,
+    )
+    created_at = fields.Datetime(
+        string='Created At',
+        required=True,
+        readonly=True,
+        index=True,
+    )
+
+    _key_digest_unique = models.UniqueIndex('(key_digest)')
+
+    @api.model
+    def _run_once(self, scope, key, func):
+        """Return ``func()``, run at most once per ``key`` within ``scope``.
+
+        The first request claims the key and stores the result of
+        ``func`` in its own transaction, so a request that fails leaves
+        the key free. A duplicate sent while the first one is running
+        waits on an advisory lock; its snapshot then predates the claim,
+        so inserting its own claim fails with a serialization error and
+        the HTTP layer retries the request, which replays the stored
+        result. Without a key, ``func`` simply runs.
+        """
+        if not key:
+            return func()
+        cr = self.env.cr
+        digest = hashlib.sha256(f'{self.env.uid}:{scope}:{key}'.encode()).hexdigest()
+        cr.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", [IDEMPOTENCY_LOCK_NAMESPACE, digest])
+
+        now = fields.Datetime.now()
+        cr.execute("SELECT id, response, created_at FROM mm_idempotency_key WHERE key_digest = %s", [digest])
+        row = cr.fetchone()
+        if row and row[2] > now - timedelta(hours=IDEMPOTENCY_TTL_HOURS):
+            return row[1]
+        if row:
+            # Expired: the key starts over
+            cr.execute("DELETE FROM mm_idempotency_key WHERE id = %s", [row[0]])
+
+        # ON CONFLICT rather than a savepoint: under REPEATABLE READ a
+        # conflicting claim committed after our snapshot raises a
+        # serialization failure, which gets the request retried
+        cr.execute("""
+            INSERT INTO mm_idempotency_key (key_digest, created_at)
+            VALUES (%s, %s)
+            ON CONFLICT (key_digest) DO NOTHING
+            RETURNING id
+        """, [digest, now])
+        claim = cr.fetchone()
+        if not claim:
+            # READ COMMITTED: the other claim is visible, replay it
+            cr.execute("SELECT response FROM mm_idempotency_key WHERE key_digest = %s", [digest])
+            return cr.fetchone()[0]
+
+        result = func()
+        cr.execute("UPDATE mm_idempotency_key SET response = %s WHERE id = %s", [json.dumps(result), claim[0]])
+        return result
+
+    @api.autovacuum
+    def _gc_idempotency_keys(self):
+        """Drop keys past their TTL."""
+        self.sudo().search([
+            ('created_at', '<', fields.Datetime.now() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)),
+        ]).unlink()
@@ -1,13 +1,23 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+import logging
+
+from odoo import models, fields, api, Command, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import email_normalize, split_every
+
+_logger = logging.getLogger(__name__)
+
+# Portal users created per batch by the bulk onboarding
+PORTAL_USER_BATCH_SIZE = 100
+# Bus notification telling open portal pages to refresh (see portal_live.js)
+PORTAL_UPDATE = 'mm_portal/update'
 
 
 class ImmigrationCase(models.Model):
     _name = 'mm.immigration.case'
     _description = 'Immigration Case'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'portal.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'portal.mixin', 'mm.outbox.mixin']
     _order = 'create_date desc'
 
     # === Core Fields ===
@@ -152,6 +162,11 @@ class ImmigrationCase(models.Model):
     roadmap_filename = fields.Char(
         string='Roadmap Filename',
     )
+    client_document_ids = fields.One2many(
+        comodel_name='mm.case.document',
+        inverse_name='case_id',
+        string='Client Documents',
+    )
 
     # === Notes ===
     internal_notes = fields.Html(
@@ -215,11 +230,14 @@ class ImmigrationCase(models.Model):
         if 'stage_id' in vals:
             for case in self:
                 old_stage = case.stage_id.name
-                case.message_post(
+                case._outbox_message_post(
                     body=_("Stage changed from <b>%s</b>") % old_stage,
                     message_type='notification',
                 )
-        return super().write(vals)
+        res = super().write(vals)
+        if 'stage_id' in vals:
+            self._notify_portal('stage')
+        return res
 
     # === Business Methods ===
     def action_send_portal_invite(self):
@@ -254,6 +272,130 @@ class ImmigrationCase(models.Model):
             }
         }
 
+    def _onboard_portal(self):
+        """Invite the clients of all cases in ``self`` to the portal at once.
+
+        The bulk counterpart of ``action_send_portal_invite``: portal users
+        are created by batches, the invitation emails rendered together
+        and queued, and the cases marked invited with one write. Returns
+        the invited cases and ``{partner: reason}`` for the clients that
+        could not be invited; their cases are left untouched.
+        """
+        failures = self._grant_portal_access(self.partner_id)
+        invited = self.filtered(lambda case: case.partner_id not in failures)
+        if not invited:
+            return invited, failures
+        invited._send_portal_invite_emails()
+        invited.write({
+            'portal_invited': True,
+            'portal_invite_date': fields.Datetime.now(),
+        })
+        invited._outbox_message_post(
+            body=_("Portal invitation sent with the bulk onboarding."),
+            message_type='notification',
+        )
+        return invited, failures
+
+    def _send_portal_invite_emails(self):
+        """Queue the welcome emails of newly invited cases; none by default."""
+        return True
+
+    @api.model
+    def _grant_portal_access(self, partners):
+        """Give ``partners`` portal access, creating their users by batches.
+
+        Does what ``portal.wizard.user.action_grant_access`` does for one
+        partner: existing users are moved to the portal group with one
+        write, missing users are created together, and the set-password
+        invitations go through the mm mail queue instead of SMTP. Returns
+        ``{partner: reason}`` for the partners left without access.
+        """
+        failures = {}
+        Users = self.env['res.users'].sudo().with_context(active_test=False)
+        group_portal = self.env.ref('base.group_portal')
+        group_public = self.env.ref('base.group_public')
+
+        logins = {}
+        seen = set()
+        for partner in partners:
+            login = email_normalize(partner.email)
+            if not login:
+                failures[partner] = _("No valid email address.")
+            elif login in seen:
+                failures[partner] = _("Another client in the selection has the email %s.") % login
+            else:
+                logins[partner] = login
+                seen.add(login)
+        # Logins are unique: a user of another partner with this email blocks the access
+        owners = {
+            user['login']: user['partner_id'][0]
+            for user in Users.search_read([('login', 'in', list(logins.values()))], ['login', 'partner_id'])
+        }
+        for partner, login in list(logins.items()):
+            if owners.get(login, partner.id) != partner.id:
+                failures[partner] = _("A user with the login %s already exists.") % login
+                del logins[partner]
+
+        partners = partners.browse([partner.id for partner in logins])
+        existing = partners.sudo().with_context(active_test=False).user_ids
+        to_enable = existing.filtered(lambda user: not user._is_internal() and (not user.active or not user._is_portal()))
+        if to_enable:
+            to_enable.write({
+                'active': True,
+                'group_ids': [Command.link(group_portal.id), Command.unlink(group_public.id)],
+            })
+
+        created = Users.browse()
+        to_create = partners.filtered(lambda partner: not partner.with_context(active_test=False).user_ids)
+        for batch in split_every(PORTAL_USER_BATCH_SIZE, to_create.ids, partners.browse):
+            vals_list = [{
+                'login': logins[partner],
+                'email': logins[partner],
+                'partner_id': partner.id,
+                'company_id': (partner.company_id or self.env.company).id,
+                'company_ids': [Command.set([(partner.company_id or self.env.company).id])],
+                'group_ids': [Command.set([group_portal.id])],
+            } for partner in batch]
+            try:
+                with self.env.cr.savepoint():
+                    created |= Users.with_context(no_reset_password=True).create(vals_list)
+            except Exception:
+                # Create the batch again one user at a time, to find the partners at fault
+                for partner, vals in zip(batch, vals_list):
+                    try:
+                        with self.env.cr.savepoint():
+                            created |= Users.with_context(no_reset_password=True).create(vals)
+                    except Exception as e:
+                        _logger.info("Portal user creation for %s failed: %s", partner.email, e)
+                        failures[partner] = str(e)
+
+        invited = to_enable | created
+        if invited:
+            try:
+                with self.env.cr.savepoint():
+                    # action_reset_password would send each mail over SMTP
+                    # in the request: prepare the signup links and queue
+                    # the set-password mails in one batch instead
+                    invited.partner_id.signup_prepare(signup_type='signup')
+                    template = self.env.ref('auth_signup.set_password_email')
+                    template.sudo().with_context(create_user=True)._mm_send_queued_batch(
+                        invited.ids,
+                        priority='high',
+                        email_values={
+                            'email_cc': False,
+                            'auto_delete': True,
+                            'message_type': 'user_notification',
+                            'recipient_ids': [],
+                            'partner_ids': [],
+                            'scheduled_date': False,
+                        },
+                    )
+            except Exception as e:
+                _logger.warning("Queueing portal invitations failed: %s", e)
+                for partner in invited.partner_id:
+                    failures[partner] = _("The password invitation could not be queued: %s") % e
+        return failures
+
     def action_view_profile(self):
         """Open the client profile form."""
         self.ensure_one()
@@ -280,6 +422,21 @@ class ImmigrationCase(models.Model):
         else:
             raise UserError(_("This case is already at the final stage."))
 
+    # === Live Portal Updates ===
+    def _notify_portal(self, event, keys=()):
+        """Tell the open portal pages of the clients of ``self`` to refresh.
+
+        Pushed over the bus to the client's partner channel when the
+        transaction commits. Pages showing ``case:<id>`` or one of ``keys``
+        (e.g. ``esign:<id>``) patch themselves in place instead of being
+        reloaded by the client.
+        """
+        for case in self:
+            case.partner_id._bus_send(PORTAL_UPDATE, {
+                'event': event,
+                'keys': [f'case:{case.id}', *keys],
+            })
+
     # === Portal Methods ===
     def _compute_access_url(self):
         super()._compute_access_url()
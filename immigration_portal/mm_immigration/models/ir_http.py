@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from werkzeug.exceptions import TooManyRequests
+
+from odoo import models, api, tools
+from odoo.http import request, Response
+
+from ..tools import rate_limit
+
+_logger = logging.getLogger(__name__)
+
+# Budgets per route scope and key, as 'capacity/seconds'; overridable with
+# ir.config_parameter 'mm_immigration.rate_limit.<scope>.<key>'. A request
+# takes a token from every bucket of its scope.
+RATE_LIMITS = {
+    'contact': {'ip': '5/300'},
+    'newsletter': {'ip': '10/300'},
+    # Page previews load one image per page: the budget is per request
+    'esign': {'ip': '300/60', 'token': '120/60'},
+    'autosave': {'partner': '120/60'},
+    # Each verification hashes a whole upload
+    'verify': {'ip': '20/300'},
+}
+# Budgets are read again at most this often, in seconds
+BUDGET_REFRESH = 60
+# After a Redis error, buckets stay local this long, in seconds
+REDIS_RETRY_DELAY = 30
+
+# Limiter state of this process: buckets, budgets and counters by database
+_lock = threading.Lock()
+_local_buckets = rate_limit.LocalBuckets()
+_redis = {'buckets': None, 'failed_at': 0.0}
+_budgets = {}
+_counters = {}
+
+
+class IrHttp(models.AbstractModel):
+    """Token-bucket rate limiting of the routes marked ``mm_rate_limit``.
+
+    Routes opt in with ``@http.route(..., mm_rate_limit='<scope>')``, a
+    scope of ``RATE_LIMITS``. Buckets are keyed by client IP, by session
+    user or by the ``token`` of the route, and kept in the process, or in
+    the Redis server of the ``mm_rate_limit_redis`` server option to share
+    them between workers.
+
+    The limit is checked as soon as the URL is routed, from budgets and
+    buckets held in memory, and a rejected request is answered right
+    there: it never gets to authentication (no user lookup), to the
+    website pre-dispatch or to the endpoint. What Odoo does for every
+    request before routing still happens: the registry signaling check,
+    and website routing when ``website`` is installed, which is served
+    from the ORM caches once they are warm. Refusing a request before
+    any of that would take a WSGI middleware in front of Odoo.
+    """
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _match(cls, path_info):
+        rule, args = super()._match(path_info)
+        scope = rule.endpoint.routing.get('mm_rate_limit')
+        if scope and request.db:
+            wait = cls._mm_rate_limit_take(scope, args)
+            if wait:
+                _logger.info("Rate limited %s request from %s to %s",
+                             scope, request.httprequest.remote_addr, path_info)
+                exc = TooManyRequests(retry_after=wait)
+                # Served as is by the WSGI application, without error rendering
+                exc.error_response = cls._mm_rate_limit_response(rule.endpoint, wait)
+                raise exc
+            if time.monotonic() - _budgets.get(request.db, (0.0, {}))[0] > BUDGET_REFRESH:
+                # Only once the request is let through, as it hits the database anyway
+                request.env['ir.http']._mm_rate_limit_load_budgets()
+        return rule, args
+
+    # =====================
+    # Buckets
+    # =====================
+    @classmethod
+    def _mm_rate_limit_key(cls, kind, args):
+        if kind == 'token' and args.get('token'):
+            # Keys may end up in Redis: never store the token itself
+            return 'token:' + hashlib.sha256(str(args['token']).encode()).hexdigest()[:32]
+        if kind == 'partner' and request.session.uid:
+            return f'user:{request.session.uid}'
+        return f'ip:{request.httprequest.remote_addr}'
+
+    @classmethod
+    def _mm_rate_limit_take(cls, scope, args):
+        """Take a token from each bucket of ``scope``; return 0 if the
+        request may run, else the seconds to wait before retrying."""
+        dbname = request.db
+        budgets = _budgets.get(dbname, (0.0, {}))[1]
+        buckets = cls._mm_rate_limit_buckets()
+        wait = 0
+        for kind, default in RATE_LIMITS.get(scope, {}).items():
+            capacity, period = budgets.get((scope, kind)) or rate_limit.parse_budget(default)
+            key = f'{dbname}:{scope}:{cls._mm_rate_limit_key(kind, args)}'
+            allowed, retry_after = buckets.take(key, capacity, period)
+            if not allowed:
+                wait = max(wait, retry_after)
+
+        outcome = 'rejected' if wait else 'allowed'
+        with _lock:
+            counters = _counters.setdefault(dbname, {}).setdefault(scope, {'allowed': 0, 'rejected': 0})
+            counters[outcome] += 1
+        buckets.count(dbname, f'{scope}:{outcome}')
+        return wait
+
+    @classmethod
+    def _mm_rate_limit_buckets(cls):
+        url = tools.config.get('mm_rate_limit_redis')
+        if not url or time.monotonic() - _redis['failed_at'] < REDIS_RETRY_DELAY:
+            return _LocalWithoutCounters(_local_buckets)
+        if _redis['buckets'] is None:
+            try:
+                _redis['buckets'] = rate_limit.RedisBuckets(url)
+            except Exception:
+                _logger.exception("Cannot share rate limits through Redis, keeping them per process")
+                _redis['failed_at'] = time.monotonic()
+                return _LocalWithoutCounters(_local_buckets)
+        return _RedisWithFallback(_redis['buckets'])
+
+    @classmethod
+    def _mm_rate_limit_response(cls, endpoint, wait):
+        message = "Too many requests. Please try again in %s seconds." % wait
+        headers = [
+            ('Retry-After', str(wait)),
+            ('Cache-Control', 'no-store'),
+        ]
+        if endpoint.routing.get('type') == 'http':
+            return Response(message, status=429, content_type='text/plain; charset=utf-8', headers=headers)
+        # JSON-RPC: the portal scripts show the error message; the request
+        # body is not read, so the response has no id
+        body = {
+            'jsonrpc': '2.0',
+            'id': None,
+            'error': {
+                'code': 429,
+                'message': message,
+                'data': {'name': 'werkzeug.exceptions.TooManyRequests', 'retry_after': wait},
+            },
+        }
+        return Response(json.dumps(body), status=429, content_type='application/json', headers=headers)
+
+    # =====================
+    # Budgets
+    # =====================
+    @api.model
+    def _mm_rate_limit_load_budgets(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        budgets = {}
+        for scope, kinds in RATE_LIMITS.items():
+            for kind, default in kinds.items():
+                param = f'mm_immigration.rate_limit.{scope}.{kind}'
+                try:
+                    budgets[scope, kind] = rate_limit.parse_budget(ICP.get_param(param, default))
+                except ValueError:
+                    _logger.warning("Invalid rate limit %s, expected 'capacity/seconds'", param)
+                    budgets[scope, kind] = rate_limit.parse_budget(default)
+        _budgets[self.env.cr.dbname] = (time.monotonic(), budgets)
+        return budgets
+
+    # =====================
+    # Metrics
+    # =====================
+    @api.model
+    def _mm_rate_limit_metrics(self):
+        """Budgets, bucket store and hit counters.
+
+        ``process`` counts the requests seen by the worker answering this
+        call only; with Redis configured, ``shared`` adds up the counts of
+        all workers (``None`` while Redis is unreachable).
+        """
+        dbname = self.env.cr.dbname
+        budgets = self._mm_rate_limit_load_budgets()
+        with _lock:
+            counters = {scope: dict(values) for scope, values in _counters.get(dbname, {}).items()}
+        buckets = self._mm_rate_limit_buckets()
+        shared = buckets.counters(dbname)
+        if shared is not None:
+            shared = {
+                scope: {
+                    outcome: shared.get(f'{scope}:{outcome}', 0)
+                    for outcome in ('allowed', 'rejected')
+                }
+                for scope in RATE_LIMITS
+            }
+        return {
+            'store': 'redis' if isinstance(buckets, _RedisWithFallback) and shared is not None else 'local',
+            'redis_configured': bool(tools.config.get('mm_rate_limit_redis')),
+            'budgets': {
+                scope: {kind: '%s/%g' % budgets[scope, kind] for kind in kinds}
+                for scope, kinds in RATE_LIMITS.items()
+            },
+            'process': {
+                scope: counters.get(scope, {'allowed': 0, 'rejected': 0})
+                for scope in RATE_LIMITS
+            },
+            'shared': shared,
+        }
+
+
+class _LocalWithoutCounters:
+    """Local buckets; their counters are the per-process ones only."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+
+    def take(self, key, capacity, period):
+        return self.buckets.take(key, capacity, period)
+
+    def count(self, key, name):
+        pass
+
+    def counters(self, key):
+        return None
+
+
+class _RedisWithFallback:
+    """Redis buckets falling back to the local ones while Redis is down."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+
+    def _failed(self, e):
+        _logger.warning("Redis rate limiting failed, using local buckets for %ss: %s",
+                        REDIS_RETRY_DELAY, e)
+        _redis['failed_at'] = time.monotonic()
+
+    def take(self, key, capacity, period):
+        try:
+            return self.buckets.take(key, capacity, period)
+        except Exception as e:
+            self._failed(e)
+            return _local_buckets.take(key, capacity, period)
+
+    def count(self, key, name):
+        try:
+            self.buckets.count(key, name)
+        except Exception as e:
+            self._failed(e)
+
+    def counters(self, key):
+        try:
+            return self.buckets.counters(key)
+        except Exception as e:
+            self._failed(e)
+            return None
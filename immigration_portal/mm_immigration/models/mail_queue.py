@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import psycopg2
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Mails sent per cron run before the cron re-triggers itself
+MAIL_BATCH_SIZE = 100
+# Sending attempts before a mail is left in exception
+MAX_ATTEMPTS = 4
+# Retry delays in minutes, by attempt number; the last one repeats
+RETRY_BACKOFF = (1, 5, 15)
+# Failures that another attempt cannot fix
+PERMANENT_FAILURES = {
+    'mail_email_invalid',
+    'mail_email_missing',
+    'mail_from_invalid',
+    'mail_from_missing',
+}
+PRIORITY_ORDER = "CASE mm_priority WHEN 'high' THEN 0 WHEN 'normal' THEN 1 ELSE 2 END"
+
+
+class MailTemplate(models.Model):
+    _inherit = 'mail.template'
+
+    def _mm_send_queued(self, res_id, priority='normal', email_values=None):
+        """Render the template for ``res_id`` into the mm mail queue.
+
+        Returns at once with the ``mail.mail`` id: the mail is sent by
+        ``ir_cron_mail_queue``, higher priorities first, never in the
+        calling request.
+        """
+        self.ensure_one()
+        mail_id = self.send_mail(res_id, force_send=False, email_values=dict(
+            email_values or {},
+            mm_priority=priority,
+            mm_template_id=self.id,
+        ))
+        self.env['mail.mail']._mm_trigger_queue()
+        return mail_id
+
+    def _mm_send_queued_batch(self, res_ids, priority='normal', email_values=None):
+        """Render the template for all ``res_ids`` at once into the queue.
+
+        Same as ``_mm_send_queued``, but the records are rendered together
+        by ``send_mail_batch`` and the mails created in one batch.
+        """
+        self.ensure_one()
+        mails = self.send_mail_batch(res_ids, force_send=False, email_values=dict(
+            email_values or {},
+            mm_priority=priority,
+            mm_template_id=self.id,
+        ))
+        self.env['mail.mail']._mm_trigger_queue()
+        return mails
+
+
+class MailMail(models.Model):
+    """Prioritized, retried queue for the mails of the mm_* modules.
+
+    Queued mails carry a priority and are left out of the standard mail
+    scheduler. ``_mm_process_queue`` sends them by batches through
+    ``mail.mail.send``, which opens one SMTP session per outgoing server
+    for the whole batch instead of one connection per mail. Transient
+    failures are retried a few times with backoff, and every batch adds
+    its counts and timings to ``mm.mail.queue.stat``, per template.
+    """
+    _inherit = 'mail.mail'
+
+    mm_priority = fields.Selection(
+        selection=[
+            ('high', 'High'),
+            ('normal', 'Normal'),
+            ('low', 'Low'),
+        ],
+        string='Queue Priority',
+        index=True,
+        help='Set on mails of the mm_* modules, sent by their own queue',
+    )
+    mm_template_id = fields.Many2one(
+        comodel_name='mail.template',
+        string='Queued From Template',
+        ondelete='set null',
+    )
+    mm_attempts = fields.Integer(
+        string='Sending Attempts',
+        readonly=True,
+    )
+
+    @api.model
+    def process_email_queue(self, email_ids=None, batch_size=None):
+        """Leave queued mm mails to ``_mm_process_queue``."""
+        filters = list(self.env.context.get('filters') or []) + [('mm_priority', '=', False)]
+        return super(MailMail, self.with_context(filters=filters)).process_email_queue(
+            email_ids=email_ids, batch_size=batch_size)
+
+    @api.model
+    def _mm_trigger_queue(self):
+        cron = self.env.ref('mm_immigration.ir_cron_mail_queue', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _mm_process_queue(self, batch_size=MAIL_BATCH_SIZE):
+        """Send a batch of due queued mails, highest priority first."""
+        now = fields.Datetime.now()
+        self.env.cr.execute(f"""
+            SELECT id, mm_template_id, create_date FROM mail_mail
+             WHERE state = 'outgoing' AND mm_priority IS NOT NULL
+               AND (scheduled_date IS NULL OR scheduled_date <= %s)
+             ORDER BY {PRIORITY_ORDER}, id
+             LIMIT %s
+        """, [now, batch_size])
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return True
+        mail_ids = [mail_id for mail_id, __, __ in rows]
+
+        started = time.monotonic()
+        self.browse(mail_ids).send(auto_commit=True, raise_exception=False)
+        elapsed = time.monotonic() - started
+
+        # Sent mails are often auto-deleted: a missing row was sent
+        self.env.invalidate_all()
+        self.env.cr.execute("""
+            SELECT id, state, failure_type, mm_attempts FROM mail_mail WHERE id = ANY(%s)
+        """, [mail_ids])
+        outcomes = {mail_id: (state, failure_type, attempts) for mail_id, state, failure_type, attempts
+                    in self.env.cr.fetchall()}
+
+        sent_at = fields.Datetime.now()
+        stats = defaultdict(lambda: defaultdict(int))
+        to_retry = defaultdict(list)
+        for mail_id, template_id, create_date in rows:
+            state, failure_type, attempts = outcomes.get(mail_id, ('sent', None, 0))
+            stat = stats[template_id]
+            # The SMTP time of the batch, apportioned per mail
+            stat['send_seconds'] += elapsed / len(rows)
+            if state == 'sent':
+                stat['sent_count'] += 1
+                stat['queue_seconds'] += (sent_at - create_date).total_seconds()
+            elif state == 'exception':
+                attempts += 1
+                if attempts < MAX_ATTEMPTS and failure_type not in PERMANENT_FAILURES:
+                    to_retry[attempts].append(mail_id)
+                    stat['retry_count'] += 1
+                else:
+                    self.browse(mail_id).mm_attempts = attempts
+                    stat['failed_count'] += 1
+
+        for attempts, retry_ids in to_retry.items():
+            delay = RETRY_BACKOFF[min(attempts, len(RETRY_BACKOFF)) - 1]
+            self.browse(retry_ids).write({
+                'state': 'outgoing',
+                'mm_attempts': attempts,
+                'scheduled_date': sent_at + timedelta(minutes=delay),
+                'failure_reason': False,
+            })
+        self.env['mm.mail.queue.stat']._add(stats)
+
+        if len(rows) == batch_size:
+            # More mail may be waiting: come back right away
+            self._mm_trigger_queue()
+        return True
+
+
+class MailQueueStat(models.Model):
+    """Daily delivery counts and timings of the mm mail queue, per template."""
+    _name = 'mm.mail.queue.stat'
+    _description = 'Mail Queue Throughput'
+    _order = 'date desc, template_id'
+
+    date = fields.Date(
+        string='Date',
+        required=True,
+        readonly=True,
+    )
+    template_id = fields.Many2one(
+        comodel_name='mail.template',
+        string='Template',
+        ondelete='cascade',
+        readonly=True,
+    )
+    sent_count = fields.Integer(
+        string='Sent',
+        readonly=True,
+    )
+    failed_count = fields.Integer(
+        string='Failed',
+        readonly=True,
+    )
+    retry_count = fields.Integer(
+        string='Retried',
+        readonly=True,
+    )
+    send_seconds = fields.Float(
+        string='SMTP Time (s)',
+        readonly=True,
+        help='Time spent sending, shared evenly between the mails of each batch',
+    )
+    queue_seconds = fields.Float(
+        string='Queue Time (s)',
+        readonly=True,
+        help='Total time from queueing to delivery of the sent mails',
+    )
+    avg_queue_seconds = fields.Float(
+        string='Avg. Queue Time (s)',
+        compute='_compute_averages',
+    )
+    mails_per_second = fields.Float(
+        string='Mails / SMTP Second',
+        compute='_compute_averages',
+    )
+
+    _day_template_unique = models.UniqueIndex('(date, template_id)')
+
+    @api.depends('sent_count', 'send_seconds', 'queue_seconds')
+    def _compute_averages(self):
+        for stat in self:
+            stat.avg_queue_seconds = stat.queue_seconds / stat.sent_count if stat.sent_count else 0.0
+            stat.mails_per_second = stat.sent_count / stat.send_seconds if stat.send_seconds else 0.0
+
+    @api.model
+    def _add(self, stats):
+        """Add ``{template id: {counter: value}}`` to today's rows."""
+        today = fields.Date.context_today(self)
+        counters = ('sent_count', 'failed_count', 'retry_count', 'send_seconds', 'queue_seconds')
+        for template_id, values in stats.items():
+            stat = self.sudo().search([('date', '=', today), ('template_id', '=', template_id)], limit=1)
+            if not stat:
+                try:
+                    with self.env.cr.savepoint():
+                        stat = self.sudo().create({'date': today, 'template_id': template_id})
+                except psycopg2.IntegrityError:
+                    stat = self.sudo().search([('date', '=', today), ('template_id', '=', template_id)], limit=1)
+            # Incremented in SQL: no lost update if two queue runs overlap
+            self.env.cr.execute("""
+                UPDATE mm_mail_queue_stat
+                   SET sent_count = sent_count + %s,
+                       failed_count = failed_count + %s,
+                       retry_count = retry_count + %s,
+                       send_seconds = send_seconds + %s,
+                       queue_seconds = queue_seconds + %s
+                 WHERE id = %s
+            """, [*(values.get(name, 0) for name in counters), stat.id])
+        self.invalidate_model()
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import timedelta
+
+from markupsafe import Markup
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Events processed per cron run before the cron re-triggers itself
+OUTBOX_BATCH_SIZE = 100
+# Retry delays in minutes, by attempt number; the last one repeats
+RETRY_BACKOFF = (1, 5, 30)
+# Processed events are kept this long, in days
+DONE_RETENTION_DAYS = 14
+# First key of the advisory locks claiming events ('mmob')
+OUTBOX_LOCK_NAMESPACE = 0x6d6d6f62
+
+
+class OutboxEvent(models.Model):
+    """Side effect of a workflow step, run after the step has committed.
+
+    Workflow code (stage moves, questionnaire, signature and payment
+    completion, GCMS milestones) appends events in its own transaction
+    through ``mm.outbox.mixin``; they exist only if that transaction
+    commits. The cron ``ir_cron_process_outbox`` then posts the chatter
+    messages, schedules the activities and sends the emails, so portal
+    requests no longer wait on SMTP or chatter notifications.
+    """
+    _name = 'mm.outbox.event'
+    _description = 'Workflow Outbox Event'
+    _order = 'id'
+
+    res_model = fields.Char(
+        string='Model',
+        required=True,
+        readonly=True,
+        index=True,
+    )
+    res_id = fields.Many2oneReference(
+        string='Record',
+        model_field='res_model',
+        required=True,
+        readonly=True,
+    )
+    event_type = fields.Selection(
+        selection=[
+            ('message_post', 'Chatter Message'),
+            ('activity_schedule', 'Activity'),
+            ('send_mail', 'Email'),
+        ],
+        string='Event',
+        required=True,
+        readonly=True,
+    )
+    payload = fields.Json(
+        string='Payload',
+        readonly=True,
+    )
+    author_id = fields.Many2one(
+        comodel_name='res.partner',
+        string='Author',
+        readonly=True,
+        help='User whose action emitted the event; author of its messages',
+    )
+    state = fields.Selection(
+        selection=[
+            ('pending', 'Pending'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        string='Status',
+        default='pending',
+        required=True,
+        index=True,
+    )
+    attempts = fields.Integer(
+        string='Attempts',
+        readonly=True,
+    )
+    max_attempts = fields.Integer(
+        string='Max Attempts',
+        default=3,
+    )
+    next_attempt_at = fields.Datetime(
+        string='Next Attempt',
+        default=fields.Datetime.now,
+        index=True,
+    )
+    done_at = fields.Datetime(
+        string='Processed',
+        readonly=True,
+    )
+    last_error = fields.Text(
+        string='Last Error',
+        readonly=True,
+    )
+
+    # =====================
+    # Outbox API
+    # =====================
+    @api.model
+    def _emit(self, records, event_type, payload):
+        """Append one ``event_type`` event per record and wake the worker.
+
+        The worker only sees the events once the current transaction
+        commits; if it rolls back, the side effects never happen.
+        """
+        if not records:
+            return self.browse()
+        events = self.sudo().create([{
+            'res_model': record._name,
+            'res_id': record.id,
+            'event_type': event_type,
+            'payload': payload,
+            'author_id': self.env.user.partner_id.id,
+        } for record in records])
+        self._trigger_cron()
+        return events
+
+    @api.model
+    def _trigger_cron(self):
+        cron = self.env.ref('mm_immigration.ir_cron_process_outbox', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def action_retry(self):
+        """Put failed events back in the outbox."""
+        if self.filtered(lambda e: e.state != 'failed'):
+            raise UserError(_("Only failed events can be retried."))
+        self.write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_attempt_at': fields.Datetime.now(),
+        })
+        self._trigger_cron()
+        return True
+
+    # =====================
+    # Worker
+    # =====================
+    @api.model
+    def _cron_process_outbox(self, limit=OUTBOX_BATCH_SIZE):
+        """Run a batch of due events, in order, committing after each one.
+
+        Events are claimed with session-level advisory locks, so several
+        workers can drain the outbox without running an event twice: the
+        state is read again after the lock is taken, in a new transaction.
+        """
+        self.env.cr.execute("""
+            SELECT id FROM mm_outbox_event
+             WHERE state = 'pending' AND next_attempt_at <= %s
+             ORDER BY id
+             LIMIT %s
+        """, [fields.Datetime.now(), limit])
+        event_ids = [row[0] for row in self.env.cr.fetchall()]
+        for event_id in event_ids:
+            self.env.cr.execute("SELECT pg_try_advisory_lock(%s, %s)", [OUTBOX_LOCK_NAMESPACE, event_id])
+            if not self.env.cr.fetchone()[0]:
+                continue
+            try:
+                # New snapshot: sees what another worker committed before unlocking
+                self.env.cr.rollback()
+                event = self.browse(event_id).exists()
+                if event and event.state == 'pending':
+                    event._run()
+                    self.env.cr.commit()
+            finally:
+                self.env.cr.execute("SELECT pg_advisory_unlock(%s, %s)", [OUTBOX_LOCK_NAMESPACE, event_id])
+
+        if len(event_ids) == limit:
+            # More work may be waiting: come back right away
+            self._trigger_cron()
+        return True
+
+    def _run(self):
+        """Run one event and record the outcome, retrying with backoff on error."""
+        self.ensure_one()
+        self.attempts += 1
+        try:
+            with self.env.cr.savepoint():
+                record = self.env[self.res_model].browse(self.res_id).exists()
+                # The record was deleted meanwhile: nothing left to notify
+                if record:
+                    getattr(self, f'_run_{self.event_type}')(record.sudo(), dict(self.payload or {}))
+        except Exception as e:
+            _logger.exception("Outbox event %s (%s on %s,%s) failed",
+                              self.id, self.event_type, self.res_model, self.res_id)
+            self.invalidate_recordset()
+            delay = RETRY_BACKOFF[min(self.attempts, len(RETRY_BACKOFF)) - 1]
+            self.write({
+                'state': 'failed' if self.attempts >= self.max_attempts else 'pending',
+                'next_attempt_at': fields.Datetime.now() + timedelta(minutes=delay),
+                'last_error': str(e),
+            })
+            return False
+        self.write({
+            'state': 'done',
+            'done_at': fields.Datetime.now(),
+            'last_error': False,
+        })
+        return True
+
+    # =====================
+    # Event Handlers
+    # =====================
+    def _run_message_post(self, record, payload):
+        body = payload.pop('body')
+        if payload.pop('html', False):
+            body = Markup(body)
+        record.message_post(body=body, author_id=self.author_id.id or None, **payload)
+
+    def _run_activity_schedule(self, record, payload):
+        activity_type = payload.pop('activity_type')
+        if payload.get('date_deadline'):
+            payload['date_deadline'] = fields.Date.to_date(payload['date_deadline'])
+        record.activity_schedule(activity_type, **payload)
+
+    def _run_send_mail(self, record, payload):
+        template = self.env.ref(payload['template'], raise_if_not_found=False)
+        if template:
+            template.sudo()._mm_send_queued(
+                record.id,
+                priority=payload.get('priority') or 'normal',
+                email_values=payload.get('email_values'),
+            )
+
+    # =====================
+    # Cleanup
+    # =====================
+    @api.autovacuum
+    def _gc_outbox(self):
+        """Drop events processed a while ago."""
+        self.sudo().search([
+            ('state', '=', 'done'),
+            ('done_at', '<', fields.Datetime.now() - timedelta(days=DONE_RETENTION_DAYS)),
+        ]).unlink()
+
+
+class OutboxMixin(models.AbstractModel):
+    """Deferred chatter messages, activities and emails.
+
+    Same arguments as ``message_post``, ``activity_schedule`` and
+    ``mail.template.send_mail``, but the side effect is appended to the
+    outbox and run by the worker after the current transaction commits.
+    Arguments must be JSON-serializable: records go by id, templates and
+    activity types by XML id.
+    """
+    _name = 'mm.outbox.mixin'
+    _description = 'Workflow Outbox Mixin'
+
+    def _outbox_message_post(self, body, message_type='notification', **kwargs):
+        self.env['mm.outbox.event']._emit(self, 'message_post', dict(
+            kwargs,
+            body=str(body),
+            html=isinstance(body, Markup),
+            message_type=message_type,
+        ))
+
+    def _outbox_activity_schedule(self, activity_type, date_deadline=None, **kwargs):
+        self.env['mm.outbox.event']._emit(self, 'activity_schedule', dict(
+            kwargs,
+            activity_type=activity_type,
+            date_deadline=fields.Date.to_string(date_deadline) if date_deadline else False,
+        ))
+
+    def _outbox_send_mail(self, template, email_values=None, priority='normal'):
+        self.env['mm.outbox.event']._emit(self, 'send_mail', {
+            'template': template,
+            'email_values': email_values,
+            'priority': priority,
+        })
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from odoo import models, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Defaults, overridable with ir.config_parameter
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_WAIT_TIMEOUT = 30
+# Advisory lock keys: (SLOT_NAMESPACE, n) is render slot n, and every
+# waiting render holds (WAIT_NAMESPACE, 0) shared ('mmrg' / 'mmrw')
+SLOT_NAMESPACE = 0x6d6d7267
+WAIT_NAMESPACE = 0x6d6d7277
+# Polling interval while all slots are busy, in seconds
+POLL_MIN = 0.05
+POLL_MAX = 0.5
+# Waits longer than this are logged, in seconds
+SLOW_WAIT = 1.0
+
+# Wait statistics of this process, by database
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+class RenderGovernor(models.AbstractModel):
+    """Caps concurrent PDF rendering across all workers of a database.
+
+    Every mm PDF render (QWeb reports, signature stamping) holds one of
+    ``mm_immigration.render_max_concurrency`` slots. Slots are
+    transaction-level advisory locks taken on a dedicated cursor, so they
+    are shared by all worker processes and released even if a render
+    crashes. Interactive renders wait up to
+    ``mm_immigration.render_wait_timeout`` seconds, then fail with a
+    "try again" error; background renders (context key
+    ``mm_render_background``) wait as long as needed.
+    """
+    _name = 'mm.render.governor'
+    _description = 'PDF Render Governor'
+
+    @api.model
+    def _get_limits(self):
+        """Return ``(max concurrent renders, wait timeout in seconds)``."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        max_concurrency = int(ICP.get_param(
+            'mm_immigration.render_max_concurrency', DEFAULT_MAX_CONCURRENCY))
+        timeout = float(ICP.get_param(
+            'mm_immigration.render_wait_timeout', DEFAULT_WAIT_TIMEOUT))
+        return max(1, max_concurrency), max(0.0, timeout)
+
+    @contextmanager
+    def _slot(self, label, count=1):
+        """Hold render slots for the duration of the block.
+
+        Waits for one slot, then takes up to ``count`` that are free at
+        that moment; yields the number taken, for callers that fan out
+        over several processes. Re-entrant per cursor: a render nested in
+        another one reuses its slot. Raises ``UserError`` when no slot
+        frees up in time.
+        """
+        if self.env.cr.cache.get('mm_render_slot'):
+            yield 1
+            return
+
+        max_concurrency, timeout = self._get_limits()
+        if self.env.context.get('mm_render_background'):
+            timeout = None
+        start = time.monotonic()
+        with self.env.registry.cursor() as slot_cr:
+            acquired = self._wait_for_slots(slot_cr, count, max_concurrency, timeout, start)
+            waited = time.monotonic() - start
+            self._record_wait(waited, acquired)
+            if not acquired:
+                _logger.warning("Render %s rejected: no slot free after %.1fs", label, waited)
+                raise UserError(_(
+                    "The server is busy generating documents. Please try again in a minute."
+                ))
+            if waited >= SLOW_WAIT:
+                _logger.info("Render %s waited %.2fs for a slot", label, waited)
+
+            self.env.cr.cache['mm_render_slot'] = True
+            try:
+                yield acquired
+            finally:
+                self.env.cr.cache.pop('mm_render_slot', None)
+        # Closing slot_cr ended its transaction, which released the slots
+
+    @api.model
+    def _wait_for_slots(self, slot_cr, count, max_concurrency, timeout, start):
+        """Take up to ``count`` free slots on ``slot_cr``, waiting for the
+        first one; return the number taken, 0 after ``timeout``."""
+        waiting = False
+        delay = POLL_MIN
+        try:
+            while True:
+                taken = 0
+                for slot in range(max_concurrency):
+                    slot_cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [SLOT_NAMESPACE, slot])
+                    if slot_cr.fetchone()[0]:
+                        taken += 1
+                        if taken >= count:
+                            break
+                if taken:
+                    return taken
+                if timeout is not None and time.monotonic() - start >= timeout:
+                    return 0
+                if not waiting:
+                    # Session-level, so it is released as soon as we stop waiting
+                    slot_cr.execute("SELECT pg_advisory_lock_shared(%s, 0)", [WAIT_NAMESPACE])
+                    waiting = True
+                time.sleep(delay)
+                delay = min(delay * 2, POLL_MAX)
+        finally:
+            if waiting:
+                slot_cr.execute("SELECT pg_advisory_unlock_shared(%s, 0)", [WAIT_NAMESPACE])
+
+    # =====================
+    # Metrics
+    # =====================
+    @api.model
+    def _record_wait(self, waited, acquired):
+        with _stats_lock:
+            stats = _stats.setdefault(self.env.cr.dbname, {
+                'renders': 0,
+                'rejected': 0,
+                'wait_total': 0.0,
+                'wait_max': 0.0,
+            })
+            stats['renders' if acquired else 'rejected'] += 1
+            stats['wait_total'] += waited
+            stats['wait_max'] = max(stats['wait_max'], waited)
+
+    @api.model
+    def _get_metrics(self):
+        """Slot usage and queue depth across all workers, plus the wait
+        statistics of the current process."""
+        max_concurrency, timeout = self._get_limits()
+        self.env.cr.execute("""
+            SELECT classid::bigint, COUNT(*) FROM pg_locks
+             WHERE locktype = 'advisory'
+               AND granted
+               AND objsubid = 2
+               AND classid::bigint IN (%s, %s)
+               AND database = (SELECT oid FROM pg_database WHERE datname = current_database())
+             GROUP BY classid
+        """, [SLOT_NAMESPACE, WAIT_NAMESPACE])
+        counts = dict(self.env.cr.fetchall())
+        with _stats_lock:
+            stats = dict(_stats.get(self.env.cr.dbname, {}))
+        attempts = stats.get('renders', 0) + stats.get('rejected', 0)
+        return {
+            'max_concurrency': max_concurrency,
+            'wait_timeout': timeout,
+            'active': counts.get(SLOT_NAMESPACE, 0),
+            'queued': counts.get(WAIT_NAMESPACE, 0),
+            'process': {
+                'renders': stats.get('renders', 0),
+                'rejected': stats.get('rejected', 0),
+                'avg_wait': stats.get('wait_total', 0.0) / attempts if attempts else 0.0,
+                'max_wait': stats.get('wait_max', 0.0),
+            },
+        }
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        """Render the reports of mm modules within a governor slot."""
+        report = self._get_report(report_ref)
+        if not report.report_name.startswith('mm_'):
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        with self.env['mm.render.governor']._slot(report.report_name):
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+import psycopg2
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Defaults, overridable with ir.config_parameter
+DEFAULT_MAX_SIZE_MB = 256
+DEFAULT_MAX_IDLE_DAYS = 30
+
+
+class ReportCache(models.Model):
+    """Rendered QWeb PDFs, keyed by report, template version and content.
+
+    The key digests the report action, the QWeb views, the language and
+    timezone, and the values the template reads, as declared by the
+    report model in ``_get_report_cache_dependencies``. Any change to
+    those values gives a new key, so stale entries are never served.
+    Cached templates must not print render-time values such as the
+    current time: a hit would serve the first render's. They are dropped as
+    soon as the same documents are rendered again, and the least recently
+    used entries are evicted once the cache outgrows its size budget.
+    """
+    _name = 'mm.report.cache'
+    _description = 'Report Render Cache'
+    _order = 'last_used desc'
+
+    cache_key = fields.Char(
+        string='Cache Key',
+        required=True,
+        readonly=True,
+    )
+    report_id = fields.Many2one(
+        comodel_name='ir.actions.report',
+        string='Report',
+        required=True,
+        ondelete='cascade',
+        readonly=True,
+    )
+    res_model = fields.Char(
+        string='Document Model',
+        readonly=True,
+    )
+    res_ids = fields.Char(
+        string='Document IDs',
+        readonly=True,
+        help='Comma-separated ids of the rendered records',
+    )
+    attachment_id = fields.Many2one(
+        comodel_name='ir.attachment',
+        string='Rendered PDF',
+        readonly=True,
+        ondelete='cascade',
+    )
+    file_size = fields.Integer(
+        string='Size (bytes)',
+        readonly=True,
+    )
+    hit_count = fields.Integer(
+        string='Hits',
+        readonly=True,
+    )
+    last_used = fields.Datetime(
+        string='Last Used',
+        readonly=True,
+        default=fields.Datetime.now,
+        index=True,
+    )
+
+    _cache_key_unique = models.UniqueIndex('(cache_key)')
+    _report_res_idx = models.Index('(report_id, res_ids)')
+
+    # =====================
+    # Key Computation
+    # =====================
+    @api.model
+    def _get_view_version(self):
+        """Fingerprint of the QWeb views: changes when any template changes."""
+        self.env.cr.execute("""
+            SELECT MAX(write_date), COUNT(*) FROM ir_ui_view
+             WHERE type = 'qweb' AND active
+        """)
+        last_write, count = self.env.cr.fetchone()
+        return f"{last_write}/{count}"
+
+    @api.model
+    def _digest_dependencies(self, dependencies):
+        """Digest ``[(records, field_names)]`` read as the template sees them.
+
+        ``field_names`` may be ``None`` to track a record through its
+        ``write_date`` only, e.g. for child lines and the company layout.
+        """
+        digest = hashlib.sha256()
+        for records, field_names in dependencies:
+            records = records.sudo()
+            field_names = list(field_names or ('write_date',))
+            rows = records.read(field_names) if records else []
+            digest.update(records._name.encode())
+            digest.update(json.dumps(rows, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    @api.model
+    def _compute_key(self, report, records):
+        dependencies = records._get_report_cache_dependencies(report)
+        parts = [
+            report.report_name,
+            str(report.write_date),
+            str(report.paperformat_id.write_date or ''),
+            self._get_view_version(),
+            self.env.lang or '',
+            # Datetimes are printed in the user's timezone
+            self.env.context.get('tz') or self.env.user.tz or '',
+            self._digest_dependencies(dependencies),
+        ]
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+    # =====================
+    # Cache API
+    # =====================
+    @api.model
+    def _get_pdf(self, report, records):
+        """Return ``(key, pdf)`` for ``records``; ``pdf`` is ``None`` on a miss."""
+        key = self._compute_key(report, records)
+        entry = self.sudo().search([('cache_key', '=', key)], limit=1)
+        if not entry or not entry.attachment_id:
+            return key, None
+        self.env.cr.execute("""
+            UPDATE mm_report_cache
+               SET hit_count = hit_count + 1, last_used = NOW() AT TIME ZONE 'UTC'
+             WHERE id = %s
+        """, [entry.id])
+        return key, entry.attachment_id.raw
+
+    @api.model
+    def _store_pdf(self, key, report, records, pdf_content):
+        """Cache a fresh render and drop the renders it supersedes."""
+        Cache = self.sudo()
+        res_ids = ','.join(str(res_id) for res_id in records.ids)
+        Cache.search([
+            ('report_id', '=', report.id),
+            ('res_ids', '=', res_ids),
+        ])._evict()
+        try:
+            with self.env.cr.savepoint():
+                entry = Cache.create({
+                    'cache_key': key,
+                    'report_id': report.id,
+                    'res_model': records._name,
+                    'res_ids': res_ids,
+                    'file_size': len(pdf_content),
+                })
+                entry.attachment_id = self.env['ir.attachment'].sudo().create({
+                    'name': f'{report.report_name}-{key[:12]}.pdf',
+                    'res_model': self._name,
+                    'res_id': entry.id,
+                    'type': 'binary',
+                    'mimetype': 'application/pdf',
+                    'raw': pdf_content,
+                })
+        except psycopg2.IntegrityError:
+            # Rendered concurrently by another worker; its entry wins
+            return
+        Cache._enforce_size_limit()
+
+    @api.model
+    def _invalidate(self, report, records):
+        """Drop the cached renders of ``records`` for ``report``."""
+        self.sudo().search([
+            ('report_id', '=', report.id),
+            ('res_model', '=', records._name),
+            ('res_ids', 'in', [str(res_id) for res_id in records.ids]),
+        ])._evict()
+
+    def _evict(self):
+        self.attachment_id.unlink()
+        self.unlink()
+
+    @api.model
+    def _enforce_size_limit(self):
+        """Evict least recently used entries beyond the size budget."""
+        max_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'mm_immigration.report_cache_max_mb', DEFAULT_MAX_SIZE_MB)) * 1024 * 1024
+        self.env.cr.execute("""
+            SELECT id FROM (
+                SELECT id, SUM(file_size) OVER (ORDER BY last_used DESC, id DESC) AS running
+                  FROM mm_report_cache
+            ) ranked
+             WHERE running > %s
+        """, [max_size])
+        overflow = [row[0] for row in self.env.cr.fetchall()]
+        if overflow:
+            self.sudo().browse(overflow)._evict()
+
+    @api.autovacuum
+    def _gc_report_cache(self):
+        """Evict entries idle for too long and enforce the size budget."""
+        max_idle_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'mm_immigration.report_cache_max_idle_days', DEFAULT_MAX_IDLE_DAYS))
+        self.sudo().search([
+            ('last_used', '<', fields.Datetime.now() - timedelta(days=max_idle_days)),
+        ])._evict()
+        self._enforce_size_limit()
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        """Serve PDFs from ``mm.report.cache`` for models that declare their
+        report dependencies; wkhtmltopdf only runs on a cache miss."""
+        report = self._get_report(report_ref)
+        if (
+            data
+            or not res_ids
+            or report.model not in self.env
+            or not hasattr(self.env[report.model], '_get_report_cache_dependencies')
+            or self.env.context.get('mm_report_cache_bypass')
+        ):
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+
+        records = self.env[report.model].browse(res_ids)
+        Cache = self.env['mm.report.cache']
+        key, pdf_content = Cache._get_pdf(report, records)
+        if pdf_content is not None:
+            return pdf_content, 'pdf'
+
+        pdf_content, report_type = super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        Cache._store_pdf(key, report, records, pdf_content)
+        return pdf_content, report_type
@@ -27,6 +27,48 @@ class ResConfigSettings(models.TransientModel):
         config_parameter='mm_immigration.portal_website',
         help='Website URL displayed in the immigration portal',
     )
+    immigration_render_max_concurrency = fields.Integer(
+        string='Concurrent PDF Renders',
+        config_parameter='mm_immigration.render_max_concurrency',
+        default=2,
+        help='Maximum number of PDFs rendered or stamped at the same time, across all workers',
+    )
+    immigration_render_wait_timeout = fields.Integer(
+        string='Render Wait Timeout (s)',
+        config_parameter='mm_immigration.render_wait_timeout',
+        default=30,
+        help='How long an interactive render waits for a free slot before asking the user to retry. '
+             'Background renders always wait.',
+    )
+    immigration_upload_max_mb = fields.Integer(
+        string='Maximum Upload Size (MB)',
+        config_parameter='mm_immigration.upload_max_mb',
+        default=100,
+        help='Largest document a client can upload from the portal',
+    )
+    immigration_upload_chunk_mb = fields.Integer(
+        string='Upload Chunk Size (MB)',
+        config_parameter='mm_immigration.upload_chunk_mb',
+        default=5,
+        help='Size of the parts a document is uploaded in; a failed part is resent on its own',
+    )
+    immigration_upload_normalize_dpi = fields.Integer(
+        string='Normalized Resolution (DPI)',
+        config_parameter='mm_immigration.upload_normalize_dpi',
+        default=200,
+        help='Uploaded photos are downscaled to fit a letter-size page at this resolution',
+    )
+    immigration_upload_normalize_quality = fields.Integer(
+        string='Normalized JPEG Quality',
+        config_parameter='mm_immigration.upload_normalize_quality',
+        default=80,
+    )
+    immigration_upload_original_retention_days = fields.Integer(
+        string='Keep Original Uploads (days)',
+        config_parameter='mm_immigration.upload_original_retention_days',
+        default=0,
+        help='Original files of normalized uploads are removed after this many days. 0 keeps them.',
+    )
 
 
 class ImmigrationSettings(models.Model):
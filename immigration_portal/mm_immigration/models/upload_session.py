@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import secrets
+from datetime import timedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from odoo.tools.mimetypes import guess_mimetype
+
+from ..tools import upload_store
+
+_logger = logging.getLogger(__name__)
+
+# Defaults, overridable with ir.config_parameter
+DEFAULT_MAX_SIZE_MB = 100
+DEFAULT_CHUNK_SIZE_MB = 5
+# Unfinished uploads are dropped after this long, in hours
+SESSION_LIFETIME_HOURS = 24
+# First key of the advisory locks serializing the chunks of an upload ('mmup')
+UPLOAD_LOCK_NAMESPACE = 0x6d6d7570
+# What clients may upload, detected from the content, not the file name
+ALLOWED_MIMETYPES = {
+    'application/pdf',
+    'image/jpeg',
+    'image/png',
+    'image/webp',
+    'image/heic',
+    'image/tiff',
+}
+
+
+class UploadSession(models.Model):
+    """A resumable, chunked upload of a client document.
+
+    The client opens a session with the file size, sends the file in
+    chunks at increasing offsets, then finalizes it. Chunks go to a
+    temporary file shared by all workers; the session stores how many
+    bytes were received, so after a network failure the client asks for
+    that offset and resumes there. Finalizing digests the file in
+    buffers, moves it into the filestore and attaches it to the case as
+    an ``mm.case.document``.
+    """
+    _name = 'mm.upload.session'
+    _description = 'Document Upload Session'
+    _order = 'id desc'
+
+    upload_key = fields.Char(
+        string='Upload Key',
+        required=True,
+        readonly=True,
+        copy=False,
+        default=lambda self: secrets.token_urlsafe(24),
+    )
+    case_id = fields.Many2one(
+        comodel_name='mm.immigration.case',
+        string='Case',
+        required=True,
+        ondelete='cascade',
+        readonly=True,
+    )
+    user_id = fields.Many2one(
+        comodel_name='res.users',
+        string='Uploaded By',
+        required=True,
+        ondelete='cascade',
+        readonly=True,
+    )
+    filename = fields.Char(
+        string='File Name',
+        required=True,
+        readonly=True,
+    )
+    category = fields.Selection(
+        selection=lambda self: self.env['mm.case.document']._fields['category'].selection,
+        string='Category',
+        required=True,
+        default='other',
+        readonly=True,
+    )
+    total_size = fields.Integer(
+        string='Size (bytes)',
+        required=True,
+        readonly=True,
+    )
+    received_size = fields.Integer(
+        string='Received (bytes)',
+        readonly=True,
+    )
+    expected_checksum = fields.Char(
+        string='Expected SHA-256',
+        readonly=True,
+        help='Checksum announced by the client, verified when the upload is finalized',
+    )
+    state = fields.Selection(
+        selection=[
+            ('open', 'Uploading'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        string='Status',
+        default='open',
+        required=True,
+        readonly=True,
+    )
+    expires_at = fields.Datetime(
+        string='Expires At',
+        readonly=True,
+        default=lambda self: fields.Datetime.now() + timedelta(hours=SESSION_LIFETIME_HOURS),
+    )
+    document_id = fields.Many2one(
+        comodel_name='mm.case.document',
+        string='Document',
+        readonly=True,
+        help='Document created by this upload, or the one it adds a page to',
+    )
+    error = fields.Char(
+        string='Error',
+        readonly=True,
+    )
+
+    _upload_key_unique = models.UniqueIndex('(upload_key)')
+
+    # =====================
+    # Limits
+    # =====================
+    @api.model
+    def _get_limits(self):
+        """Return ``(max upload size, chunk size)`` in bytes."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        max_size = int(ICP.get_param('mm_immigration.upload_max_mb', DEFAULT_MAX_SIZE_MB))
+        chunk_size = int(ICP.get_param('mm_immigration.upload_chunk_mb', DEFAULT_CHUNK_SIZE_MB))
+        return max(1, max_size) * 1024 * 1024, max(1, chunk_size) * 1024 * 1024
+
+    def _get_part_path(self):
+        self.ensure_one()
+        upload_dir = upload_store.get_upload_dir(tools.config['data_dir'], self.env.cr.dbname)
+        return os.path.join(upload_dir, f'{self.id}-{self.upload_key}.part')
+
+    # =====================
+    # Upload API
+    # =====================
+    @api.model
+    def _open(self, case, filename, size, category='other', checksum=None, document=None):
+        """Start an upload of ``size`` bytes to ``case`` for the current user.
+
+        With ``document``, the file is added as the next page of that
+        document, which must still be waiting for its pages.
+        """
+        max_size, __ = self._get_limits()
+        if document and (
+            document.case_id != case
+            or document.uploaded_by != self.env.user
+            or document.normalize_state != 'uploading'
+        ):
+            raise UserError(_("Pages can no longer be added to this document."))
+        if size <= 0:
+            raise UserError(_("The file is empty."))
+        if size > max_size:
+            raise UserError(_("The file is too large. The maximum size is %s MB.") % (max_size // (1024 * 1024)))
+        if category not in dict(self._fields['category'].selection):
+            category = 'other'
+        return self.sudo().create({
+            'case_id': case.id,
+            'user_id': self.env.user.id,
+            'filename': os.path.basename(filename or '').strip() or _('document'),
+            'category': category,
+            'total_size': size,
+            'expected_checksum': (checksum or '').strip().lower() or False,
+            'document_id': document.id if document else False,
+        })
+
+    @api.model
+    def _find(self, upload_key):
+        """Return the current user's session for ``upload_key``, if any."""
+        if not upload_key or not isinstance(upload_key, str):
+            return self.browse()
+        return self.sudo().search([
+            ('upload_key', '=', upload_key),
+            ('user_id', '=', self.env.user.id),
+        ], limit=1)
+
+    def _write_chunk(self, offset, stream):
+        """Append the chunk at ``offset`` and return the bytes received.
+
+        Only the chunk at the current end of the file is written; any
+        other offset (a chunk resent after a lost response, or sent ahead)
+        is ignored and the caller resumes from the returned offset.
+        """
+        self.ensure_one()
+        self._lock()
+        if self.state != 'open':
+            raise UserError(_("This upload is already finished."))
+        if offset != self.received_size:
+            return self.received_size
+        __, chunk_size = self._get_limits()
+        max_length = min(chunk_size, self.total_size - offset)
+        try:
+            received = upload_store.write_chunk(self._get_part_path(), offset, stream, max_length)
+        except ValueError as e:
+            raise UserError(str(e)) from e
+        self.write({
+            'received_size': received,
+            'expires_at': fields.Datetime.now() + timedelta(hours=SESSION_LIFETIME_HOURS),
+        })
+        return received
+
+    def _finalize(self, complete=True):
+        """Check the complete file and attach it to the case.
+
+        ``complete`` is false while more pages of the same document are to
+        be uploaded; the document is normalized once it is complete.
+        Returns the new or extended ``mm.case.document``. A checksum mismatch or a
+        forbidden content type fails the session, with its ``error``, and
+        drops the file; an empty recordset is returned then.
+        """
+        self.ensure_one()
+        self._lock()
+        if self.state == 'done':
+            if complete:
+                self.document_id._mark_complete()
+            return self.document_id
+        if self.state != 'open':
+            raise UserError(_("This upload has failed. Please upload the file again."))
+        if self.received_size != self.total_size:
+            raise UserError(_("The upload is incomplete: %(received)s of %(total)s bytes received.") % {
+                'received': self.received_size,
+                'total': self.total_size,
+            })
+
+        path = self._get_part_path()
+        sha1, sha256 = upload_store.digest_file(path)
+        mimetype = guess_mimetype(upload_store.read_head(path), default='application/octet-stream')
+        error = None
+        if self.expected_checksum and self.expected_checksum != sha256:
+            error = _("The file was corrupted during upload. Please upload it again.")
+        elif mimetype not in ALLOWED_MIMETYPES:
+            error = _("Only PDF files and images can be uploaded.")
+        if error:
+            upload_store.remove(path)
+            self.write({'state': 'failed', 'error': error})
+            return self.env['mm.case.document']
+
+        document = self.document_id
+        if document:
+            document._add_page(path, sha1, self.total_size, mimetype)
+        else:
+            document = self.env['mm.case.document'].sudo().create({
+                'name': self.filename,
+                'case_id': self.case_id.id,
+                'category': self.category,
+                'mimetype': mimetype,
+                'file_size': self.total_size,
+                'original_size': self.total_size,
+                'checksum': sha256,
+                'uploaded_by': self.user_id.id,
+                'normalize_state': 'uploading',
+            })
+            document._adopt_file('file', path, sha1, self.total_size, mimetype)
+        self.write({
+            'state': 'done',
+            'document_id': document.id,
+        })
+        if complete:
+            document._mark_complete()
+            self.case_id.message_post(
+                body=_("%(user)s uploaded %(file)s (%(category)s, %(pages)s page(s)).") % {
+                    'user': self.user_id.name,
+                    'file': document.name,
+                    'category': dict(self._fields['category'].selection)[document.category],
+                    'pages': document.page_count,
+                },
+                message_type='notification',
+            )
+        return document
+
+    def _lock(self):
+        """Serialize the requests of one upload, across workers."""
+        self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [UPLOAD_LOCK_NAMESPACE, self.id])
+        if not self.env.cr.fetchone()[0]:
+            raise UserError(_("Another part of this file is being uploaded. Please wait and retry."))
+        self.invalidate_recordset(['state', 'received_size'])
+
+    # =====================
+    # Cleanup
+    # =====================
+    @api.autovacuum
+    def _gc_upload_sessions(self):
+        """Drop expired unfinished uploads and their temporary files."""
+        sessions = self.sudo().search([
+            '|',
+            '&', ('state', '=', 'open'), ('expires_at', '<', fields.Datetime.now()),
+            '&', ('state', '!=', 'open'), ('write_date', '<', fields.Datetime.now() - timedelta(days=7)),
+        ])
+        for session in sessions:
+            upload_store.remove(session._get_part_path())
+        if sessions:
+            _logger.info("Dropped %s upload sessions", len(sessions))
+        sessions.unlink()
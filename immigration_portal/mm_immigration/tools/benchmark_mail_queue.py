@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the mm mail queue.
+
+Starts a local SMTP stand-in (aiosmtpd) that answers with a configurable
+delay per connection and per message, like a remote relay, then compares
+the two request paths:
+
+* ``force_send``: each request opens an SMTP session, sends its mail and
+  closes the session before responding, as ``send_mail(force_send=True)``
+  did;
+* ``queued``: each request only inserts its mail into a queue table, and
+  a worker sends the queue highest priority first, by batches sharing one
+  SMTP session, as ``mail.mail._mm_process_queue`` does.
+
+It reports request latency (median and 95th percentile) and worker
+throughput, showing that queued request latency no longer depends on
+SMTP. Run standalone, without an Odoo server:
+
+    pip install aiosmtpd
+    python mm_immigration/tools/benchmark_mail_queue.py [--mails 200] [--smtp-delay 20] [--connect-delay 150]
+
+For an end-to-end check, point an outgoing mail server of a test
+database at ``python -m aiosmtpd -n -l localhost:8025``.
+"""
+
+import argparse
+import asyncio
+import smtplib
+import socket
+import sqlite3
+import statistics
+import time
+from email.message import EmailMessage
+
+PRIORITIES = ('high', 'normal', 'low')
+
+
+class SlowHandler:
+    """aiosmtpd handler accepting every mail after the given delays."""
+
+    def __init__(self, connect_delay, message_delay):
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.connect_delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.message_delay)
+        self.received += 1
+        return '250 OK'
+
+
+def make_message(index):
+    message = EmailMessage()
+    message['From'] = 'portal@example.com'
+    message['To'] = f'client{index}@example.com'
+    message['Subject'] = f'Your signature is requested ({index})'
+    message.set_content('Please review and sign your service agreement.\n' * 20)
+    return message
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_force_send(host, port, mails):
+    latencies = []
+    for index in range(mails):
+        started = time.perf_counter()
+        with smtplib.SMTP(host, port) as smtp:
+            smtp.send_message(make_message(index))
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_queued(host, port, mails, batch_size):
+    db = sqlite3.connect(':memory:')
+    db.execute("CREATE TABLE mail (id INTEGER PRIMARY KEY, priority INTEGER, body TEXT, sent INTEGER DEFAULT 0)")
+    latencies = []
+    for index in range(mails):
+        started = time.perf_counter()
+        db.execute("INSERT INTO mail (priority, body) VALUES (?, ?)",
+                   [index % len(PRIORITIES), make_message(index).as_string()])
+        db.commit()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    sessions = 0
+    while True:
+        rows = db.execute(
+            "SELECT id, body FROM mail WHERE NOT sent ORDER BY priority, id LIMIT ?", [batch_size]).fetchall()
+        if not rows:
+            break
+        sessions += 1
+        with smtplib.SMTP(host, port) as smtp:
+            for mail_id, body in rows:
+                smtp.sendmail('portal@example.com', ['client@example.com'], body.encode())
+                db.execute("UPDATE mail SET sent = 1 WHERE id = ?", [mail_id])
+        db.commit()
+    return latencies, time.perf_counter() - started, sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mails', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--smtp-delay', type=float, default=20, help='delay per message, in ms')
+    parser.add_argument('--connect-delay', type=float, default=150, help='delay per SMTP session, in ms')
+    args = parser.parse_args()
+
+    from aiosmtpd.controller import Controller
+
+    handler = SlowHandler(args.connect_delay / 1000, args.smtp_delay / 1000)
+    host, port = '127.0.0.1', free_port()
+    controller = Controller(handler, hostname=host, port=port)
+    controller.start()
+    try:
+        print(f"SMTP stand-in on {host}:{port}: {args.connect_delay:.0f} ms per session, "
+              f"{args.smtp_delay:.0f} ms per message, {args.mails} mails\n")
+
+        started = time.perf_counter()
+        sync_latencies = run_force_send(host, port, args.mails)
+        sync_total = time.perf_counter() - started
+        queued_latencies, drain_time, sessions = run_queued(host, port, args.mails, args.batch_size)
+
+        print(f"{'path':<12}{'median ms':>12}{'p95 ms':>12}{'sessions':>10}{'mails/s':>10}")
+        print(f"{'force_send':<12}{statistics.median(sync_latencies) * 1000:>12.2f}"
+              f"{percentile(sync_latencies, 95) * 1000:>12.2f}{args.mails:>10}{args.mails / sync_total:>10.1f}")
+        print(f"{'queued':<12}{statistics.median(queued_latencies) * 1000:>12.2f}"
+              f"{percentile(queued_latencies, 95) * 1000:>12.2f}{sessions:>10}{args.mails / drain_time:>10.1f}")
+        print(f"\nDelivered: {handler.received} of {args.mails * 2}")
+    finally:
+        controller.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Normalization of uploaded document photos.
+
+Phone photos are decoded at a reduced scale when possible (JPEG draft
+mode), turned upright from their EXIF orientation, downscaled to fit a
+letter-size page at the target DPI and re-encoded without any metadata.
+A single photo gives a JPEG; several photos of one document are
+assembled into a single PDF, one page per photo. PDF uploads are left
+as they are.
+
+Kept free of ORM imports: ``normalize_many`` runs ``normalize`` in
+forked worker processes, which read the originals from their filestore
+paths and write the result next to them, so no file content crosses the
+process boundary.
+"""
+
+import os
+import tempfile
+
+from .upload_store import digest_file
+
+DEFAULT_DPI = 200
+DEFAULT_QUALITY = 80
+# Long side of a letter / A4 page, in inches
+PAGE_LONG_SIDE = 11.7
+IMAGE_MIMETYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/tiff'}
+
+
+def normalize(sources, output_dir, dpi=DEFAULT_DPI, quality=DEFAULT_QUALITY):
+    """Normalize the pages of one document.
+
+    ``sources`` is a list of ``(path, mimetype, size)``, in page order.
+    Returns ``None`` when there is nothing to gain (a PDF, or a photo that
+    would not get smaller and has no metadata to strip), else a dict with
+    the ``path`` of the new file, its ``mimetype``, ``size`` and ``sha1``.
+    """
+    from PIL import Image, ImageOps
+
+    if not sources or any(mimetype not in IMAGE_MIMETYPES for __, mimetype, __ in sources):
+        return None
+
+    max_side = int(PAGE_LONG_SIDE * dpi)
+    pages = []
+    had_metadata = False
+    for path, __, __ in sources:
+        img = Image.open(path)
+        had_metadata = had_metadata or bool(img.getexif()) or 'icc_profile' in img.info
+        # JPEG decodes straight at 1/2, 1/4 or 1/8 scale when that is enough
+        img.draft('RGB', (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        pages.append(img)
+
+    fd, output = tempfile.mkstemp(dir=output_dir, suffix='.norm')
+    os.close(fd)
+    if len(pages) == 1:
+        pages[0].save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+        mimetype = 'image/jpeg'
+    else:
+        pages[0].save(output, format='PDF', save_all=True, append_images=pages[1:],
+                      resolution=float(dpi), quality=quality)
+        mimetype = 'application/pdf'
+
+    size = os.path.getsize(output)
+    original_size = sum(source_size for __, __, source_size in sources)
+    if len(pages) == 1 and size >= original_size and not had_metadata:
+        os.unlink(output)
+        return None
+    sha1, __ = digest_file(output)
+    return {'path': output, 'mimetype': mimetype, 'size': size, 'sha1': sha1}
+
+
+def normalize_many(documents, max_workers, output_dir, dpi=DEFAULT_DPI, quality=DEFAULT_QUALITY):
+    """Normalize ``{key: sources}`` in parallel worker processes.
+
+    Workers are forked, which is only safe from a single-threaded
+    process: with ``max_workers`` below 2 the documents are normalized in
+    the calling process instead. Returns ``{key: result}`` as given by
+    ``normalize``, or ``{key: exception}`` for the documents that failed.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = {}
+    if max_workers < 2:
+        for key, sources in documents.items():
+            try:
+                results[key] = normalize(sources, output_dir, dpi, quality)
+            except Exception as e:
+                results[key] = e
+        return results
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {
+            key: executor.submit(normalize, sources, output_dir, dpi, quality)
+            for key, sources in documents.items()
+        }
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = e
+    return results
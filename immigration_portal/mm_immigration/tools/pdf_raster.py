@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+PDF page rasterization for previews.
+
+Pages are rendered one at a time, so a caller can store and publish the
+first page before the others are done. Uses PyMuPDF when installed, else
+the poppler ``pdftoppm`` / ``pdfinfo`` binaries; without either,
+``is_available`` is false and documents get no previews. Images are
+re-encoded as WebP with PIL when it supports it, else kept as PNG.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+POPPLER_TIMEOUT = 60
+WEBP_QUALITY = 80
+
+
+def _has_pymupdf():
+    try:
+        import fitz  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def is_available():
+    return _has_pymupdf() or bool(shutil.which('pdftoppm') and shutil.which('pdfinfo'))
+
+
+def page_count(path):
+    """Number of pages of the PDF at ``path``."""
+    if _has_pymupdf():
+        import fitz
+
+        with fitz.open(path) as pdf:
+            return pdf.page_count
+    result = subprocess.run(
+        [shutil.which('pdfinfo'), path],
+        capture_output=True,
+        timeout=POPPLER_TIMEOUT,
+        check=True,
+    )
+    match = re.search(rb'^Pages:\s+(\d+)', result.stdout, re.MULTILINE)
+    if not match:
+        raise ValueError("Could not read the page count of the PDF")
+    return int(match.group(1))
+
+
+def _render_png_pymupdf(path, page, width):
+    import fitz
+
+    with fitz.open(path) as pdf:
+        pdf_page = pdf[page - 1]
+        zoom = width / pdf_page.rect.width
+        pixmap = pdf_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return pixmap.tobytes('png')
+
+
+def _render_png_poppler(path, page, width):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        prefix = os.path.join(tmpdir, 'page')
+        subprocess.run(
+            [shutil.which('pdftoppm'), '-png', '-singlefile', '-f', str(page), '-l', str(page),
+             '-scale-to-x', str(width), '-scale-to-y', '-1', path, prefix],
+            capture_output=True,
+            timeout=POPPLER_TIMEOUT,
+            check=True,
+        )
+        with open(prefix + '.png', 'rb') as f:
+            return f.read()
+
+
+def render_page(path, page, width):
+    """Render 1-based ``page`` at ``width`` pixels.
+
+    Returns ``(image bytes, mimetype, width, height)``.
+    """
+    if _has_pymupdf():
+        png = _render_png_pymupdf(path, page, width)
+    else:
+        png = _render_png_poppler(path, page, width)
+
+    try:
+        from PIL import Image, features
+    except ImportError:
+        return png, 'image/png', width, 0
+    img = Image.open(BytesIO(png))
+    size = img.size
+    if not features.check('webp'):
+        return png, 'image/png', size[0], size[1]
+    output = BytesIO()
+    img.save(output, format='WEBP', quality=WEBP_QUALITY, method=4)
+    return output.getvalue(), 'image/webp', size[0], size[1]
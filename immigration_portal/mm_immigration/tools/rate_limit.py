@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Token buckets for rate limiting requests.
+
+A budget ``capacity/period`` allows bursts of ``capacity`` requests, then
+refills at ``capacity`` requests per ``period`` seconds. ``LocalBuckets``
+keeps the buckets in the memory of the process, so each worker enforces
+its own budget. ``RedisBuckets`` keeps them in a Redis server shared by
+all workers, and updates each bucket atomically with a Lua script; it
+also keeps hit counters shared by the workers.
+"""
+
+import collections
+import math
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Buckets kept per process; the least recently used ones are dropped
+MAX_LOCAL_BUCKETS = 10000
+
+REDIS_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * capacity / period)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(period) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+def parse_budget(value):
+    """Return ``(capacity, period)`` from ``'capacity/period'``.
+
+    Raises ``ValueError`` unless both are positive.
+    """
+    capacity, period = str(value).split('/')
+    capacity, period = int(capacity), float(period)
+    if capacity < 1 or period <= 0:
+        raise ValueError(value)
+    return capacity, period
+
+
+def retry_after(tokens, capacity, period):
+    """Seconds until a bucket holding ``tokens`` has one token again."""
+    return max(1, math.ceil((1 - tokens) * period / capacity))
+
+
+class LocalBuckets:
+    """Token buckets in the memory of the current process."""
+
+    def __init__(self, max_buckets=MAX_LOCAL_BUCKETS):
+        self.max_buckets = max_buckets
+        self._lock = threading.Lock()
+        self._buckets = collections.OrderedDict()
+
+    def take(self, key, capacity, period):
+        """Take a token from bucket ``key``.
+
+        Returns ``(allowed, retry after in seconds)``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * capacity / period)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else retry_after(tokens, capacity, period)
+
+
+class RedisBuckets:
+    """Token buckets in Redis, shared by every worker using ``url``."""
+
+    def __init__(self, url, prefix='mm_rate_limit'):
+        if redis is None:
+            raise RuntimeError("The redis Python package is required to share rate limits")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._script = self._client.register_script(REDIS_SCRIPT)
+
+    def take(self, key, capacity, period):
+        allowed, tokens = self._script(keys=[f'{self.prefix}:{key}'], args=[capacity, period])
+        if allowed:
+            return True, 0
+        return False, retry_after(float(tokens), capacity, period)
+
+    def count(self, key, name):
+        """Add one to counter ``name`` of hash ``key``, shared by all workers."""
+        self._client.hincrby(f'{self.prefix}:counters:{key}', name, 1)
+
+    def counters(self, key):
+        """All counters of hash ``key``, as ``{name: value}``."""
+        return {
+            name.decode(): int(value)
+            for name, value in self._client.hgetall(f'{self.prefix}:counters:{key}').items()
+        }
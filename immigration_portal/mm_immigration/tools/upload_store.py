@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Temporary files of chunked uploads.
+
+Each upload session writes to its own ``.part`` file under the data
+directory, so every worker of the host sees the same partial file and an
+interrupted upload resumes where it stopped. Chunks are copied from the
+request stream in small buffers and the finished file is digested the
+same way: an upload is never held in memory as a whole.
+"""
+
+import hashlib
+import os
+
+BUFFER_SIZE = 64 * 1024
+
+
+def get_upload_dir(data_dir, dbname):
+    path = os.path.join(data_dir, 'mm_uploads', dbname)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_chunk(path, offset, stream, max_length):
+    """Write ``stream`` into ``path`` from ``offset``; return the new size.
+
+    Whatever was written past ``offset`` by an earlier, interrupted
+    attempt is discarded first, so resending a chunk is harmless. Raises
+    ``ValueError`` if the stream holds more than ``max_length`` bytes.
+    """
+    mode = 'r+b' if os.path.exists(path) else 'w+b'
+    with open(path, mode) as part:
+        part.seek(offset)
+        part.truncate()
+        written = 0
+        while True:
+            buffer = stream.read(BUFFER_SIZE)
+            if not buffer:
+                break
+            written += len(buffer)
+            if written > max_length:
+                part.truncate(offset)
+                raise ValueError("Chunk exceeds the declared upload size")
+            part.write(buffer)
+        return offset + written
+
+
+def digest_file(path):
+    """Return ``(sha1, sha256)`` hex digests of ``path``, read in buffers.
+
+    SHA-1 is the filestore key of attachments, SHA-256 the checksum shown
+    to users and compared with the one the client announced.
+    """
+    sha1 = hashlib.sha1()
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for buffer in iter(lambda: part.read(BUFFER_SIZE), b''):
+            sha1.update(buffer)
+            sha256.update(buffer)
+    return sha1.hexdigest(), sha256.hexdigest()
+
+
+def read_head(path, length=1024):
+    """First bytes of ``path``, for content type detection."""
+    with open(path, 'rb') as part:
+        return part.read(length)
+
+
+def remove(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+
+from . import portal_onboard_wizard
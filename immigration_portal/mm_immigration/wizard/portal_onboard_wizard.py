@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class PortalOnboardWizard(models.TransientModel):
+    """Invite the clients of many cases to the portal in one pass.
+
+    Portal users are created by batches and the invitation emails are
+    queued, so a whole cohort is onboarded in one click without waiting
+    on SMTP. Clients that cannot be invited are reported, not fatal.
+    """
+    _name = 'mm.portal.onboard.wizard'
+    _description = 'Bulk Portal Onboarding Wizard'
+
+    case_ids = fields.Many2many(
+        comodel_name='mm.immigration.case',
+        string='Cases',
+        required=True,
+        domain=[('portal_invited', '=', False)],
+    )
+    case_count = fields.Integer(
+        string='Cases',
+        compute='_compute_case_count',
+    )
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'mm.immigration.case':
+            cases = self.env['mm.immigration.case'].browse(self.env.context.get('active_ids', []))
+            res['case_ids'] = [(6, 0, cases.filtered(lambda c: not c.portal_invited).ids)]
+        return res
+
+    @api.depends('case_ids')
+    def _compute_case_count(self):
+        for wizard in self:
+            wizard.case_count = len(wizard.case_ids)
+
+    def action_onboard(self):
+        """Grant portal access and queue the invitations of all selected cases."""
+        self.ensure_one()
+
+        if not self.case_ids:
+            raise UserError(_("All selected cases have already been invited to the portal."))
+
+        invited, failures = self.case_ids._onboard_portal()
+        _logger.info("Bulk portal onboarding: %s case(s) invited, %s client(s) failed",
+                     len(invited), len(failures))
+
+        if failures:
+            message = _("%(invited)s case(s) invited, %(failed)s client(s) failed:\n%(errors)s") % {
+                'invited': len(invited),
+                'failed': len(failures),
+                'errors': '\n'.join(f"{partner.display_name}: {reason}" for partner, reason in failures.items()),
+            }
+        else:
+            message = _("%s case(s) invited. The invitation emails are being sent.") % len(invited)
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Portal Onboarding'),
+                'message': message,
+                'type': 'warning' if failures else 'success',
+                'sticky': bool(failures),
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
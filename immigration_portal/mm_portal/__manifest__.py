@@ -13,6 +13,9 @@ This module provides the client-facing portal for immigration cases:
 * Progress tracker with visual stage indicators
 * Case dashboard with current action prompts
 * Document access and downloads
+* Page-by-page document previews, rendered in the background
+* Resumable, chunked document uploads
+* Live page updates over the bus as cases, signatures and payments progress
 * Multi-case support per client
 
 Depends on mm_immigration core module.
@@ -37,6 +40,9 @@ Depends on mm_immigration core module.
         'web.assets_frontend': [
             'mm_portal/static/src/scss/_variables.scss',
             'mm_portal/static/src/scss/portal.scss',
+            'mm_portal/static/src/js/chunked_upload.js',
+            'mm_portal/static/src/js/document_pages.js',
+            'mm_portal/static/src/js/portal_live.js',
         ],
     },
     'installable': True,
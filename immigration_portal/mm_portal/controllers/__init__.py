@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from . import download
+from . import idempotency
+from . import renditions
 from . import portal
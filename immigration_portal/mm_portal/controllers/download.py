@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming downloads for portal documents.
+
+Controllers keep their own access checks and hand the (sudoed) record to
+``stream_binary_field``. The file is served by ``ir.binary`` straight
+from the filestore: ``Range``/``If-Range`` partial requests, ETag and
+``If-None-Match`` revalidation are answered without loading the file,
+and with ``--x-sendfile`` the body is offloaded to the web server
+(X-Sendfile / X-Accel-Redirect).
+"""
+
+from odoo.http import request
+
+
+def has_binary(record, field_name):
+    """Whether ``record[field_name]`` is set, without loading its content.
+
+    With ``bin_size``, attachment fields read the file size instead of
+    the base64 payload.
+    """
+    return bool(record.with_context(bin_size=True)[field_name])
+
+
+def stream_binary_field(record, field_name, filename=None, mimetype='application/pdf',
+                        as_attachment=True):
+    """Response streaming ``record[field_name]``, or 404 when it is empty."""
+    record.ensure_one()
+    if not has_binary(record, field_name):
+        return request.not_found()
+
+    stream = request.env['ir.binary']._get_stream_from(
+        record,
+        field_name,
+        filename=filename,
+        mimetype=mimetype,
+    )
+    # Revalidated through the ETag rather than cached blindly: signed and
+    # regenerated documents replace the content behind the same URL
+    response = stream.get_response(
+        as_attachment=as_attachment,
+        immutable=False,
+        content_security_policy=None,
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
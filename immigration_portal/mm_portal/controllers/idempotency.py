@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Idempotent portal POST routes.
+
+Clients send an ``Idempotency-Key`` header with a fresh key per user
+action, and the same key when they retry it. ``idempotent`` routes run
+once per key; retries get the stored response from
+``mm.idempotency.key`` instead of creating another row or completing
+the questionnaire again. Requests without the header run as before.
+"""
+
+import functools
+
+from odoo.http import request
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+def idempotent(endpoint):
+    """Decorate a route (under ``@http.route``) to replay its responses.
+
+    The key is scoped to the user and the request path. The response must
+    be JSON-serializable: ``jsonrpc`` results, or the JSON strings some
+    ``http`` routes return.
+    """
+    @functools.wraps(endpoint)
+    def wrapper(self, *args, **kwargs):
+        return request.env['mm.idempotency.key']._run_once(
+            request.httprequest.path,
+            request.httprequest.headers.get(IDEMPOTENCY_HEADER),
+            lambda: endpoint(self, *args, **kwargs),
+        )
+    return wrapper
@@ -3,7 +3,12 @@
 from odoo import http, fields, _
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
-from odoo.exceptions import AccessError, MissingError
+from odoo.addons.mm_portal.controllers.download import stream_binary_field
+from odoo.addons.mm_portal.controllers.renditions import (
+    rendition_image_response,
+    rendition_status_response,
+)
+from odoo.exceptions import AccessError, MissingError, UserError
 
 
 class ImmigrationPortal(CustomerPortal):
@@ -129,14 +134,137 @@ class ImmigrationPortal(CustomerPortal):
             # mm_esign module may not be installed
             pass
 
+        __, chunk_size = request.env['mm.upload.session']._get_limits()
         values = {
             'page_name': 'immigration_documents',
             'case': case,
             'settings': settings,
             'signed_agreements': signed_agreements,
+            'client_documents': case.client_document_ids,
+            'document_categories': request.env['mm.case.document']._fields['category'].selection,
+            'upload_chunk_size': chunk_size,
         }
         return request.render('mm_portal.portal_case_documents', values)
 
+    # =====================
+    # Document Uploads
+    # =====================
+    def _upload_response(self, session, **extra):
+        return request.make_json_response(dict({
+            'upload_key': session.upload_key,
+            'offset': session.received_size,
+            'size': session.total_size,
+            'state': session.state,
+        }, **extra), headers=[('Cache-Control', 'no-store')])
+
+    def _get_upload_session(self, upload_key):
+        session = request.env['mm.upload.session']._find(upload_key)
+        if not session:
+            raise MissingError(_("This upload does not exist."))
+        return session
+
+    @http.route(['/my/immigration/case/<int:case_id>/upload'], type='http', auth='user',
+                methods=['POST'], website=True)
+    def portal_upload_open(self, case_id, filename=None, size=0, category='other', checksum=None,
+                           document_id=None, **kw):
+        """Start a chunked upload; returns its key and the chunk size.
+
+        ``document_id`` adds the file as the next page of a document whose
+        pages are being uploaded.
+        """
+        case = self._check_case_access(case_id)
+        try:
+            document = None
+            if document_id:
+                document = request.env['mm.case.document'].sudo().browse(int(document_id)).exists()
+            session = request.env['mm.upload.session']._open(
+                case, filename, int(size or 0), category=category, checksum=checksum, document=document)
+        except (UserError, ValueError) as e:
+            return request.make_json_response({'error': str(e)}, status=400)
+        __, chunk_size = session._get_limits()
+        return self._upload_response(session, chunk_size=chunk_size)
+
+    @http.route(['/my/immigration/upload/<string:upload_key>'], type='http', auth='user',
+                methods=['GET'], website=True)
+    def portal_upload_status(self, upload_key, **kw):
+        """Bytes received so far: where an interrupted upload resumes."""
+        return self._upload_response(self._get_upload_session(upload_key))
+
+    # The body is the raw chunk, not a form: cross-site pages cannot send
+    # a PUT without a CORS preflight, so no CSRF token is needed
+    @http.route(['/my/immigration/upload/<string:upload_key>'], type='http', auth='user',
+                methods=['PUT'], csrf=False, website=True)
+    def portal_upload_chunk(self, upload_key, offset=0, **kw):
+        """Write the chunk in the request body at ``offset``."""
+        session = self._get_upload_session(upload_key)
+        try:
+            received = session._write_chunk(int(offset), request.httprequest.stream)
+        except (UserError, ValueError) as e:
+            return request.make_json_response({'error': str(e)}, status=409)
+        return self._upload_response(session, offset=received)
+
+    @http.route(['/my/immigration/upload/<string:upload_key>/finalize'], type='http', auth='user',
+                methods=['POST'], website=True)
+    def portal_upload_finalize(self, upload_key, complete='1', **kw):
+        """Attach the complete upload to the case; ``complete=0`` while
+        more pages of the same document follow."""
+        session = self._get_upload_session(upload_key)
+        try:
+            document = session._finalize(complete=complete != '0')
+        except UserError as e:
+            return request.make_json_response({'error': str(e)}, status=400)
+        if not document:
+            return request.make_json_response({'error': session.error}, status=400)
+        return self._upload_response(session, document={
+            'id': document.id,
+            'name': document.name,
+            'checksum': document.checksum,
+        })
+
+    @http.route(['/my/immigration/document/<int:document_id>'], type='http', auth='user')
+    def portal_client_document(self, document_id, **kw):
+        """Download a document the client uploaded."""
+        document = request.env['mm.case.document'].sudo().browse(document_id)
+        if not document.exists():
+            raise MissingError(_("This document does not exist."))
+        self._check_case_access(document.case_id.id)
+        if document._get_download_field() == 'normalized_file':
+            return stream_binary_field(
+                document, 'normalized_file',
+                filename=document._get_normalized_name(document.normalized_mimetype),
+                mimetype=document.normalized_mimetype,
+            )
+        return stream_binary_field(document, 'file', filename=document.name, mimetype=document.mimetype)
+
+    # =====================
+    # Page Previews
+    # =====================
+    def _get_rendition_record(self, model, res_id, field):
+        """Record whose ``field`` previews the client may see, or 404."""
+        Model = request.env.get(model)
+        if Model is None or field not in getattr(Model, '_rendition_fields', ()):
+            raise MissingError(_("This document does not exist."))
+        record = Model.sudo().browse(res_id).exists()
+        if not record or not record._can_view_renditions():
+            raise MissingError(_("This document does not exist."))
+        return record
+
+    @http.route(['/my/immigration/pages/<string:model>/<int:res_id>/<string:field>'],
+                type='http', auth='user', methods=['GET'])
+    def portal_document_pages(self, model, res_id, field, **kw):
+        """Page previews rendered so far for a case document."""
+        record = self._get_rendition_record(model, res_id, field)
+        return rendition_status_response(
+            record, field, f'/my/immigration/pages/{model}/{res_id}/{field}')
+
+    @http.route(['/my/immigration/pages/<string:model>/<int:res_id>/<string:field>/'
+                 '<any(page,thumbnail):kind>/<int:page>'],
+                type='http', auth='user', methods=['GET'])
+    def portal_document_page_image(self, model, res_id, field, kind, page, **kw):
+        """One page image (or the thumbnail) of a case document."""
+        record = self._get_rendition_record(model, res_id, field)
+        return rendition_image_response(record, field, kind, page)
+
     # Placeholder routes for future phases
     @http.route(['/my/immigration/questionnaire/<string:qtype>'], type='http', auth='user', website=True)
     def portal_questionnaire(self, qtype, **kw):
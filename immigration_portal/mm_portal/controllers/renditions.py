@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Page previews of portal documents.
+
+Controllers keep their own access checks and hand the (sudoed) record
+to these helpers. The viewer polls the status response, which lists the
+pages rasterized so far, and loads each page image lazily.
+"""
+
+from odoo.http import request
+
+from .download import stream_binary_field
+
+
+def rendition_status_response(record, field_name, url_base):
+    """JSON progress of the previews of ``record[field_name]``.
+
+    ``url_base`` is the URL the page images are served under, as
+    ``<url_base>/<kind>/<page>``.
+    """
+    rendition = record._get_renditions(field_name)
+    if not rendition:
+        status = {'state': 'unavailable', 'page_count': 0, 'pages': [], 'thumbnail': False}
+        return request.make_json_response(status, headers=[('Cache-Control', 'no-store')])
+    status = rendition._get_status()
+    # The digest in the URL lets browsers cache the images of a document
+    # for good: a regenerated document gets new URLs
+    version = rendition.digest[:16]
+    for page in status['pages']:
+        page['url'] = f"{url_base}/page/{page['page']}?v={version}"
+    if status['thumbnail']:
+        status['thumbnail'] = f"{url_base}/thumbnail/1?v={version}"
+    return request.make_json_response(status, headers=[('Cache-Control', 'no-store')])
+
+
+def rendition_image_response(record, field_name, kind, page):
+    """Response streaming one page image, or 404 when not rendered yet."""
+    rendition = record._get_renditions(field_name)
+    page_record = rendition._get_page(kind, page) if rendition else None
+    if not page_record:
+        return request.not_found()
+    response = stream_binary_field(
+        page_record,
+        'image',
+        filename=f'{kind}-{page}',
+        mimetype=page_record.mimetype,
+        as_attachment=False,
+    )
+    response.headers['Cache-Control'] = 'private, max-age=604800, immutable'
+    return response
@@ -0,0 +1,193 @@
+/**
+ * Chunked, resumable document uploads
+ *
+ * Opens an upload session, PUTs the file in chunks at increasing offsets
+ * and finalizes it. The session key is kept in localStorage per file, so
+ * choosing the same file again after a failure resumes from the offset
+ * the server reports instead of starting over.
+ *
+ * Several files selected together are the pages of one document: the
+ * first one creates it and the others are added to it. Which pages are
+ * done is also kept in localStorage, so a resumed selection skips them.
+ */
+
+(function() {
+    'use strict';
+
+    var MAX_RETRIES = 5;
+    var RETRY_DELAY = 1000;
+    var STORAGE_PREFIX = 'mm_upload:';
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('form.o_mm_chunked_upload').forEach(initUploadForm);
+    });
+
+    function initUploadForm(form) {
+        var fileInput = form.querySelector('input[type="file"]');
+        var button = form.querySelector('button[type="submit"]');
+        var progressBox = form.querySelector('.o_mm_upload_progress');
+        var progressBar = form.querySelector('.progress-bar');
+        var message = form.querySelector('.o_mm_upload_message');
+
+        function showProgress(sent, total, text) {
+            var percent = total ? Math.floor(sent * 100 / total) : 0;
+            progressBox.classList.remove('d-none');
+            progressBar.style.width = percent + '%';
+            message.textContent = text || (percent + '%');
+        }
+
+        form.addEventListener('submit', function(ev) {
+            ev.preventDefault();
+            var files = Array.prototype.slice.call(fileInput.files);
+            if (!files.length) {
+                return;
+            }
+            button.disabled = true;
+            uploadPages(form, files, showProgress)
+            .then(function() {
+                showProgress(1, 1, 'Uploaded. Refreshing...');
+                window.location.reload();
+            })
+            .catch(function(error) {
+                button.disabled = false;
+                message.textContent = error.message;
+            });
+        });
+    }
+
+    function fileId(file) {
+        return [file.name, file.size, file.lastModified].join('|');
+    }
+
+    function storageKey(form, file) {
+        return STORAGE_PREFIX + form.dataset.openUrl + '|' + fileId(file);
+    }
+
+    // Upload the selected files in order, as the pages of one document
+    function uploadPages(form, files, onProgress) {
+        var batchKey = STORAGE_PREFIX + form.dataset.openUrl + '|batch|' + files.map(fileId).join('/');
+        var batch = JSON.parse(window.localStorage.getItem(batchKey) || '{"next": 0, "document_id": null}');
+        var total = files.reduce(function(sum, file) { return sum + file.size; }, 0);
+
+        function next(index) {
+            if (index >= files.length) {
+                window.localStorage.removeItem(batchKey);
+                return Promise.resolve();
+            }
+            var before = files.slice(0, index).reduce(function(sum, file) { return sum + file.size; }, 0);
+            var label = files.length > 1 ? 'Page ' + (index + 1) + ' of ' + files.length + ': ' : '';
+            var options = {
+                documentId: batch.document_id,
+                complete: index === files.length - 1,
+            };
+            return upload(form, files[index], options, function(sent) {
+                var percent = total ? Math.floor((before + sent) * 100 / total) : 0;
+                onProgress(before + sent, total, label + percent + '%');
+            }).then(function(data) {
+                batch = {next: index + 1, document_id: data.document.id};
+                window.localStorage.setItem(batchKey, JSON.stringify(batch));
+                return next(index + 1);
+            });
+        }
+
+        return next(batch.next);
+    }
+
+    function parseResponse(response) {
+        return response.json().then(function(data) {
+            if (!response.ok) {
+                throw new Error(data.error || 'Upload failed. Please try again.');
+            }
+            return data;
+        });
+    }
+
+    // Resume the stored session of this file if the server still has it
+    function openSession(form, file, documentId) {
+        var key = storageKey(form, file);
+        var uploadKey = window.localStorage.getItem(key);
+        var resume = uploadKey ?
+            fetch('/my/immigration/upload/' + uploadKey, {credentials: 'same-origin', cache: 'no-store'})
+                .then(parseResponse)
+                .then(function(data) { return data.state === 'open' ? data : null; })
+                .catch(function() { return null; }) :
+            Promise.resolve(null);
+
+        return resume.then(function(session) {
+            if (session) {
+                return session;
+            }
+            var formData = new FormData();
+            formData.append('csrf_token', form.querySelector('input[name="csrf_token"]').value);
+            formData.append('filename', file.name);
+            formData.append('size', file.size);
+            formData.append('category', form.querySelector('[name="category"]').value);
+            if (documentId) {
+                formData.append('document_id', documentId);
+            }
+            return fetch(form.dataset.openUrl, {method: 'POST', body: formData, credentials: 'same-origin'})
+                .then(parseResponse)
+                .then(function(data) {
+                    window.localStorage.setItem(key, data.upload_key);
+                    return data;
+                });
+        });
+    }
+
+    function sendChunk(uploadKey, file, offset, chunkSize, attempt) {
+        var chunk = file.slice(offset, Math.min(offset + chunkSize, file.size));
+        return fetch('/my/immigration/upload/' + uploadKey + '?offset=' + offset, {
+            method: 'PUT',
+            body: chunk,
+            headers: {'Content-Type': 'application/octet-stream'},
+            credentials: 'same-origin',
+        })
+        .then(parseResponse)
+        .catch(function(error) {
+            if (attempt >= MAX_RETRIES) {
+                throw new Error('The connection was lost. Choose the same file again to resume the upload.');
+            }
+            return new Promise(function(resolve) {
+                setTimeout(resolve, RETRY_DELAY * Math.pow(2, attempt));
+            }).then(function() {
+                // The server tells where to continue, whatever happened to the chunk
+                return fetch('/my/immigration/upload/' + uploadKey, {credentials: 'same-origin', cache: 'no-store'})
+                    .then(parseResponse)
+                    .catch(function() { return {offset: offset}; })
+                    .then(function(status) {
+                        return sendChunk(uploadKey, file, status.offset, chunkSize, attempt + 1);
+                    });
+            });
+        });
+    }
+
+    function upload(form, file, options, onProgress) {
+        var chunkSize = parseInt(form.dataset.chunkSize, 10);
+        return openSession(form, file, options.documentId).then(function(session) {
+            chunkSize = session.chunk_size || chunkSize;
+
+            function next(offset) {
+                onProgress(offset, file.size);
+                if (offset >= file.size) {
+                    var formData = new FormData();
+                    formData.append('csrf_token', form.querySelector('input[name="csrf_token"]').value);
+                    formData.append('complete', options.complete ? '1' : '0');
+                    return fetch('/my/immigration/upload/' + session.upload_key + '/finalize', {
+                        method: 'POST',
+                        body: formData,
+                        credentials: 'same-origin',
+                    })
+                    .then(parseResponse)
+                    .finally(function() {
+                        window.localStorage.removeItem(storageKey(form, file));
+                    });
+                }
+                return sendChunk(session.upload_key, file, offset, chunkSize, 0).then(function(data) {
+                    return next(data.offset);
+                });
+            }
+
+            return next(session.offset);
+        });
+    }
+})();
@@ -0,0 +1,117 @@
+/**
+ * Page-by-page document previews
+ *
+ * Documents are shown as page images rendered in the background instead
+ * of an embedded PDF, which phones download in full before showing
+ * anything. The viewer polls the status route and adds each page as soon
+ * as it is rendered; images below the fold load lazily. Until the first
+ * page is ready, or when previews are unavailable, the full PDF link
+ * stays the way to read the document.
+ */
+
+(function() {
+    'use strict';
+
+    var POLL_DELAY = 1500;
+    var MAX_POLLS = 120;
+
+    function initAll() {
+        // Live updates swap page regions in: only start the new elements
+        document.querySelectorAll('.o_mm_document_pages[data-pages-url]:not([data-started])').forEach(initViewer);
+        document.querySelectorAll('.o_mm_document_thumbnail[data-pages-url]:not([data-started])').forEach(initThumbnail);
+    }
+
+    document.addEventListener('DOMContentLoaded', initAll);
+    document.addEventListener('mm:portal-updated', initAll);
+
+    function fetchStatus(url) {
+        return fetch(url, {credentials: 'same-origin'}).then(function(response) {
+            if (!response.ok) {
+                throw new Error('Preview unavailable');
+            }
+            return response.json();
+        });
+    }
+
+    function initViewer(viewer) {
+        viewer.dataset.started = '1';
+        var list = viewer.querySelector('.o_mm_document_pages_list');
+        var loading = viewer.querySelector('.o_mm_document_pages_loading');
+        var info = viewer.querySelector('.o_mm_document_pages_info');
+        var shown = {};
+        var polls = 0;
+
+        function addPage(page) {
+            var img = document.createElement('img');
+            img.src = page.url;
+            img.loading = 'lazy';
+            img.alt = 'Page ' + page.page;
+            img.className = 'd-block w-100 bg-white shadow-sm mb-2';
+            if (page.width && page.height) {
+                // Reserves the space, so lazy pages do not shift the scroll
+                img.width = page.width;
+                img.height = page.height;
+                img.style.height = 'auto';
+            }
+            list.appendChild(img);
+            shown[page.page] = true;
+        }
+
+        function showUnavailable() {
+            loading.textContent = 'The preview is not available. Please open the full PDF.';
+        }
+
+        function poll() {
+            polls++;
+            fetchStatus(viewer.dataset.pagesUrl).then(function(status) {
+                status.pages.forEach(function(page) {
+                    if (!shown[page.page]) {
+                        addPage(page);
+                    }
+                });
+                var count = Object.keys(shown).length;
+                if (count) {
+                    loading.classList.add('d-none');
+                }
+                if (status.page_count) {
+                    info.textContent = count < status.page_count
+                        ? count + ' of ' + status.page_count + ' pages ready'
+                        : status.page_count + ' page(s)';
+                }
+                if (status.state === 'pending' && polls < MAX_POLLS) {
+                    window.setTimeout(poll, POLL_DELAY);
+                } else if (!count) {
+                    showUnavailable();
+                }
+            }).catch(showUnavailable);
+        }
+
+        poll();
+    }
+
+    function initThumbnail(link) {
+        link.dataset.started = '1';
+        var polls = 0;
+
+        function poll() {
+            polls++;
+            fetchStatus(link.dataset.pagesUrl).then(function(status) {
+                if (status.thumbnail) {
+                    var img = document.createElement('img');
+                    img.src = status.thumbnail;
+                    img.loading = 'lazy';
+                    img.alt = 'Document preview';
+                    img.className = 'w-100';
+                    link.innerHTML = '';
+                    link.appendChild(img);
+                } else if (status.state === 'pending' && polls < MAX_POLLS) {
+                    window.setTimeout(poll, POLL_DELAY * 2);
+                }
+            }).catch(function() {
+                // Keeps the icon
+            });
+        }
+
+        poll();
+    }
+})();
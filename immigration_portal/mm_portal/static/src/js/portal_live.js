@@ -0,0 +1,78 @@
+/** @odoo-module **/
+
+/**
+ * Live portal updates
+ *
+ * The server pushes an ``mm_portal/update`` notification on the client's
+ * partner channel when a case changes stage, a signature request changes
+ * state, a roadmap is delivered or a payment is confirmed (see
+ * ``mm.immigration.case._notify_portal``). Page regions depending on them
+ * carry an id and ``data-mm-live`` with the keys they show (``case:12``,
+ * ``esign:5``). On a matching notification the page is fetched once and
+ * those regions are swapped in place, so clients no longer need to reload
+ * pages, which re-ran every render and payment check, to see progress.
+ */
+
+import { registry } from "@web/core/registry";
+
+// Notifications arrive in bursts (stage change with payment): refresh once
+const REFRESH_DELAY = 500;
+
+function liveRegions() {
+    return document.querySelectorAll("[data-mm-live][id]");
+}
+
+function matches(keys) {
+    return [...liveRegions()].some((region) =>
+        region.dataset.mmLive.split(/\s+/).some((key) => keys.has(key))
+    );
+}
+
+async function refresh() {
+    const response = await fetch(window.location.href, { credentials: "same-origin" });
+    if (response.redirected) {
+        // The page moved on (e.g. to the next step): follow it
+        window.location.assign(response.url);
+        return;
+    }
+    if (!response.ok) {
+        return;
+    }
+    const fresh = new DOMParser().parseFromString(await response.text(), "text/html");
+    const regions = [...liveRegions()];
+    if (regions.every((region) => fresh.getElementById(region.id))) {
+        for (const region of regions) {
+            region.replaceWith(document.importNode(fresh.getElementById(region.id), true));
+        }
+    } else {
+        // The page now renders another template: swap the whole content
+        const wrap = document.getElementById("wrap");
+        const freshWrap = fresh.getElementById("wrap");
+        if (!wrap || !freshWrap) {
+            window.location.reload();
+            return;
+        }
+        wrap.replaceWith(document.importNode(freshWrap, true));
+    }
+    document.dispatchEvent(new CustomEvent("mm:portal-updated"));
+}
+
+export const portalLiveService = {
+    dependencies: ["bus_service"],
+    start(env, { bus_service }) {
+        if (!liveRegions().length) {
+            return;
+        }
+        let timeout = null;
+        bus_service.subscribe("mm_portal/update", (payload) => {
+            if (!matches(new Set(payload.keys || []))) {
+                return;
+            }
+            clearTimeout(timeout);
+            timeout = setTimeout(refresh, REFRESH_DELAY);
+        });
+        bus_service.start();
+    },
+};
+
+registry.category("services").add("mm_portal_live", portalLiveService);
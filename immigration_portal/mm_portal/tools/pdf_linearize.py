@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+PDF linearization ("fast web view").
+
+A linearized PDF starts with the first page and a hint table, so a
+browser viewer fed by HTTP range requests can show page one before the
+rest of the file arrives. Uses pikepdf when installed, else the ``qpdf``
+binary; without either the document is returned unchanged.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+_logger = logging.getLogger(__name__)
+
+QPDF_TIMEOUT = 60
+
+
+def is_linearized(data):
+    """Cheap check for the linearization dictionary at the start of the file."""
+    return b'/Linearized' in data[:1024]
+
+
+def _linearize_pikepdf(data):
+    import pikepdf
+
+    output = BytesIO()
+    with pikepdf.open(BytesIO(data)) as pdf:
+        pdf.save(output, linearize=True)
+    return output.getvalue()
+
+
+def _linearize_qpdf(data, qpdf):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, 'in.pdf')
+        target = os.path.join(tmpdir, 'out.pdf')
+        with open(source, 'wb') as f:
+            f.write(data)
+        # Exit code 3 means success with warnings
+        result = subprocess.run(
+            [qpdf, '--linearize', source, target],
+            capture_output=True,
+            timeout=QPDF_TIMEOUT,
+        )
+        if result.returncode not in (0, 3):
+            raise RuntimeError(result.stderr.decode(errors='replace').strip())
+        with open(target, 'rb') as f:
+            return f.read()
+
+
+def linearize_pdf(data):
+    """Return ``data`` linearized, or unchanged if it cannot be."""
+    if not data or not data.startswith(b'%PDF') or is_linearized(data):
+        return data
+    try:
+        return _linearize_pikepdf(data)
+    except ImportError:
+        pass
+    except Exception:
+        _logger.warning("pikepdf could not linearize the PDF", exc_info=True)
+        return data
+
+    qpdf = shutil.which('qpdf')
+    if not qpdf:
+        return data
+    try:
+        return _linearize_qpdf(data, qpdf)
+    except Exception:
+        _logger.warning("qpdf could not linearize the PDF", exc_info=True)
+        return data
@@ -17,6 +17,7 @@ This module provides the questionnaire system for client data collection:
 * Direct population of client profile fields
 * Education and work experience repeater sections
 * Language proficiency tracking
+* Settlement funds check against versioned IRCC minimums by family size
 * Conditional section display based on client data
 
 Part of Phase 2 of the Immigration Portal system.
@@ -40,6 +41,7 @@ Developed for The Migration Monitor.
         'views/work_experience_views.xml',
         'views/language_proficiency_views.xml',
         'views/client_profile_views.xml',
+        'views/settlement_funds_views.xml',
         'views/immigration_case_views.xml',
         'views/menu_views.xml',
         # Reports
@@ -50,6 +52,8 @@ Developed for The Migration Monitor.
         'views/portal_questionnaire_status.xml',
         # Data
         'data/questionnaire_data.xml',
+        'data/settlement_funds_data.xml',
+        'data/ir_cron_data.xml',
     ],
     'assets': {
         'web.assets_frontend': [
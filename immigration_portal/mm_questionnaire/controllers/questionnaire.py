@@ -4,6 +4,8 @@ import json
 from odoo import http, fields, _
 from odoo.http import request
 from odoo.exceptions import AccessError, MissingError, ValidationError
+from odoo.tools import lazy
+from odoo.addons.mm_portal.controllers.idempotency import idempotent
 
 
 class QuestionnairePortal(http.Controller):
@@ -156,39 +158,84 @@ class QuestionnairePortal(http.Controller):
             return request.redirect('/my/immigration')
         case = self._check_case_access(int(case_id))
 
-        # Get response and profile
+        if section not in self._get_section_config(questionnaire_type):
+            return request.redirect(f'/my/immigration/questionnaire/{qtype}?case_id={case.id}')
+
         response = self._get_or_create_response(case, questionnaire_type)
-        profile = self._get_profile(case)
+        self._visit_section(response, section)
+
+        values = self._prepare_section_values(case, response, qtype, section)
+        return request.render(self._get_section_template(qtype, section), values)
+
+    @http.route(
+        '/my/immigration/questionnaire/<string:qtype>/section/<int:section>/fragment',
+        type='http', auth='user', website=True, methods=['GET']
+    )
+    def questionnaire_section_fragment(self, qtype, section, case_id=None, prefetch=None, **kw):
+        """Section body and progress as JSON, for client-side navigation.
+
+        Only the section is rendered, without the portal layout. A
+        prefetch (``prefetch=1``) writes nothing: the section becomes the
+        current one when the client shows it.
+        """
+        if qtype not in ('pre', 'detailed') or not case_id:
+            return request.make_json_response({'error': 'Invalid questionnaire'}, status=404)
+
+        questionnaire_type = 'pre_consultation' if qtype == 'pre' else 'detailed_assessment'
+        case = self._check_case_access(int(case_id))
+        section_config = self._get_section_config(questionnaire_type)
+        if section not in section_config:
+            return request.make_json_response({'error': 'Invalid section'}, status=404)
+
+        response = self._get_or_create_response(case, questionnaire_type)
+        if not prefetch:
+            self._visit_section(response, section)
 
+        values = self._prepare_section_values(case, response, qtype, section)
+        html = request.env['ir.ui.view']._render_template(
+            self._get_section_template(qtype, section), dict(values, fragment=True))
+        return request.make_json_response({
+            'section': section,
+            'section_name': section_config[section]['name'],
+            'total_sections': response.total_sections,
+            'completed_sections': values['completed_sections'],
+            'progress': response.progress_percent,
+            'url': f'/my/immigration/questionnaire/{qtype}/section/{section}?case_id={case.id}',
+            'html': str(html),
+        }, headers=[('Cache-Control', 'no-store')])
+
+    def _visit_section(self, response, section):
+        """Start the questionnaire and record ``section`` as the current one."""
         # Mark as started if not already
         if response.state == 'not_started':
             response.action_start()
 
-        # Update current section
+        # Update current section, only when it moves
         if response.current_section != section:
             response.sudo().write({'current_section': section})
 
-        # Get section config
-        section_config = self._get_section_config(questionnaire_type)
-        if section not in section_config:
-            return request.redirect(f'/my/immigration/questionnaire/{qtype}?case_id={case.id}')
+    def _get_section_template(self, qtype, section):
+        """Template of a section, by questionnaire type and section number."""
+        return f'mm_questionnaire.questionnaire_{qtype}_section_{section}'
 
+    def _prepare_section_values(self, case, response, qtype, section):
+        """Values of the section templates, for the page and the fragment."""
+        profile = self._get_profile(case)
+        section_config = self._get_section_config(response.questionnaire_type)
         current_section_info = section_config[section]
-        settings = self._get_portal_settings()
 
-        # Get countries for dropdowns
-        countries = request.env['res.country'].sudo().search([], order='name')
-        canada_provinces = request.env['res.country.state'].sudo().search([
+        # Countries for dropdowns, only searched by the sections showing them
+        countries = lazy(lambda: request.env['res.country'].sudo().search([], order='name'))
+        canada_provinces = lazy(lambda: request.env['res.country.state'].sudo().search([
             ('country_id.code', '=', 'CA')
-        ], order='name')
+        ], order='name'))
 
-        # Build values for template
-        values = {
+        return {
             'page_name': 'questionnaire',
             'case': case,
             'profile': profile,
             'response': response,
-            'questionnaire_type': questionnaire_type,
+            'questionnaire_type': response.questionnaire_type,
             'qtype': qtype,
             'section': section,
             'section_name': current_section_info['name'],
@@ -196,7 +243,7 @@ class QuestionnairePortal(http.Controller):
             'total_sections': response.total_sections,
             'section_config': section_config,
             'completed_sections': response.get_completed_sections(),
-            'settings': settings,
+            'settings': self._get_portal_settings(),
             'countries': countries,
             'canada_provinces': canada_provinces,
             # For conditional sections
@@ -204,11 +251,6 @@ class QuestionnairePortal(http.Controller):
             'show_children_section': profile.has_children,
         }
 
-        # Determine template based on questionnaire type and section
-        template = f'mm_questionnaire.questionnaire_{qtype}_section_{section}'
-
-        return request.render(template, values)
-
     @http.route(
         '/my/immigration/questionnaire/<string:qtype>/review',
         type='http', auth='user', website=True
@@ -250,7 +292,8 @@ class QuestionnairePortal(http.Controller):
 
     @http.route(
         '/my/immigration/questionnaire/save',
-        type='jsonrpc', auth='user', methods=['POST']
+        type='jsonrpc', auth='user', methods=['POST'],
+        mm_rate_limit='autosave',
     )
     def save_field(self, case_id, field_name, field_value, model='profile', **kw):
         """AJAX endpoint to save a single field value."""
@@ -334,6 +377,7 @@ class QuestionnairePortal(http.Controller):
         '/my/immigration/questionnaire/submit',
         type='jsonrpc', auth='user', methods=['POST']
     )
+    @idempotent
     def submit_questionnaire(self, case_id, qtype, **kw):
         """AJAX endpoint to submit the complete questionnaire."""
         case = self._check_case_access(int(case_id))
@@ -377,6 +421,7 @@ class QuestionnairePortal(http.Controller):
         '/my/immigration/questionnaire/add-education',
         type='jsonrpc', auth='user', methods=['POST']
     )
+    @idempotent
     def add_education(self, case_id, **kw):
         """AJAX endpoint to add a new education record."""
         case = self._check_case_access(int(case_id))
@@ -461,6 +506,7 @@ class QuestionnairePortal(http.Controller):
         '/my/immigration/questionnaire/add-experience',
         type='jsonrpc', auth='user', methods=['POST']
     )
+    @idempotent
     def add_experience(self, case_id, **kw):
         """AJAX endpoint to add a new work experience record."""
         case = self._check_case_access(int(case_id))
@@ -545,6 +591,7 @@ class QuestionnairePortal(http.Controller):
         '/my/immigration/questionnaire/add-child',
         type='jsonrpc', auth='user', methods=['POST']
     )
+    @idempotent
     def add_child(self, case_id, **kw):
         """AJAX endpoint to add a new dependent child."""
         case = self._check_case_access(int(case_id))
@@ -627,6 +674,7 @@ class QuestionnairePortal(http.Controller):
         '/my/immigration/questionnaire/add-language',
         type='jsonrpc', auth='user', methods=['POST']
     )
+    @idempotent
     def add_language(self, case_id, **kw):
         """AJAX endpoint to add a new language proficiency record."""
         case = self._check_case_access(int(case_id))
@@ -4,6 +4,7 @@ from . import questionnaire_response
 from . import education_record
 from . import work_experience
 from . import language_proficiency
+from . import settlement_funds
 from . import client_profile
 from . import immigration_case
 from . import immigration_case_profile_copy
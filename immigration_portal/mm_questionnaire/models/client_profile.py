@@ -2,6 +2,26 @@
 
 from odoo import models, fields, api
 
+# Fields read by the client profile report template
+REPORT_FIELDS = (
+    'age', 'can_prove_funds', 'canada_study_duration_months', 'canada_work_duration_months',
+    'children_ids', 'citizenship_country_id', 'criminal_history', 'criminal_history_details',
+    'current_legal_status', 'date_of_birth', 'education_ids', 'english_clb_minimum',
+    'experience_ids', 'family_in_canada_relationship', 'family_member_province_id',
+    'french_clb_minimum', 'funds_liquid', 'funds_source', 'gender', 'has_children',
+    'has_family_in_canada', 'immigration_goal', 'language_ids', 'legal_first_name',
+    'legal_last_name', 'legal_middle_name', 'marital_status', 'medical_condition_details',
+    'medical_conditions', 'name', 'open_to_rural', 'passport_country_id', 'passport_expiry',
+    'passport_number', 'preferred_provinces', 'previous_visa_application',
+    'previous_visa_result', 'previous_visa_type', 'primary_education_level',
+    'residence_country_id', 'settlement_funds', 'spouse_citizenship_country_id',
+    'spouse_date_of_birth', 'spouse_english_clb', 'spouse_first_name', 'spouse_french_clb',
+    'spouse_has_eca', 'spouse_highest_education', 'spouse_is_accompanying', 'spouse_last_name',
+    'spouse_work_experience_years', 'studied_in_canada', 'target_year',
+    'total_canadian_experience_months', 'total_skilled_experience_years', 'visa_refusal',
+    'visa_refusal_details', 'worked_in_canada',
+)
+
 
 class ClientProfileQuestionnaire(models.Model):
     """Extends mm.client.profile with questionnaire-related fields."""
@@ -351,6 +371,56 @@ class ClientProfileQuestionnaire(models.Model):
         store=True,
     )
 
+    # =====================
+    # Settlement Funds Assessment
+    # =====================
+    family_size = fields.Integer(
+        string='Family Size',
+        compute='_compute_family_size',
+        store=True,
+        help='Principal applicant, spouse/partner and dependent children, '
+             'including those not accompanying (IRCC counting rule)',
+    )
+    accompanying_family_size = fields.Integer(
+        string='Accompanying Family Size',
+        compute='_compute_family_size',
+        store=True,
+    )
+    cad_currency_id = fields.Many2one(
+        comodel_name='res.currency',
+        string='CAD',
+        compute='_compute_cad_currency',
+    )
+    settlement_funds_table_id = fields.Many2one(
+        comodel_name='mm.settlement.funds.table',
+        string='Funds Table',
+        compute='_compute_settlement_funds_status',
+        store=True,
+    )
+    settlement_funds_cad = fields.Monetary(
+        string='Settlement Funds in CAD',
+        currency_field='cad_currency_id',
+        compute='_compute_settlement_funds_status',
+        store=True,
+    )
+    settlement_funds_required = fields.Monetary(
+        string='Required Settlement Funds',
+        currency_field='cad_currency_id',
+        compute='_compute_settlement_funds_status',
+        store=True,
+    )
+    settlement_funds_shortfall = fields.Monetary(
+        string='Settlement Funds Shortfall',
+        currency_field='cad_currency_id',
+        compute='_compute_settlement_funds_status',
+        store=True,
+    )
+    meets_settlement_funds = fields.Boolean(
+        string='Meets Settlement Funds',
+        compute='_compute_settlement_funds_status',
+        store=True,
+    )
+
     def _get_year_selection(self):
         """Generate year selection from current year to +5 years."""
         import datetime
@@ -419,6 +489,69 @@ class ClientProfileQuestionnaire(models.Model):
             profile.english_clb_minimum = max(english_tests.mapped('clb_minimum'), default=0)
             profile.french_clb_minimum = max(french_tests.mapped('clb_minimum'), default=0)
 
+    @api.depends('marital_status', 'children_ids', 'children_ids.is_accompanying',
+                 'spouse_is_accompanying')
+    def _compute_family_size(self):
+        for profile in self:
+            has_spouse = profile.marital_status in ('married', 'common_law')
+            accompanying_children = profile.children_ids.filtered('is_accompanying')
+            profile.family_size = 1 + int(has_spouse) + len(profile.children_ids)
+            profile.accompanying_family_size = (
+                1 + int(has_spouse and profile.spouse_is_accompanying) + len(accompanying_children)
+            )
+
+    def _compute_cad_currency(self):
+        cad = self.env.ref('base.CAD', raise_if_not_found=False)
+        for profile in self:
+            profile.cad_currency_id = cad
+
+    @api.model
+    def _settlement_funds_fields(self):
+        """Stored fields filled by _compute_settlement_funds_status."""
+        return [
+            'settlement_funds_table_id',
+            'settlement_funds_cad',
+            'settlement_funds_required',
+            'settlement_funds_shortfall',
+            'meets_settlement_funds',
+        ]
+
+    @api.depends('settlement_funds', 'currency_id', 'family_size')
+    def _compute_settlement_funds_status(self):
+        FundsTable = self.env['mm.settlement.funds.table'].sudo()
+        table = FundsTable._get_current_table()
+        cad = self.env.ref('base.CAD', raise_if_not_found=False)
+        today = fields.Date.context_today(self)
+        for profile in self:
+            funds = profile.settlement_funds or 0.0
+            currency = profile.currency_id or cad
+            if funds and currency and cad and currency != cad:
+                funds = cad.round(funds * FundsTable._get_conversion_rate(currency.id, cad.id, today))
+            required = 0.0
+            if table:
+                required = table._get_required_amount(profile.family_size)
+                if cad and table.currency_id != cad:
+                    required = cad.round(
+                        required * FundsTable._get_conversion_rate(table.currency_id.id, cad.id, today))
+            profile.settlement_funds_table_id = table
+            profile.settlement_funds_cad = funds
+            profile.settlement_funds_required = required
+            profile.settlement_funds_shortfall = max(required - funds, 0.0)
+            profile.meets_settlement_funds = bool(table) and funds >= required
+
+    def _get_report_cache_dependencies(self, report):
+        """Records and fields the client profile report template reads."""
+        return [
+            # write_date is printed as the profile's last update
+            (self, REPORT_FIELDS + ('write_date',)),
+            # write_date covers the logo and layout of the external layout
+            (self.env.company, None),
+            (self.education_ids, None),
+            (self.experience_ids, None),
+            (self.language_ids, None),
+            (self.children_ids, ['age', 'country_id', 'date_of_birth', 'is_accompanying', 'name']),
+        ]
+
     def action_export_pdf(self):
         """Export client profile as PDF report."""
         self.ensure_one()
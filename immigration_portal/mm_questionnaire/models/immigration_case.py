@@ -135,7 +135,7 @@ class ImmigrationCaseQuestionnaire(models.Model):
                 self.write({'immigration_goal': self.profile_id.immigration_goal})
             
             # Log the completion
-            self.message_post(
+            self._outbox_message_post(
                 body=_("Pre-consultation questionnaire completed. Ready for consultant review."),
                 message_type='notification',
             )
@@ -143,7 +143,7 @@ class ImmigrationCaseQuestionnaire(models.Model):
         elif questionnaire_type == 'detailed_assessment':
             # Q2 complete -> Stay at Assessment stage
             # Consultant will manually advance to Roadmap Delivered when roadmap is ready
-            self.message_post(
+            self._outbox_message_post(
                 body=_("Detailed assessment questionnaire completed. "
                        "Your consultant will review your responses and prepare your personalized immigration roadmap. "
                        "This typically takes 3-5 business days."),
@@ -152,7 +152,7 @@ class ImmigrationCaseQuestionnaire(models.Model):
             
             # Create activity for consultant to prepare roadmap
             if self.consultant_id:
-                self.activity_schedule(
+                self._outbox_activity_schedule(
                     'mail.mail_activity_data_todo',
                     user_id=self.consultant_id.id,
                     summary=_('Prepare Immigration Roadmap'),
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+
+class SettlementFundsTable(models.Model):
+    """Published minimum settlement funds, versioned by effective date."""
+    _name = 'mm.settlement.funds.table'
+    _description = 'Settlement Funds Table'
+    _order = 'effective_date desc'
+
+    name = fields.Char(
+        string='Name',
+        required=True,
+    )
+    active = fields.Boolean(
+        string='Active',
+        default=True,
+    )
+    effective_date = fields.Date(
+        string='Effective Date',
+        required=True,
+        help='The table applies from this date until a newer table takes effect',
+    )
+    currency_id = fields.Many2one(
+        comodel_name='res.currency',
+        string='Currency',
+        required=True,
+        default=lambda self: self.env.ref('base.CAD', raise_if_not_found=False),
+    )
+    threshold_ids = fields.One2many(
+        comodel_name='mm.settlement.funds.threshold',
+        inverse_name='table_id',
+        string='Thresholds',
+        copy=True,
+    )
+    additional_member_amount = fields.Monetary(
+        string='Each Additional Member',
+        currency_field='currency_id',
+        help='Added for every family member beyond the largest listed family size',
+    )
+    source_url = fields.Char(
+        string='Source',
+    )
+
+    @api.constrains('effective_date', 'active')
+    def _check_unique_effective_date(self):
+        """Only one active table per effective date."""
+        for record in self.filtered('active'):
+            existing = self.search([
+                ('effective_date', '=', record.effective_date),
+                ('id', '!=', record.id),
+            ], limit=1)
+            if existing:
+                raise ValidationError(_(
+                    "A settlement funds table already takes effect on %s."
+                ) % record.effective_date)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._recompute_profiles()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._recompute_profiles()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._recompute_profiles()
+        return res
+
+    @api.model
+    def _get_current_table(self, date=None):
+        """Table in force on ``date`` (today by default)."""
+        return self.search([
+            ('effective_date', '<=', date or fields.Date.context_today(self)),
+        ], order='effective_date desc', limit=1)
+
+    def _get_required_amount(self, family_size):
+        """Minimum funds for a family size, in the table currency."""
+        self.ensure_one()
+        thresholds = self.threshold_ids.sorted('family_size')
+        if not thresholds or family_size < 1:
+            return 0.0
+        for threshold in thresholds:
+            if threshold.family_size == family_size:
+                return threshold.amount
+        largest = thresholds[-1]
+        if family_size < largest.family_size:
+            # Gap in the table: use the next listed size up
+            return thresholds.filtered(lambda t: t.family_size > family_size)[0].amount
+        extra_members = family_size - largest.family_size
+        return largest.amount + extra_members * self.additional_member_amount
+
+    @api.model
+    @tools.ormcache('from_currency_id', 'to_currency_id', 'date')
+    def _get_conversion_rate(self, from_currency_id, to_currency_id, date):
+        """Conversion rate between two currencies, cached per day."""
+        Currency = self.env['res.currency']
+        return Currency._get_conversion_rate(
+            Currency.browse(from_currency_id),
+            Currency.browse(to_currency_id),
+            self.env.company,
+            date,
+        )
+
+    @api.model
+    def _recompute_profiles(self, domain=None):
+        """Recompute stored funds requirements after a table change."""
+        Profile = self.env['mm.client.profile']
+        profiles = Profile.with_context(active_test=False).search(domain or [])
+        for field_name in Profile._settlement_funds_fields():
+            self.env.add_to_compute(Profile._fields[field_name], profiles)
+        return profiles
+
+    @api.model
+    def _cron_apply_current_table(self):
+        """Move profiles to the table in force today.
+
+        A table dated in the future changes nothing when it is saved; the
+        stored requirements only change once its date comes, which no
+        field dependency sees. Run daily, this recomputes the profiles
+        still on another table.
+        """
+        table = self._get_current_table()
+        profiles = self._recompute_profiles([('settlement_funds_table_id', '!=', table.id or False)])
+        if profiles:
+            _logger.info("Applied settlement funds table %s to %s profiles", table.name, len(profiles))
+
+
+class SettlementFundsThreshold(models.Model):
+    """Minimum funds for one family size within a funds table."""
+    _name = 'mm.settlement.funds.threshold'
+    _description = 'Settlement Funds Threshold'
+    _order = 'table_id, family_size'
+
+    table_id = fields.Many2one(
+        comodel_name='mm.settlement.funds.table',
+        string='Table',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    currency_id = fields.Many2one(
+        related='table_id.currency_id',
+        string='Currency',
+    )
+    family_size = fields.Integer(
+        string='Family Size',
+        required=True,
+    )
+    amount = fields.Monetary(
+        string='Minimum Funds',
+        currency_field='currency_id',
+        required=True,
+    )
+
+    @api.constrains('table_id', 'family_size')
+    def _check_unique_family_size(self):
+        for record in self:
+            if record.family_size < 1:
+                raise ValidationError(_("Family size must be at least 1."))
+            duplicate = record.table_id.threshold_ids.filtered(
+                lambda t: t.family_size == record.family_size and t != record
+            )
+            if duplicate:
+                raise ValidationError(_(
+                    "Family size %s is listed twice in this table."
+                ) % record.family_size)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['mm.settlement.funds.table']._recompute_profiles()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env['mm.settlement.funds.table']._recompute_profiles()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['mm.settlement.funds.table']._recompute_profiles()
+        return res
@@ -1,6 +1,7 @@
 /**
  * Immigration Portal - Questionnaire Module JavaScript
- * Handles auto-save, section navigation, and repeater functionality
+ * Handles auto-save, client-side section navigation with prefetch, and
+ * repeater functionality
  */
 
 (function() {
@@ -19,6 +20,8 @@
     const CONFIG = {
         saveDebounceMs: 800,
         saveIndicatorDurationMs: 2000,
+        networkRetries: 2,
+        retryDelayMs: 1000,
     };
 
     // State
@@ -66,20 +69,50 @@
     // JSON-RPC Helper
     // =====================
 
-    async function jsonRpc(url, params) {
-        const response = await fetch(url, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                jsonrpc: '2.0',
-                method: 'call',
-                params: params,
-                id: Math.floor(Math.random() * 1000000),
-            }),
+    function newIdempotencyKey() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID();
+        }
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+    }
+
+    async function jsonRpc(url, params, options = {}) {
+        const headers = {
+            'Content-Type': 'application/json',
+        };
+        // Idempotent calls are retried on network errors with the same key:
+        // the server runs them once and replays the response to the retries
+        const attempts = options.idempotent ? CONFIG.networkRetries + 1 : 1;
+        if (options.idempotent) {
+            headers['Idempotency-Key'] = newIdempotencyKey();
+        }
+        const body = JSON.stringify({
+            jsonrpc: '2.0',
+            method: 'call',
+            params: params,
+            id: Math.floor(Math.random() * 1000000),
         });
 
+        let response = null;
+        for (let attempt = 1; ; attempt++) {
+            try {
+                response = await fetch(url, {
+                    method: 'POST',
+                    headers: headers,
+                    body: body,
+                });
+                // Gateway errors: the request may not have reached Odoo
+                if (response.status < 502 || attempt >= attempts) {
+                    break;
+                }
+            } catch (error) {
+                if (attempt >= attempts) {
+                    throw error;
+                }
+            }
+            await new Promise(resolve => setTimeout(resolve, CONFIG.retryDelayMs * attempt));
+        }
+
         const data = await response.json();
         if (data.error) {
             throw new Error(data.error.message || 'Unknown error');
@@ -113,6 +146,8 @@
 
             if (result.success) {
                 showSavedIndicator();
+                // Answers can change what the next sections show
+                refreshPrefetch();
             } else {
                 showError(result.error || 'Failed to save');
             }
@@ -169,10 +204,10 @@
                 section: section,
             });
 
-            return result.success;
+            return result.success ? result : null;
         } catch (error) {
             showError(error.message);
-            return false;
+            return null;
         }
     }
 
@@ -183,14 +218,143 @@
         const nextUrl = button.dataset.nextUrl;
 
         // Complete current section then navigate
-        completeSection(section).then(success => {
-            if (success) {
-                window.location.href = nextUrl;
+        button.disabled = true;
+        completeSection(section).then(result => {
+            // Navigate anyway - section completion is not blocking
+            navigateTo(nextUrl, result ? {section: section, progress: result.progress} : null);
+        });
+    }
+
+    // =====================
+    // Client-Side Navigation
+    // =====================
+
+    // Sections are swapped in from their fragment route instead of loading
+    // the whole page again, and the next section is prefetched while the
+    // current one is filled in. Section URLs stay real pages for reloads,
+    // bookmarks and the back button.
+    const container = document.querySelector('.mm-questionnaire-container[data-fragment-url]');
+    const fragmentCache = new Map();
+    const SECTION_PATH = /^\/my\/immigration\/questionnaire\/\w+\/section\/(\d+)$/;
+    let prefetchTimeout = null;
+
+    function sectionFromUrl(url) {
+        const parsed = new URL(url, window.location.origin);
+        const match = SECTION_PATH.exec(parsed.pathname);
+        return match && parsed.origin === window.location.origin ? parseInt(match[1]) : null;
+    }
+
+    async function fetchFragment(section, prefetch) {
+        let url = container.dataset.fragmentUrl.replace('{section}', section);
+        if (prefetch) {
+            url += '&prefetch=1';
+        }
+        const response = await fetch(url, {credentials: 'same-origin'});
+        if (!response.ok) {
+            throw new Error('Section unavailable');
+        }
+        return response.json();
+    }
+
+    function prefetchSection(section) {
+        if (section > parseInt(container.dataset.totalSections) || fragmentCache.has(section)) {
+            return;
+        }
+        fragmentCache.set(section, fetchFragment(section, true).catch(() => {
+            fragmentCache.delete(section);
+            return null;
+        }));
+    }
+
+    function refreshPrefetch() {
+        if (!container) {
+            return;
+        }
+        fragmentCache.clear();
+        clearTimeout(prefetchTimeout);
+        prefetchTimeout = setTimeout(() => {
+            prefetchSection(parseInt(container.dataset.section) + 1);
+        }, CONFIG.saveDebounceMs);
+    }
+
+    function updateProgress(data) {
+        const completed = new Set(data.completed_sections);
+        const bar = container.querySelector('.mm-progress-bar-wrapper .progress-bar');
+        if (bar) {
+            bar.style.width = data.progress + '%';
+            bar.setAttribute('aria-valuenow', data.progress);
+        }
+        container.querySelectorAll('.mm-step[data-section]').forEach(step => {
+            const section = parseInt(step.dataset.section);
+            step.classList.toggle('mm-step--active', section === data.section);
+            step.classList.toggle('mm-step--complete', completed.has(section));
+            const number = step.querySelector('.mm-step__number');
+            if (completed.has(section)) {
+                number.innerHTML = '<i class="fa fa-check" aria-hidden="true"></i>';
             } else {
-                // Navigate anyway - section completion is not blocking
-                window.location.href = nextUrl;
+                number.textContent = section;
+            }
+        });
+    }
+
+    async function navigateTo(url, completion = null, push = true) {
+        const section = container ? sectionFromUrl(url) : null;
+        if (!section) {
+            window.location.href = url;
+            return;
+        }
+
+        // A prefetched section was rendered without recording a visit:
+        // only use it when completing the previous section recorded it
+        const cached = completion && completion.section === section - 1 ? fragmentCache.get(section) : null;
+        fragmentCache.clear();
+        let data = null;
+        try {
+            data = (cached && await cached) || await fetchFragment(section, false);
+        } catch (error) {
+            data = null;
+        }
+        if (!data) {
+            window.location.href = url;
+            return;
+        }
+        if (completion) {
+            data.progress = completion.progress;
+            data.completed_sections = [...new Set([...data.completed_sections, completion.section])];
+        }
+
+        container.querySelector('.mm-questionnaire-content').innerHTML = data.html;
+        container.dataset.section = data.section;
+        updateProgress(data);
+        if (push) {
+            window.history.pushState({section: data.section}, '', data.url);
+        }
+        window.scrollTo({top: 0});
+
+        setupEventListeners();
+        prefetchSection(data.section + 1);
+    }
+
+    function setupNavigation() {
+        if (!container) {
+            return;
+        }
+        window.history.replaceState({section: parseInt(container.dataset.section)}, '', window.location.href);
+        window.addEventListener('popstate', () => {
+            navigateTo(window.location.href, null, false);
+        });
+
+        // Previous links and other links between sections
+        container.addEventListener('click', event => {
+            const link = event.target.closest('a[href]');
+            if (!link || event.ctrlKey || event.metaKey || event.shiftKey || !sectionFromUrl(link.href)) {
+                return;
             }
+            event.preventDefault();
+            navigateTo(link.href);
         });
+
+        setTimeout(() => prefetchSection(parseInt(container.dataset.section) + 1), CONFIG.saveDebounceMs);
     }
 
     // =====================
@@ -210,7 +374,7 @@
             const result = await jsonRpc('/my/immigration/questionnaire/submit', {
                 case_id: caseId,
                 qtype: qtype,
-            });
+            }, {idempotent: true});
 
             if (result.success) {
                 window.location.href = result.redirect_url;
@@ -237,7 +401,7 @@
             const result = await jsonRpc('/my/immigration/questionnaire/add-child', {
                 case_id: caseId,
                 name: 'New Child',
-            });
+            }, {idempotent: true});
 
             if (result.success) {
                 // Reload page to show new child
@@ -264,6 +428,8 @@
 
             if (result.success) {
                 showSavedIndicator();
+                // Answers can change what the next sections show
+                refreshPrefetch();
             } else {
                 showError(result.error);
             }
@@ -310,7 +476,7 @@
                 institution_name: '',
                 credential_type: 'bachelors',
                 field_of_study: '',
-            });
+            }, {idempotent: true});
 
             if (result.success) {
                 window.location.reload();
@@ -336,6 +502,8 @@
 
             if (result.success) {
                 showSavedIndicator();
+                // Answers can change what the next sections show
+                refreshPrefetch();
             } else {
                 showError(result.error);
             }
@@ -380,7 +548,7 @@
                 case_id: caseId,
                 employer_name: '',
                 job_title: '',
-            });
+            }, {idempotent: true});
 
             if (result.success) {
                 window.location.reload();
@@ -406,6 +574,8 @@
 
             if (result.success) {
                 showSavedIndicator();
+                // Answers can change what the next sections show
+                refreshPrefetch();
             } else {
                 showError(result.error);
             }
@@ -450,7 +620,7 @@
                 case_id: caseId,
                 language: 'english',
                 test_type: 'ielts_general',
-            });
+            }, {idempotent: true});
 
             if (result.success) {
                 window.location.reload();
@@ -675,6 +845,7 @@
 
     // Initialize
     setupEventListeners();
+    setupNavigation();
     
     } // end initQuestionnaire
 })();
@@ -21,6 +21,9 @@ Key Features:
 - Hybrid data entry: structured tables + rich text narratives
 - Professional PDF output matching branded template
 - Province-by-province PNP fit assessment
+- Data-driven PNP stream eligibility matching
+- Vectorized CRS what-if scenario explorer
+- Parallel bulk generation of service agreements and roadmap PDFs
 - Timeline milestone planning
 - Client signature acknowledgment
 - Document versioning
@@ -40,13 +43,19 @@ Key Features:
         'security/security_rules.xml',
         # Data files
         'data/mail_template_data.xml',
+        'data/province_data.xml',
+        'data/ir_cron_data.xml',
         # Views
         'views/roadmap_document_views.xml',
         'views/pnp_opportunity_views.xml',
+        'views/pnp_stream_views.xml',
         'views/roadmap_milestone_views.xml',
         'views/immigration_case_views.xml',
+        'views/document_batch_views.xml',
         'views/portal_roadmap_templates.xml',
         'views/menu_views.xml',
+        # Wizards
+        'wizard/document_batch_wizard_views.xml',
         # Report
         'report/report_roadmap.xml',
     ],
@@ -55,6 +64,9 @@ Key Features:
             'mm_roadmap/static/src/scss/roadmap.scss',
         ],
     },
+    'external_dependencies': {
+        'python': ['numpy'],
+    },
     'installable': True,
     'application': False,
     'auto_install': False,
@@ -3,7 +3,7 @@
 from odoo import http, _
 from odoo.http import request
 from odoo.exceptions import AccessError
-import base64
+from odoo.addons.mm_portal.controllers.download import has_binary, stream_binary_field
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -82,18 +82,12 @@ class PortalRoadmap(http.Controller):
         if not self._check_roadmap_access(roadmap, case):
             raise AccessError(_("You don't have access to this roadmap."))
 
-        if not roadmap.pdf_document:
+        if not has_binary(roadmap, 'pdf_document'):
             # Generate if not exists
             roadmap.action_generate_pdf()
 
-        if roadmap.pdf_document:
-            pdf_content = base64.b64decode(roadmap.pdf_document)
-            headers = [
-                ('Content-Type', 'application/pdf'),
-                ('Content-Disposition', f'attachment; filename="{roadmap.pdf_filename}"'),
-                ('Content-Length', len(pdf_content)),
-            ]
-            return request.make_response(pdf_content, headers)
+        if has_binary(roadmap, 'pdf_document'):
+            return stream_binary_field(roadmap, 'pdf_document', filename=roadmap.pdf_filename)
 
         return request.redirect(f'/my/immigration/roadmap/{roadmap_id}')
 
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
+from . import crs_scenario
 from . import roadmap_document
+from . import pnp_stream
 from . import pnp_opportunity
 from . import roadmap_milestone
 from . import immigration_case
+from . import document_batch
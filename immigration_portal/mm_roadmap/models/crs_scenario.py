@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+
+# =====================
+# CRS Point Tables (index = feature value)
+# =====================
+# Education index: 0 none, 1 secondary, 2 one_year, 3 two_year,
+# 4 bachelors, 5 two_or_more, 6 masters, 7 phd
+EDUCATION_INDEX = {
+    'secondary': 1,
+    'one_year': 2,
+    'two_year': 3,
+    'bachelors': 4,
+    'two_or_more': 5,
+    'masters': 6,
+    'phd': 7,
+}
+EDUCATION_LABELS = {
+    0: 'None',
+    1: 'Secondary',
+    2: 'One-year Program',
+    3: 'Two-year Program',
+    4: "Bachelor's Degree",
+    5: 'Two or More Credentials',
+    6: "Master's Degree",
+    7: 'PhD',
+}
+
+# Age 0..45 (45 and over scores nothing)
+_AGE_WITH_SPOUSE = [0] * 18 + [90, 95] + [100] * 10 + [
+    95, 90, 85, 80, 75, 70, 65, 60, 55, 50, 45, 35, 25, 15, 5, 0]
+_AGE_WITHOUT_SPOUSE = [0] * 18 + [99, 105] + [110] * 10 + [
+    105, 99, 94, 88, 83, 77, 72, 66, 61, 55, 50, 39, 28, 17, 6, 0]
+
+_EDU_WITH_SPOUSE = [0, 28, 84, 91, 112, 119, 126, 140]
+_EDU_WITHOUT_SPOUSE = [0, 30, 90, 98, 120, 128, 135, 150]
+
+# First official language, per ability, CLB 0..12
+_L1_WITH_SPOUSE = [0, 0, 0, 0, 6, 6, 8, 16, 22, 29, 32, 32, 32]
+_L1_WITHOUT_SPOUSE = [0, 0, 0, 0, 6, 6, 9, 17, 23, 31, 34, 34, 34]
+
+# Second official language, per ability, CLB 0..12
+_L2_POINTS = [0, 0, 0, 0, 0, 1, 1, 3, 3, 6, 6, 6, 6]
+
+# Canadian work experience, years 0..5
+_CAN_EXP_WITH_SPOUSE = [0, 35, 46, 56, 63, 70]
+_CAN_EXP_WITHOUT_SPOUSE = [0, 40, 53, 64, 72, 80]
+
+# Spouse factors
+_SPOUSE_EDU = [0, 2, 6, 7, 8, 9, 10, 10]
+_SPOUSE_LANG = [0, 0, 0, 0, 0, 1, 1, 3, 3, 5, 5, 5, 5]
+_SPOUSE_CAN_EXP = [0, 5, 7, 8, 9, 10]
+
+# Skill transferability: rows = education/foreign tier, cols = language/Canadian tier
+_TRANSFER_GRID = [
+    [0, 0, 0],
+    [0, 13, 25],
+    [0, 25, 50],
+]
+
+# Canadian study: 0 none, 1 one/two-year credential, 2 three years or more
+_CAN_STUDY_POINTS = [0, 15, 30]
+
+# =====================
+# Feature Columns
+# =====================
+FEATURES = (
+    'age', 'education',
+    'l1_listening', 'l1_reading', 'l1_writing', 'l1_speaking',
+    'l2_listening', 'l2_reading', 'l2_writing', 'l2_speaking',
+    'canadian_exp', 'foreign_exp',
+    'has_spouse', 'spouse_education',
+    'spouse_listening', 'spouse_reading', 'spouse_writing', 'spouse_speaking',
+    'spouse_canadian_exp',
+    'has_sibling', 'canadian_study', 'first_is_french',
+)
+COL = {name: index for index, name in enumerate(FEATURES)}
+L1 = [COL['l1_listening'], COL['l1_reading'], COL['l1_writing'], COL['l1_speaking']]
+L2 = [COL['l2_listening'], COL['l2_reading'], COL['l2_writing'], COL['l2_speaking']]
+SPOUSE_LANG = [COL['spouse_listening'], COL['spouse_reading'],
+               COL['spouse_writing'], COL['spouse_speaking']]
+ABILITIES = ('Listening', 'Reading', 'Writing', 'Speaking')
+
+# Upper bound of every column, used to clip scenario states
+_FEATURE_MAX = {
+    'age': 45,
+    'education': 7,
+    'canadian_exp': 5,
+    'foreign_exp': 3,
+    'has_spouse': 1,
+    'spouse_education': 7,
+    'spouse_canadian_exp': 5,
+    'has_sibling': 1,
+    'canadian_study': 2,
+    'first_is_french': 1,
+}
+
+
+def _table(values):
+    return np.asarray(values, dtype=np.int32)
+
+
+def score_states(states):
+    """Score a (N, len(FEATURES)) integer array of CRS states in one pass.
+
+    Returns a dict of (N,) arrays: core, spouse, transferability,
+    additional and total.
+    """
+    states = np.asarray(states, dtype=np.int32)
+    spouse = states[:, COL['has_spouse']] == 1
+    age = states[:, COL['age']]
+    edu = states[:, COL['education']]
+    l1 = states[:, L1]
+    l2 = states[:, L2]
+    can_exp = states[:, COL['canadian_exp']]
+    foreign_exp = states[:, COL['foreign_exp']]
+
+    # Core / human capital
+    core = np.where(spouse, _table(_AGE_WITH_SPOUSE)[age], _table(_AGE_WITHOUT_SPOUSE)[age])
+    core += np.where(spouse, _table(_EDU_WITH_SPOUSE)[edu], _table(_EDU_WITHOUT_SPOUSE)[edu])
+    core += np.where(
+        spouse,
+        _table(_L1_WITH_SPOUSE)[l1].sum(axis=1),
+        _table(_L1_WITHOUT_SPOUSE)[l1].sum(axis=1),
+    )
+    core += np.minimum(_table(_L2_POINTS)[l2].sum(axis=1), np.where(spouse, 22, 24))
+    core += np.where(
+        spouse,
+        _table(_CAN_EXP_WITH_SPOUSE)[can_exp],
+        _table(_CAN_EXP_WITHOUT_SPOUSE)[can_exp],
+    )
+
+    # Spouse factors
+    spouse_points = (
+        _table(_SPOUSE_EDU)[states[:, COL['spouse_education']]]
+        + _table(_SPOUSE_LANG)[states[:, SPOUSE_LANG]].sum(axis=1)
+        + _table(_SPOUSE_CAN_EXP)[states[:, COL['spouse_canadian_exp']]]
+    )
+    spouse_points = np.where(spouse, spouse_points, 0)
+
+    # Skill transferability
+    grid = _table(_TRANSFER_GRID)
+    l1_min = l1.min(axis=1)
+    lang_tier = (l1_min >= 7).astype(np.int32) + (l1_min >= 9)
+    edu_tier = (edu >= 2).astype(np.int32) + (edu >= 5)
+    can_tier = np.minimum(can_exp, 2)
+    foreign_tier = (foreign_exp >= 1).astype(np.int32) + (foreign_exp >= 3)
+    education_transfer = np.minimum(grid[edu_tier, lang_tier] + grid[edu_tier, can_tier], 50)
+    foreign_transfer = np.minimum(grid[foreign_tier, lang_tier] + grid[foreign_tier, can_tier], 50)
+    transferability = np.minimum(education_transfer + foreign_transfer, 100)
+
+    # Additional points
+    first_is_french = states[:, COL['first_is_french']] == 1
+    french_min = np.where(first_is_french, l1_min, l2.min(axis=1))
+    english_min = np.where(first_is_french, l2.min(axis=1), l1_min)
+    additional = np.where(french_min >= 7, np.where(english_min >= 5, 50, 25), 0)
+    additional += states[:, COL['has_sibling']] * 15
+    additional += _table(_CAN_STUDY_POINTS)[states[:, COL['canadian_study']]]
+
+    return {
+        'core': core,
+        'spouse': spouse_points,
+        'transferability': transferability,
+        'additional': additional,
+        'total': core + spouse_points + transferability + additional,
+    }
+
+
+def build_steps(baseline):
+    """Return the single-step improvements applicable to a baseline state.
+
+    Each step is ``(label, add, floor)``: the scenario state is
+    ``max(state + add, floor)``. Anniversary steps also age the client a
+    year so that the trade-off is priced in.
+    """
+    width = len(FEATURES)
+    steps = []
+
+    def step(label, add=None, floor=None):
+        add_vec = np.zeros(width, dtype=np.int32)
+        floor_vec = np.zeros(width, dtype=np.int32)
+        for column, value in (add or {}).items():
+            add_vec[COL[column]] = value
+        for column, value in (floor or {}).items():
+            floor_vec[COL[column]] = value
+        steps.append((label, add_vec, floor_vec))
+
+    first_label = _('French') if baseline[COL['first_is_french']] else _('English')
+    second_label = _('English') if baseline[COL['first_is_french']] else _('French')
+    for index, ability in enumerate(ABILITIES):
+        column = FEATURES[L1[index]]
+        if baseline[L1[index]] < 12:
+            step(_('%(lang)s %(ability)s CLB +1', lang=first_label, ability=ability),
+                 add={column: 1})
+    if baseline[L1].min() < 12:
+        step(_('%s retest: all abilities CLB +1', first_label),
+             add={FEATURES[c]: 1 for c in L1})
+    if baseline[COL['education']] < 7:
+        step(_('Education upgrade to %s', EDUCATION_LABELS[baseline[COL['education']] + 1]),
+             add={'education': 1})
+    if baseline[COL['canadian_exp']] < 5:
+        step(_('One more year of Canadian experience'),
+             add={'canadian_exp': 1, 'age': 1})
+    if baseline[COL['foreign_exp']] < 3:
+        step(_('One more year of foreign experience'),
+             add={'foreign_exp': 1, 'age': 1})
+    if baseline[L2].min() < 7:
+        step(_('%s test at CLB 7', second_label),
+             floor={FEATURES[c]: 7 for c in L2})
+    if baseline[L2].min() < 9:
+        step(_('%s test at CLB 9', second_label),
+             floor={FEATURES[c]: 9 for c in L2})
+    if baseline[COL['has_spouse']]:
+        if baseline[SPOUSE_LANG].min() < 12:
+            step(_('Spouse language retest: CLB +1'),
+                 add={FEATURES[c]: 1 for c in SPOUSE_LANG})
+        if baseline[COL['spouse_education']] < 7:
+            step(_('Spouse education upgrade'), add={'spouse_education': 1})
+    return steps
+
+
+def explore(baseline):
+    """Enumerate and score all single- and two-step scenarios.
+
+    Builds the whole scenario grid as one array and scores it with a
+    single call to ``score_states``. Returns ``(baseline_scores, rows)``
+    where rows are dicts sorted by point gain.
+    """
+    baseline = np.asarray(baseline, dtype=np.int32)
+    steps = build_steps(baseline)
+    if not steps:
+        return score_states(baseline[None, :]), []
+
+    labels = [label for label, __, __ in steps]
+    add = np.stack([vec for __, vec, __ in steps])
+    floor = np.stack([vec for __, __, vec in steps])
+    caps = np.full(len(FEATURES), 12, dtype=np.int32)
+    for column, value in _FEATURE_MAX.items():
+        caps[COL[column]] = value
+
+    single = np.minimum(np.maximum(baseline + add, floor), caps)
+
+    # Pairs (i <= j); a floor-only step applied twice is the same scenario
+    first, second = np.triu_indices(len(steps))
+    repeatable = add.any(axis=1)
+    keep = (first != second) | repeatable[first]
+    first, second = first[keep], second[keep]
+    double = np.minimum(np.maximum(single[first] + add[second], floor[second]), caps)
+
+    grid = np.vstack([baseline[None, :], single, double])
+    scores = score_states(grid)
+
+    # Drop scenarios that do not change the state
+    changed = (grid != baseline).any(axis=1)
+    changed[0] = False
+    names = [None] + labels + [
+        _('%s (twice)', labels[i]) if i == j else '%s + %s' % (labels[i], labels[j])
+        for i, j in zip(first.tolist(), second.tolist())
+    ]
+    step_counts = np.concatenate([[0], np.ones(len(steps), dtype=np.int32), np.full(len(first), 2)])
+    # For identical two-step states, keep the first occurrence only
+    __, unique_index = np.unique(grid, axis=0, return_index=True)
+    unique_mask = np.zeros(len(grid), dtype=bool)
+    unique_mask[unique_index] = True
+    candidates = np.flatnonzero(changed & unique_mask)
+
+    gain = scores['total'] - scores['total'][0]
+    order = candidates[np.lexsort((step_counts[candidates], -gain[candidates]))]
+    rows = [{
+        'name': names[index],
+        'step_count': int(step_counts[index]),
+        'crs_score': int(scores['total'][index]),
+        'point_gain': int(gain[index]),
+        'core_points': int(scores['core'][index]),
+        'spouse_points': int(scores['spouse'][index]),
+        'transferability_points': int(scores['transferability'][index]),
+        'additional_points': int(scores['additional'][index]),
+    } for index in order.tolist()]
+    return {key: value[:1] for key, value in scores.items()}, rows
+
+
+class CRSScenario(models.Model):
+    """Ranked CRS what-if scenario for an immigration roadmap."""
+    _name = 'mm.roadmap.crs.scenario'
+    _description = 'CRS What-If Scenario'
+    _order = 'roadmap_id, sequence'
+
+    roadmap_id = fields.Many2one(
+        comodel_name='mm.roadmap.document',
+        string='Roadmap',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    sequence = fields.Integer(
+        string='Rank',
+        default=10,
+    )
+    name = fields.Char(
+        string='Scenario',
+        required=True,
+    )
+    step_count = fields.Integer(
+        string='Steps',
+        help='Number of improvements combined in this scenario',
+    )
+    crs_score = fields.Integer(
+        string='CRS Score',
+    )
+    point_gain = fields.Integer(
+        string='Point Gain',
+    )
+    core_points = fields.Integer(
+        string='Core',
+    )
+    spouse_points = fields.Integer(
+        string='Spouse',
+    )
+    transferability_points = fields.Integer(
+        string='Transferability',
+    )
+    additional_points = fields.Integer(
+        string='Additional',
+    )
+
+    @api.model
+    def _get_profile_baseline(self, profile):
+        """Map a client profile onto the CRS feature vector."""
+        if np is None:
+            raise UserError(_("The CRS scenario explorer requires the numpy Python library."))
+
+        state = np.zeros(len(FEATURES), dtype=np.int32)
+        state[COL['age']] = min(max(profile.age or 0, 0), 45)
+        state[COL['education']] = EDUCATION_INDEX.get(
+            profile.primary_education_level or profile.highest_education, 0)
+
+        def best_test(language):
+            tests = profile.language_ids.filtered(lambda l: l.language == language)
+            return tests.sorted('clb_minimum', reverse=True)[:1]
+
+        first_is_french = profile.first_language == 'french'
+        first = best_test('french' if first_is_french else 'english')
+        second = best_test('english' if first_is_french else 'french')
+        for columns, test in ((L1, first), (L2, second)):
+            if test:
+                scores = (test.clb_listening, test.clb_reading, test.clb_writing, test.clb_speaking)
+                for column, value in zip(columns, scores):
+                    state[column] = min(max(value or 0, 0), 12)
+        state[COL['first_is_french']] = int(first_is_french)
+
+        experience = profile.experience_ids.filtered('qualifies_for_crs')
+        foreign_years = sum(experience.filtered(lambda e: not e.in_canada).mapped('duration_years'))
+        state[COL['canadian_exp']] = min((profile.total_canadian_experience_months or 0) // 12, 5)
+        state[COL['foreign_exp']] = min(int(foreign_years), 3)
+
+        has_spouse = (profile.marital_status in ('married', 'common_law')
+                      and profile.spouse_is_accompanying)
+        if has_spouse:
+            state[COL['has_spouse']] = 1
+            state[COL['spouse_education']] = EDUCATION_INDEX.get(profile.spouse_highest_education, 0)
+            spouse_clb = min(max(profile.spouse_english_clb or 0, profile.spouse_french_clb or 0), 12)
+            state[SPOUSE_LANG] = spouse_clb
+            state[COL['spouse_canadian_exp']] = int(bool(profile.spouse_has_canadian_experience))
+
+        state[COL['has_sibling']] = int(
+            profile.family_in_canada_relationship == 'sibling'
+            and bool(profile.family_member_is_citizen_pr)
+        )
+        study_months = profile.canada_study_duration_months or 0
+        state[COL['canadian_study']] = 2 if study_months >= 36 else (1 if study_months >= 12 else 0)
+        return state
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Upper bound on concurrent renders, whatever the core count
+MAX_RENDER_WORKERS = 8
+# First key of the advisory locks claiming batches ('mmdb')
+BATCH_LOCK_NAMESPACE = 0x6d6d6462
+
+
+def _render_pdf(registry, uid, context, report_id, res_id):
+    """Render one report in its own cursor (runs in a pool thread).
+
+    The wkhtmltopdf subprocess does the CPU work, so each thread keeps
+    one core busy while the ORM stays single-threaded per cursor.
+    """
+    with registry.cursor() as cr:
+        env = api.Environment(cr, uid, context)
+        pdf_content, __ = env['ir.actions.report']._render_qweb_pdf(report_id, [res_id])
+        return pdf_content
+
+
+class DocumentBatch(models.Model):
+    """Bulk generation of service agreements or roadmap PDFs for many cases."""
+    _name = 'mm.document.batch'
+    _description = 'Document Generation Batch'
+    _order = 'create_date desc'
+
+    name = fields.Char(
+        string='Reference',
+        required=True,
+        readonly=True,
+        default=lambda self: _('New'),
+    )
+    document_type = fields.Selection(
+        selection=[
+            ('service_agreement', 'Service Agreements'),
+            ('roadmap', 'Roadmap PDFs'),
+        ],
+        string='Documents',
+        required=True,
+        readonly=True,
+    )
+    send_documents = fields.Boolean(
+        string='Send for Signature',
+        readonly=True,
+        help='Email each generated service agreement to the client for signature',
+    )
+    state = fields.Selection(
+        selection=[
+            ('queued', 'Queued'),
+            ('running', 'Running'),
+            ('done', 'Done'),
+        ],
+        string='Status',
+        default='queued',
+        required=True,
+        readonly=True,
+    )
+    line_ids = fields.One2many(
+        comodel_name='mm.document.batch.line',
+        inverse_name='batch_id',
+        string='Cases',
+        readonly=True,
+    )
+    worker_count = fields.Integer(
+        string='Parallel Renders',
+        readonly=True,
+    )
+    started_at = fields.Datetime(
+        string='Started',
+        readonly=True,
+    )
+    finished_at = fields.Datetime(
+        string='Finished',
+        readonly=True,
+    )
+
+    # =====================
+    # Progress
+    # =====================
+    total_count = fields.Integer(
+        string='Total',
+        compute='_compute_progress',
+        store=True,
+    )
+    done_count = fields.Integer(
+        string='Generated',
+        compute='_compute_progress',
+        store=True,
+    )
+    error_count = fields.Integer(
+        string='Errors',
+        compute='_compute_progress',
+        store=True,
+    )
+    progress = fields.Float(
+        string='Progress',
+        compute='_compute_progress',
+        store=True,
+    )
+
+    @api.depends('line_ids.state')
+    def _compute_progress(self):
+        for batch in self:
+            states = batch.line_ids.mapped('state')
+            batch.total_count = len(states)
+            batch.done_count = states.count('done')
+            batch.error_count = states.count('failed')
+            finished = batch.done_count + batch.error_count
+            batch.progress = 100.0 * finished / batch.total_count if batch.total_count else 0.0
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', _('New')) == _('New'):
+                vals['name'] = self.env['ir.sequence'].next_by_code('mm.document.batch') or _('New')
+        return super().create(vals_list)
+
+    # =====================
+    # Actions
+    # =====================
+    def action_retry_failed(self):
+        """Queue the failed cases again."""
+        self.ensure_one()
+        failed = self.line_ids.filtered(lambda l: l.state == 'failed')
+        if not failed:
+            raise UserError(_("There are no failed cases to retry."))
+        failed.write({'state': 'pending', 'error': False})
+        self.write({'state': 'queued', 'finished_at': False})
+        self._trigger_cron()
+        return True
+
+    @api.model
+    def _trigger_cron(self):
+        cron = self.env.ref('mm_roadmap.ir_cron_process_document_batches', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    # =====================
+    # Processing
+    # =====================
+    @api.model
+    def _get_worker_count(self):
+        """Parallel renders: configured, else one per core, bounded."""
+        configured = int(self.env['ir.config_parameter'].sudo().get_param(
+            'mm_roadmap.document_batch_workers', 0))
+        return max(1, min(configured or os.cpu_count() or 1, MAX_RENDER_WORKERS))
+
+    @api.model
+    def _cron_process_batches(self):
+        """Process queued batches.
+
+        A batch commits after every chunk, which would release a row
+        lock, so workers claim batches with a session-level advisory lock
+        instead; it is released on unlock or when the worker dies.
+        """
+        self.env.cr.execute("""
+            SELECT id FROM mm_document_batch
+             WHERE state IN ('queued', 'running')
+             ORDER BY id
+        """)
+        for (batch_id,) in self.env.cr.fetchall():
+            self.env.cr.execute("SELECT pg_try_advisory_lock(%s, %s)", [BATCH_LOCK_NAMESPACE, batch_id])
+            if not self.env.cr.fetchone()[0]:
+                continue
+            try:
+                batch = self.browse(batch_id)
+                batch.invalidate_recordset()
+                if batch.state != 'done':
+                    batch._process()
+            finally:
+                self.env.cr.execute("SELECT pg_advisory_unlock(%s, %s)", [BATCH_LOCK_NAMESPACE, batch_id])
+        return True
+
+    def _process(self):
+        """Render all pending lines, committing after each chunk.
+
+        Renders fan out over a bounded thread pool, each thread driving a
+        wkhtmltopdf process in its own cursor. Attachments and signature
+        requests are written by this cursor and committed once per chunk,
+        so progress is visible while the batch runs and a crash only
+        loses the current chunk.
+        """
+        self.ensure_one()
+        workers = self._get_worker_count()
+        self.write({
+            'state': 'running',
+            'worker_count': workers,
+            'started_at': self.started_at or fields.Datetime.now(),
+        })
+        self.env.cr.commit()
+
+        chunk_size = workers * 2
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mm_document_batch') as executor:
+            while True:
+                lines = self.line_ids.filtered(lambda l: l.state == 'pending')[:chunk_size]
+                if not lines:
+                    break
+                self._process_chunk(lines, executor)
+                self.env.cr.commit()
+
+        self.write({
+            'state': 'done',
+            'finished_at': fields.Datetime.now(),
+        })
+        self.env.cr.commit()
+        _logger.info(
+            "Document batch %s finished: %s generated, %s failed out of %s",
+            self.name, self.done_count, self.error_count, self.total_count,
+        )
+
+    def _process_chunk(self, lines, executor):
+        registry = self.env.registry
+        uid = self.env.uid
+        context = dict(self.env.context, mm_render_background=True)
+
+        futures = {}
+        for line in lines:
+            try:
+                with self.env.cr.savepoint():
+                    report, target = line._prepare_render()
+            except Exception as e:
+                line.write({'state': 'failed', 'error': str(e)})
+                continue
+            future = executor.submit(_render_pdf, registry, uid, context, report.id, target.id)
+            futures[future] = line
+
+        for future in as_completed(futures):
+            line = futures[future]
+            try:
+                pdf_content = future.result()
+                with self.env.cr.savepoint():
+                    line._store_result(pdf_content)
+                line.write({'state': 'done', 'error': False})
+            except Exception as e:
+                _logger.warning("Document batch %s: case %s failed", self.name, line.case_id.name, exc_info=True)
+                line.write({'state': 'failed', 'error': str(e)})
+
+
+class DocumentBatchLine(models.Model):
+    """One case of a document batch, with its outcome."""
+    _name = 'mm.document.batch.line'
+    _description = 'Document Generation Batch Line'
+    _order = 'batch_id, id'
+
+    batch_id = fields.Many2one(
+        comodel_name='mm.document.batch',
+        string='Batch',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    case_id = fields.Many2one(
+        comodel_name='mm.immigration.case',
+        string='Case',
+        required=True,
+        ondelete='cascade',
+    )
+    partner_id = fields.Many2one(
+        related='case_id.partner_id',
+        string='Client',
+    )
+    state = fields.Selection(
+        selection=[
+            ('pending', 'Pending'),
+            ('done', 'Generated'),
+            ('failed', 'Failed'),
+        ],
+        string='Status',
+        default='pending',
+        required=True,
+    )
+    error = fields.Text(
+        string='Error',
+    )
+    esign_request_id = fields.Many2one(
+        comodel_name='mm.esign.request',
+        string='Signature Request',
+    )
+    roadmap_id = fields.Many2one(
+        comodel_name='mm.roadmap.document',
+        string='Roadmap',
+    )
+
+    def _prepare_render(self):
+        """Validate the case and return ``(report, record to render)``.
+
+        Raises when the document cannot be generated for this case.
+        """
+        self.ensure_one()
+        case = self.case_id
+        if self.batch_id.document_type == 'service_agreement':
+            case._check_can_create_service_agreement()
+            report = self.env.ref('mm_esign.report_service_agreement')
+            return report, case
+        roadmap = case.current_roadmap_id
+        if not roadmap:
+            raise UserError(_("Case %s has no roadmap.") % case.name)
+        self.roadmap_id = roadmap
+        return self.env.ref('mm_roadmap.action_report_roadmap'), roadmap
+
+    def _store_result(self, pdf_content):
+        """Attach the rendered PDF to its document."""
+        self.ensure_one()
+        if self.batch_id.document_type == 'roadmap':
+            self.roadmap_id._set_pdf(pdf_content)
+            return
+        esign_request = self.env['mm.esign.request'].create(
+            self.case_id._prepare_service_agreement_values()
+        )
+        esign_request._set_document(pdf_content)
+        self.esign_request_id = esign_request
+        if self.batch_id.send_documents:
+            esign_request.action_send()
@@ -26,6 +26,12 @@ class PNPOpportunity(models.Model):
         required=True,
         domain="[('country_id.code', '=', 'CA')]",
     )
+    stream_id = fields.Many2one(
+        comodel_name='mm.pnp.stream',
+        string='Stream',
+        index=True,
+        help='Stream definition the fit flags were evaluated against',
+    )
     province_code = fields.Char(
         related='province_id.code',
         string='Code',
@@ -83,6 +89,15 @@ class PNPOpportunity(models.Model):
         string='Meets Settlement Funds',
         default=False,
     )
+    settlement_funds_shortfall = fields.Monetary(
+        related='roadmap_id.profile_id.settlement_funds_shortfall',
+        string='Funds Shortfall',
+        currency_field='cad_currency_id',
+    )
+    cad_currency_id = fields.Many2one(
+        related='roadmap_id.profile_id.cad_currency_id',
+        string='CAD',
+    )
     has_job_offer = fields.Boolean(
         string='Has/Can Get Job Offer',
         default=False,
@@ -133,6 +148,23 @@ class PNPOpportunity(models.Model):
             stars = '★' * int(record.fit_rating or 0) + '☆' * (5 - int(record.fit_rating or 0))
             record.fit_rating_display = f"{stars} {label}"
 
+    @api.onchange('stream_id')
+    def _onchange_stream(self):
+        """Copy program details from the selected stream."""
+        if self.stream_id:
+            self.update(self._prepare_stream_values(self.stream_id))
+
+    @api.model
+    def _prepare_stream_values(self, stream):
+        """Program details copied from a stream definition."""
+        return {
+            'province_id': stream.province_id.id,
+            'program_name': stream.name,
+            'program_stream': stream.program_stream,
+            'estimated_processing_months': stream.estimated_processing_months,
+            'draw_frequency': stream.draw_frequency,
+        }
+
     @api.onchange('province_id')
     def _onchange_province(self):
         """Set default program name based on province."""
@@ -151,5 +183,7 @@ class PNPOpportunity(models.Model):
             'NU': 'Nunavut Nominee Program',
             'QC': 'Quebec Skilled Worker Program (QSWP)',
         }
+        if self.stream_id:
+            return
         if self.province_id and self.province_id.code:
             self.program_name = province_programs.get(self.province_id.code, '')
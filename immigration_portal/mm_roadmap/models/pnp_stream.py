@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+
+from .crs_scenario import EDUCATION_INDEX
+
+# Criteria that decide eligibility; the others only lower the fit rating
+HARD_CRITERIA = (
+    'meets_education_requirement',
+    'meets_language_requirement',
+    'meets_experience_requirement',
+)
+SOFT_CRITERIA = (
+    'meets_settlement_funds',
+)
+
+
+class PNPStream(models.Model):
+    """Provincial Nominee Program stream with its eligibility criteria."""
+    _name = 'mm.pnp.stream'
+    _description = 'PNP Stream'
+    _order = 'province_id, sequence, name'
+
+    name = fields.Char(
+        string='Program Name',
+        required=True,
+        translate=True,
+    )
+    code = fields.Char(
+        string='Code',
+        required=True,
+    )
+    active = fields.Boolean(
+        string='Active',
+        default=True,
+    )
+    sequence = fields.Integer(
+        string='Sequence',
+        default=10,
+    )
+    province_id = fields.Many2one(
+        comodel_name='res.country.state',
+        string='Province/Territory',
+        required=True,
+        domain="[('country_id.code', '=', 'CA')]",
+    )
+    program_stream = fields.Selection(
+        selection=[
+            ('ee_aligned', 'Express Entry Aligned'),
+            ('non_ee', 'Non-Express Entry'),
+            ('employer_driven', 'Employer-Driven'),
+            ('entrepreneur', 'Entrepreneur/Business'),
+            ('international_graduate', 'International Graduate'),
+        ],
+        string='Stream Type',
+        required=True,
+    )
+
+    # =====================
+    # Criteria
+    # =====================
+    min_clb = fields.Integer(
+        string='Minimum CLB',
+        help='Minimum CLB in the strongest official language (all abilities)',
+    )
+    min_french_clb = fields.Integer(
+        string='Minimum French CLB',
+        help='Minimum NCLC in French; 0 when French is not required',
+    )
+    max_teer = fields.Selection(
+        selection=[
+            ('0', 'TEER 0'),
+            ('1', 'TEER 1'),
+            ('2', 'TEER 2'),
+            ('3', 'TEER 3'),
+            ('4', 'TEER 4'),
+            ('5', 'TEER 5'),
+        ],
+        string='Highest Accepted TEER',
+        help='Qualifying experience must be in this TEER category or a lower one. Leave empty to accept any.',
+    )
+    min_experience_months = fields.Integer(
+        string='Minimum Experience (Months)',
+    )
+    min_education = fields.Selection(
+        selection=[
+            ('secondary', 'Secondary School'),
+            ('one_year', 'One-year Program'),
+            ('two_year', 'Two-year Program'),
+            ('bachelors', "Bachelor's Degree"),
+            ('two_or_more', 'Two or More Credentials'),
+            ('masters', "Master's Degree"),
+            ('phd', 'Doctoral (PhD)'),
+        ],
+        string='Minimum Education',
+    )
+    uses_federal_funds_table = fields.Boolean(
+        string='Uses IRCC Funds Table',
+        help='Settlement funds are checked against the IRCC minimum for the family size',
+    )
+    min_settlement_funds = fields.Float(
+        string='Minimum Settlement Funds (CAD)',
+        help='Fixed minimum, used when the stream does not follow the IRCC funds table',
+    )
+    requires_job_offer = fields.Boolean(
+        string='Requires Job Offer',
+    )
+    requires_connection = fields.Boolean(
+        string='Requires Provincial Connection',
+        help='Family member who is a citizen or permanent resident in the province',
+    )
+
+    # =====================
+    # Processing
+    # =====================
+    estimated_processing_months = fields.Integer(
+        string='Processing Time (Months)',
+    )
+    draw_frequency = fields.Selection(
+        selection=[
+            ('weekly', 'Weekly'),
+            ('biweekly', 'Bi-weekly'),
+            ('monthly', 'Monthly'),
+            ('quarterly', 'Quarterly'),
+            ('irregular', 'Irregular'),
+        ],
+        string='Draw Frequency',
+    )
+    notes = fields.Text(
+        string='Notes',
+    )
+
+    @api.constrains('code')
+    def _check_unique_code(self):
+        """Ensure stream codes are unique."""
+        for record in self:
+            existing = self.with_context(active_test=False).search([
+                ('code', '=', record.code),
+                ('id', '!=', record.id),
+            ], limit=1)
+            if existing:
+                raise ValidationError(_("Stream code %s is already used.") % record.code)
+
+    # =====================
+    # Cache Invalidation
+    # =====================
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    # =====================
+    # Rule Compilation
+    # =====================
+    def _compile_predicates(self):
+        """Turn the stream criteria into a dict of flag -> predicate(facts)."""
+        self.ensure_one()
+        min_education = EDUCATION_INDEX.get(self.min_education, 0)
+        min_clb = self.min_clb
+        min_french_clb = self.min_french_clb
+        max_teer = int(self.max_teer) if self.max_teer else None
+        min_months = self.min_experience_months
+        min_funds = self.min_settlement_funds
+        uses_federal_funds_table = self.uses_federal_funds_table
+        province_id = self.province_id.id
+
+        def meets_language(facts):
+            return facts['clb'] >= min_clb and facts['french_clb'] >= min_french_clb
+
+        def meets_experience(facts):
+            if max_teer is None:
+                return facts['experience_months'] >= min_months
+            return facts['experience_months_by_teer'][max_teer] >= min_months
+
+        def meets_funds(facts):
+            if uses_federal_funds_table:
+                return facts['meets_federal_funds']
+            return facts['settlement_funds'] >= min_funds
+
+        def has_connection(facts):
+            return province_id in facts['connected_province_ids']
+
+        return {
+            'meets_education_requirement': lambda facts: facts['education'] >= min_education,
+            'meets_language_requirement': meets_language,
+            'meets_experience_requirement': meets_experience,
+            'meets_settlement_funds': meets_funds,
+            'has_connection': has_connection,
+        }
+
+    def _get_requirements(self):
+        """Requirements that depend on facts the profile does not hold."""
+        self.ensure_one()
+        return {
+            'job_offer': self.requires_job_offer,
+            'connection': self.requires_connection,
+        }
+
+    @tools.ormcache()
+    def _get_compiled_streams(self):
+        """Compiled predicates of every active stream, cached per registry."""
+        return tuple(
+            (stream.id, stream._get_requirements(), stream._compile_predicates())
+            for stream in self.sudo().search([])
+        )
+
+    # =====================
+    # Batch Evaluation
+    # =====================
+    @api.model
+    def _get_profile_facts(self, profile):
+        """Extract the plain values the stream predicates read."""
+        experience = profile.experience_ids.filtered('qualifies_for_crs')
+        months_by_teer = [0] * 6
+        for record in experience:
+            if record.noc_teer_category:
+                months_by_teer[int(record.noc_teer_category)] += record.duration_months or 0
+        # Cumulative: months in TEER <= n
+        for teer in range(1, 6):
+            months_by_teer[teer] += months_by_teer[teer - 1]
+
+        connected = set()
+        if profile.family_member_province_id and profile.family_member_is_citizen_pr:
+            connected.add(profile.family_member_province_id.id)
+
+        return {
+            'education': EDUCATION_INDEX.get(
+                profile.primary_education_level or profile.highest_education, 0),
+            'clb': max(profile.english_clb_minimum or 0, profile.french_clb_minimum or 0),
+            'french_clb': profile.french_clb_minimum or 0,
+            'experience_months': sum(experience.mapped('duration_months')),
+            'experience_months_by_teer': months_by_teer,
+            'settlement_funds': profile.settlement_funds_cad,
+            'meets_federal_funds': profile.meets_settlement_funds,
+            'connected_province_ids': connected,
+        }
+
+    @api.model
+    def _compute_fit_rating(self, flags, requirements, has_job_offer):
+        """Map evaluated flags onto the opportunity fit rating."""
+        hard_missing = sum(1 for key in HARD_CRITERIA if not flags[key])
+        if hard_missing:
+            return '1' if hard_missing == 1 else '0'
+        soft_missing = sum(1 for key in SOFT_CRITERIA if not flags[key])
+        if requirements['connection'] and not flags['has_connection']:
+            soft_missing += 1
+        if requirements['job_offer'] and not has_job_offer:
+            soft_missing += 1
+        return str(max(5 - soft_missing, 2))
+
+    @api.model
+    def _match_profiles(self, profiles):
+        """Evaluate every stream against every profile in one batch.
+
+        Returns ``{profile_id: {stream_id: (flags, requirements)}}``.
+        """
+        compiled = self._get_compiled_streams()
+        results = {}
+        for profile in profiles:
+            facts = self._get_profile_facts(profile)
+            results[profile.id] = {
+                stream_id: (
+                    {flag: predicate(facts) for flag, predicate in predicates.items()},
+                    requirements,
+                )
+                for stream_id, requirements, predicates in compiled
+            }
+        return results
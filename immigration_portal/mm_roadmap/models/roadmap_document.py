@@ -5,15 +5,36 @@ from odoo.exceptions import UserError, ValidationError
 import base64
 import logging
 
+from odoo.addons.mm_portal.tools.pdf_linearize import linearize_pdf
+
+from .crs_scenario import explore
+
 _logger = logging.getLogger(__name__)
 
+# Number of ranked scenarios kept on the roadmap
+CRS_SCENARIO_LIMIT = 25
+
+# Fields read by the roadmap report template
+REPORT_FIELDS = (
+    'appendix_notes', 'backup_strategy', 'backup_strategy_rationale', 'case_id',
+    'client_citizenship', 'client_full_name', 'consultant_id', 'crs_simulation_notes',
+    'crs_tier', 'crs_total_score', 'document_date', 'eca_guidance', 'estimated_pr_date',
+    'executive_summary', 'fsw_analysis', 'fsw_eligible', 'fsw_total_points',
+    'language_guidance', 'milestone_ids', 'next_steps', 'pnp_analysis',
+    'pnp_opportunity_ids', 'primary_strategy', 'primary_strategy_rationale', 'profile_age',
+    'profile_canadian_exp_months', 'profile_children_count', 'profile_education',
+    'profile_english_clb', 'profile_experience_years', 'profile_french_clb',
+    'profile_marital_status', 'timeline_notes', 'timeline_start_date', 'version',
+)
+
 
 class RoadmapDocument(models.Model):
     """Immigration Roadmap Document."""
     _name = 'mm.roadmap.document'
     _description = 'Immigration Roadmap'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'portal.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'portal.mixin', 'mm.rendition.mixin', 'mm.outbox.mixin']
     _order = 'create_date desc'
+    _rendition_fields = ['pdf_document']
 
     name = fields.Char(
         string='Reference',
@@ -125,6 +146,21 @@ class RoadmapDocument(models.Model):
     profile_canadian_exp_months = fields.Integer(
         related='profile_id.total_canadian_experience_months', string='Canadian Experience (Months)')
 
+    # Settlement funds
+    profile_family_size = fields.Integer(
+        related='profile_id.family_size', string='Family Size')
+    profile_settlement_funds_cad = fields.Monetary(
+        related='profile_id.settlement_funds_cad', string='Settlement Funds',
+        currency_field='profile_cad_currency_id')
+    profile_settlement_funds_required = fields.Monetary(
+        related='profile_id.settlement_funds_required', string='Required Funds',
+        currency_field='profile_cad_currency_id')
+    profile_settlement_funds_shortfall = fields.Monetary(
+        related='profile_id.settlement_funds_shortfall', string='Funds Shortfall',
+        currency_field='profile_cad_currency_id')
+    profile_cad_currency_id = fields.Many2one(
+        related='profile_id.cad_currency_id', string='CAD')
+
     # =====================
     # Section 5: PR Factors Assessment (from CRS)
     # =====================
@@ -156,6 +192,20 @@ class RoadmapDocument(models.Model):
         string='CRS Simulation Notes',
         help='Analysis of English-first vs French-first strategies',
     )
+    crs_scenario_ids = fields.One2many(
+        comodel_name='mm.roadmap.crs.scenario',
+        inverse_name='roadmap_id',
+        string='CRS Scenarios',
+    )
+    crs_scenario_baseline = fields.Integer(
+        string='Scenario Baseline CRS',
+        readonly=True,
+        help='Profile CRS score the scenario gains are measured against',
+    )
+    crs_scenario_date = fields.Datetime(
+        string='Scenarios Generated',
+        readonly=True,
+    )
 
     # =====================
     # Section 7: PNP Opportunities
@@ -368,11 +418,12 @@ class RoadmapDocument(models.Model):
             self.case_id.stage_id = roadmap_stage
         
         # Send notification email to client
-        template = self.env.ref('mm_roadmap.mail_template_roadmap_delivered', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
+        self._outbox_send_mail('mm_roadmap.mail_template_roadmap_delivered')
         
-        self.message_post(
+        # Refresh the roadmap page if the client has it open
+        self.case_id._notify_portal('roadmap', keys=[f'roadmap:{self.id}'])
+        
+        self._outbox_message_post(
             body=_("Roadmap delivered to client."),
             message_type='notification',
         )
@@ -399,7 +450,7 @@ class RoadmapDocument(models.Model):
         if consultation_stage:
             self.case_id.stage_id = consultation_stage
         
-        self.message_post(
+        self._outbox_message_post(
             body=_("Roadmap acknowledged by client."),
             message_type='notification',
         )
@@ -446,11 +497,17 @@ class RoadmapDocument(models.Model):
         # Use Odoo's report engine
         report = self.env.ref('mm_roadmap.action_report_roadmap')
         pdf_content, _ = report._render_qweb_pdf(report.id, [self.id])
+        self._set_pdf(pdf_content)
         
+        return True
+
+    def _set_pdf(self, pdf_content):
+        """Store a rendered roadmap PDF (raw bytes)."""
+        self.ensure_one()
         filename = f"Immigration_Roadmap_{self.case_id.name}_{self.version}.pdf"
         
         self.write({
-            'pdf_document': base64.b64encode(pdf_content),
+            'pdf_document': base64.b64encode(linearize_pdf(pdf_content)),
             'pdf_filename': filename,
             'generated_date': fields.Datetime.now(),
         })
@@ -459,8 +516,6 @@ class RoadmapDocument(models.Model):
             body=_("PDF document generated."),
             message_type='notification',
         )
-        
-        return True
 
     def action_download_pdf(self):
         """Download the PDF document."""
@@ -474,6 +529,19 @@ class RoadmapDocument(models.Model):
             'target': 'self',
         }
 
+    def _get_report_cache_dependencies(self, report):
+        """Records and fields the roadmap report template reads."""
+        return [
+            (self, REPORT_FIELDS),
+            (self.case_id, ['name']),
+            (self.consultant_id, ['name']),
+            # Logo shown in the header
+            (self.case_id.company_id or self.env.company, None),
+            (self.pnp_opportunity_ids, ['estimated_processing_months', 'fit_rating',
+                                        'program_name', 'program_stream', 'province_id']),
+            (self.milestone_ids, ['description', 'is_critical', 'name', 'target_date']),
+        ]
+
     # =====================
     # Auto-populate from Profile
     # =====================
@@ -495,6 +563,83 @@ class RoadmapDocument(models.Model):
             message_type='notification',
         )
 
+    # =====================
+    # CRS Scenario Explorer
+    # =====================
+    def action_explore_crs_scenarios(self):
+        """Score every single- and two-step CRS improvement for the profile."""
+        self.ensure_one()
+
+        if not self.case_id.profile_id:
+            raise UserError(_("No client profile found for this case."))
+
+        Scenario = self.env['mm.roadmap.crs.scenario']
+        baseline = Scenario._get_profile_baseline(self.case_id.profile_id)
+        baseline_scores, rows = explore(baseline)
+        rows = rows[:CRS_SCENARIO_LIMIT]
+
+        self.crs_scenario_ids.unlink()
+        Scenario.create([
+            dict(row, roadmap_id=self.id, sequence=rank)
+            for rank, row in enumerate(rows, start=1)
+        ])
+        self.write({
+            'crs_scenario_baseline': int(baseline_scores['total'][0]),
+            'crs_scenario_date': fields.Datetime.now(),
+        })
+
+        self.message_post(
+            body=_("CRS scenario explorer ranked %(count)s scenarios (baseline %(score)s).",
+                   count=len(rows), score=self.crs_scenario_baseline),
+            message_type='notification',
+        )
+
+    # =====================
+    # PNP Stream Matching
+    # =====================
+    def action_match_pnp_streams(self):
+        """Evaluate all PNP streams against the roadmap profiles in one batch.
+
+        Existing opportunity rows linked to a stream are updated in place
+        (keeping the consultant's job offer flag and notes); new rows are
+        only created for streams the client is not ruled out of.
+        """
+        roadmaps = self.filtered(lambda r: r.profile_id and r.state in ('draft', 'review'))
+        if not roadmaps:
+            raise UserError(_("Select at least one draft or in-review roadmap with a client profile."))
+
+        Stream = self.env['mm.pnp.stream']
+        Opportunity = self.env['mm.pnp.opportunity']
+        results = Stream._match_profiles(roadmaps.profile_id)
+        streams = Stream.browse(
+            {stream_id for matches in results.values() for stream_id in matches})
+
+        to_create = []
+        for roadmap in roadmaps:
+            existing = {opp.stream_id.id: opp for opp in roadmap.pnp_opportunity_ids if opp.stream_id}
+            for stream in streams:
+                flags, requirements = results[roadmap.profile_id.id][stream.id]
+                opportunity = existing.get(stream.id)
+                has_job_offer = opportunity.has_job_offer if opportunity else False
+                vals = dict(
+                    flags,
+                    fit_rating=Stream._compute_fit_rating(flags, requirements, has_job_offer),
+                )
+                if opportunity:
+                    opportunity.write(vals)
+                elif vals['fit_rating'] != '0':
+                    vals.update(Opportunity._prepare_stream_values(stream))
+                    vals.update(roadmap_id=roadmap.id, stream_id=stream.id)
+                    to_create.append(vals)
+        Opportunity.create(to_create)
+
+        for roadmap in roadmaps:
+            roadmap.message_post(
+                body=_("PNP streams matched against the client profile."),
+                message_type='notification',
+            )
+        return True
+
     def action_add_default_milestones(self):
         """Add default timeline milestones."""
         self.ensure_one()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+
+class DocumentBatchWizard(models.TransientModel):
+    _name = 'mm.document.batch.wizard'
+    _description = 'Generate Documents in Bulk'
+
+    document_type = fields.Selection(
+        selection=[
+            ('service_agreement', 'Service Agreements'),
+            ('roadmap', 'Roadmap PDFs'),
+        ],
+        string='Documents',
+        default='service_agreement',
+        required=True,
+    )
+    send_documents = fields.Boolean(
+        string='Send for Signature',
+        help='Email each generated service agreement to the client for signature',
+    )
+    case_ids = fields.Many2many(
+        comodel_name='mm.immigration.case',
+        string='Cases',
+        required=True,
+    )
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'mm.immigration.case':
+            res['case_ids'] = [(6, 0, self.env.context.get('active_ids', []))]
+        return res
+
+    def action_generate(self):
+        """Queue a batch for the selected cases and open it."""
+        self.ensure_one()
+        if not self.case_ids:
+            raise UserError(_("Please select at least one case."))
+
+        batch = self.env['mm.document.batch'].create({
+            'document_type': self.document_type,
+            'send_documents': self.document_type == 'service_agreement' and self.send_documents,
+            'line_ids': [(0, 0, {'case_id': case.id}) for case in self.case_ids],
+        })
+        batch._trigger_cron()
+
+        return {
+            'name': _('Document Batch'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'mm.document.batch',
+            'res_id': batch.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
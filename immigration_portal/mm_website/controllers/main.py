@@ -50,7 +50,8 @@ class MigrationMonitorWebsite(http.Controller):
     # Contact Form Submission
     # -------------------------------------------------------------------------
     
-    @http.route(['/contact/submit'], type='http', auth='public', website=True, methods=['POST'], csrf=True)
+    @http.route(['/contact/submit'], type='http', auth='public', website=True, methods=['POST'], csrf=True,
+                mm_rate_limit='contact')
     def contact_submit(self, **post):
         """Handle contact form submission."""
         # Validate required fields
@@ -104,7 +105,8 @@ class MigrationMonitorWebsite(http.Controller):
     # Newsletter Subscription
     # -------------------------------------------------------------------------
     
-    @http.route(['/newsletter/subscribe'], type='json', auth='public', website=True, methods=['POST'])
+    @http.route(['/newsletter/subscribe'], type='json', auth='public', website=True, methods=['POST'],
+                mm_rate_limit='newsletter')
     def newsletter_subscribe(self, email, **kw):
         """Handle newsletter subscription via AJAX."""
         if not email:
@@ -166,12 +168,24 @@ class MigrationMonitorWebsite(http.Controller):
             'page_title': 'Canadian Immigration Consulting',
         }
     
+    def _queue_mail(self, template, record, priority='normal'):
+        """Queue a mail without blocking the request on SMTP.
+
+        Uses the prioritized mm mail queue when mm_immigration is
+        installed, else Odoo's standard mail queue.
+        """
+        template = template.sudo()
+        if hasattr(template, '_mm_send_queued'):
+            template._mm_send_queued(record.id, priority=priority)
+        else:
+            template.send_mail(record.id)
+    
     def _send_inquiry_notification(self, inquiry):
         """Send notification email to admin about new inquiry."""
         try:
             template = request.env.ref('mm_website.mail_template_inquiry_notification', raise_if_not_found=False)
             if template:
-                template.sudo().send_mail(inquiry.id, force_send=True)
+                self._queue_mail(template, inquiry, priority='low')
         except Exception as e:
             _logger.warning("Failed to send inquiry notification: %s", str(e))
     
@@ -180,6 +194,6 @@ class MigrationMonitorWebsite(http.Controller):
         try:
             template = request.env.ref('mm_website.mail_template_inquiry_confirmation', raise_if_not_found=False)
             if template:
-                template.sudo().send_mail(inquiry.id, force_send=True)
+                self._queue_mail(template, inquiry)
         except Exception as e:
             _logger.warning("Failed to send confirmation email: %s", str(e))
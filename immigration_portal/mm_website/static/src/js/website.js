@@ -61,7 +61,7 @@ function initNewsletterForm() {
                 showMessage(messageDiv, data.result.message, 'success');
                 emailInput.value = '';
             } else {
-                showMessage(messageDiv, data.result?.message || 'An error occurred. Please try again.', 'error');
+                showMessage(messageDiv, data.result?.message || data.error?.message || 'An error occurred. Please try again.', 'error');
             }
         } catch (error) {
             console.error('Newsletter subscription error:', error);